@@ -0,0 +1,122 @@
+import json
+import sys
+import threading
+import time
+import zlib
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from kline_windows import INTERVAL_MS
+
+# every symbol has klines from here on, as if it was listed that day.
+LISTED_MS = int(datetime(2019, 9, 8, tzinfo=timezone.utc).timestamp() * 1000)
+KLINE_PATHS = ('/api/v3/klines', '/fapi/v1/klines')
+KLINES_WEIGHT = 2
+
+
+def get_parser():
+    parser = ArgumentParser(description="A local stand-in for the Binance klines endpoints, to try the "
+                                        "downloader against - e.g. klines_downloader.py --base-url http://127.0.0.1:8000")
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on')
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds each request takes')
+    parser.add_argument('--weight-limit', type=int, default=6000,
+                        help='Request weight per minute before answering 429 with a Retry-After')
+    return parser
+
+
+def make_klines(symbol, interval, start_ms, end_ms, limit):
+    """Deterministic klines of the symbol - the same request always gets the same prices."""
+    step = INTERVAL_MS[interval]
+    first = max(start_ms, LISTED_MS)
+    first = LISTED_MS + -(-(first - LISTED_MS) // step) * step
+    base = 10 + zlib.crc32(symbol.encode()) % 1000
+    klines = []
+    for open_ms in range(first, min(end_ms, int(time.time() * 1000)) + 1, step):
+        if len(klines) == limit:
+            break
+        n = (open_ms - LISTED_MS) // step
+        close = base * (1 + n * 1e-4) * (1 + ((zlib.crc32(f'{symbol}{n}'.encode()) % 2000) / 1000 - 1) * 0.03)
+        open_ = close * 0.999
+        klines.append([open_ms, f'{open_:.4f}', f'{close * 1.01:.4f}', f'{open_ * 0.99:.4f}', f'{close:.4f}',
+                       f'{base * 3:.2f}', open_ms + step - 1, f'{base * 3 * close:.2f}', 100 + n % 50,
+                       f'{base:.2f}', f'{base * close:.2f}', '0'])
+    return klines
+
+
+class WeightCounter:
+    """Request weight used in the current minute, as Binance counts it."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.minute = 0
+        self.used = 0
+        self.lock = threading.Lock()
+
+    def add(self, weight):
+        """The weight used this minute including this request, and the seconds to wait if that is too much."""
+        with self.lock:
+            now = time.time()
+            if int(now // 60) != self.minute:
+                self.minute = int(now // 60)
+                self.used = 0
+            self.used += weight
+            retry_after = 60 - int(now % 60) if self.used > self.limit else 0
+            return self.used, retry_after
+
+
+class KlineHandler(BaseHTTPRequestHandler):
+    # keep-alive, so the downloader's pooled sessions are really reused.
+    protocol_version = 'HTTP/1.1'
+    latency = 0.0
+    weights: WeightCounter = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        time.sleep(self.latency)
+
+        if url.path in ('/api/v3/ping', '/fapi/v1/ping'):
+            return self.reply(200, {}, weight=1)
+        if url.path not in KLINE_PATHS:
+            return self.reply(404, {'code': -1, 'msg': 'Unknown path'})
+        if params.get('interval') not in INTERVAL_MS or 'symbol' not in params:
+            return self.reply(400, {'code': -1120, 'msg': 'Invalid interval or symbol.'})
+
+        used, retry_after = self.weights.add(KLINES_WEIGHT)
+        if retry_after:
+            return self.reply(429, {'code': -1003, 'msg': 'Too many requests.'}, used=used, retry_after=retry_after)
+        limit = min(int(params.get('limit', 500)), 1000)
+        klines = make_klines(params['symbol'], params['interval'], int(params.get('startTime', LISTED_MS)),
+                             int(params.get('endTime', time.time() * 1000)), limit)
+        self.reply(200, klines, used=used)
+
+    def reply(self, status, body, weight=0, used=None, retry_after=None):
+        if used is None:
+            used, _ = self.weights.add(weight)
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('X-MBX-USED-WEIGHT-1M', str(used))
+        if retry_after:
+            self.send_header('Retry-After', str(retry_after))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(port=0, latency=0.0, weights=None):
+    """A server on 127.0.0.1 with its own weight counter - port 0 picks a free port, see server.server_port."""
+    handler = type('Handler', (KlineHandler,), {'latency': latency, 'weights': weights or WeightCounter(6000)})
+    return ThreadingHTTPServer(('127.0.0.1', port), handler)
+
+
+if __name__ == '__main__':
+    args = get_parser().parse_args(sys.argv[1:])
+    server = make_server(args.port, args.latency, WeightCounter(args.weight_limit))
+    print(f'Serving fake klines on http://127.0.0.1:{server.server_port}')
+    server.serve_forever()
@@ -0,0 +1,52 @@
+from datetime import datetime, timezone
+
+INTERVAL_MS = {'1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000, '1h': 3_600_000,
+               '2h': 7_200_000, '4h': 14_400_000, '6h': 21_600_000, '8h': 28_800_000, '12h': 43_200_000,
+               '1d': 86_400_000, '3d': 259_200_000, '1w': 604_800_000}
+# the most klines Binance returns for one request.
+PAGE_LIMIT = 1000
+
+
+def utc_ms(moment):
+    return int(moment.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def year_range(year):
+    """The first and last millisecond of the year, in UTC - the year a kline belongs to is the UTC year it opens in."""
+    return utc_ms(datetime(year, 1, 1)), utc_ms(datetime(year + 1, 1, 1)) - 1
+
+
+def date_range(start, end=None):
+    """From the start of the start day to the end of the end day (YYYY-MM-DD, UTC), or to now without an end."""
+    start_ms = utc_ms(datetime.strptime(start, '%Y-%m-%d'))
+    if end is None:
+        return start_ms, now_ms()
+    end_ms = utc_ms(datetime.strptime(end, '%Y-%m-%d')) + INTERVAL_MS['1d'] - 1
+    if end_ms < start_ms:
+        raise ValueError(f'The end {end} is before the start {start}')
+    return start_ms, end_ms
+
+
+def split_by_year(start_ms, end_ms):
+    """The range as (year, start, end) parts, one for each year it touches - each year has a file of its own."""
+    parts = []
+    for year in range(datetime.utcfromtimestamp(start_ms / 1000).year,
+                      datetime.utcfromtimestamp(end_ms / 1000).year + 1):
+        first, last = year_range(year)
+        parts.append((year, max(first, start_ms), min(last, end_ms)))
+    return parts
+
+
+def now_ms():
+    return int(datetime.now(timezone.utc).timestamp() * 1000)
+
+
+def plan_windows(start_ms, end_ms, interval, limit=PAGE_LIMIT):
+    """Splits the range into (start, end) windows of open times, each holding at most a page of klines.
+
+    Every window is bounded at both ends, so each request returns only klines inside the range, and the
+    windows can be fetched in any order.  Nothing is planned past now - those klines do not exist yet.
+    """
+    span = INTERVAL_MS[interval] * limit
+    end_ms = min(end_ms, now_ms())
+    return [(start, min(start + span - 1, end_ms)) for start in range(start_ms, end_ms + 1, span)]
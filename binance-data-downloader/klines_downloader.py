@@ -1,105 +1,307 @@
 import csv
+import heapq
 import sys
 import glob
+import os
+import threading
 from argparse import ArgumentParser, RawTextHelpFormatter
-from datetime import datetime
-from binance.client import Client
-from binance.enums import HistoricalKlinesType
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+from itertools import islice
+from operator import itemgetter
+import numpy as np
 from tqdm import tqdm
-from utils import read_symbols, create_path
+from kline_windows import INTERVAL_MS, PAGE_LIMIT, date_range, now_ms, plan_windows, split_by_year, year_range
+from rate_limiter import DEFAULT_WEIGHT_PER_MINUTE, RateLimitedClient, WeightLimiter
+from utils import checkpoint_path, create_path, read_checkpoint, read_symbols, replace_file, write_checkpoint
 
-INTERVALS = ['1m', '3m', '5m', '15m', '30m', '1h', '2h', '4h', '6h', '8h', '12h', '1d', '3d', '1w']
-DATE_FORMAT = '%d/%m/%Y'
-
-# calculate start time for a year
-def get_start_time(year):
-    return str(datetime(year, 1, 1).timestamp() * 1000)
+INTERVALS = list(INTERVAL_MS)
+DAY_MS = INTERVAL_MS['1d']
+# how many pages one symbol may have downloaded but not yet written.
+PAGES_AHEAD = 8
 
 
 def get_parser():
     parser = ArgumentParser(description="This is a script to download historical klines data", formatter_class=RawTextHelpFormatter)
     parser.add_argument('-i', dest='interval', default='1d', help='KLINE interval')
     parser.add_argument('-y', dest='year', default='2024', help='The year to obtain data for')
+    parser.add_argument('--start', help='Download from this day (YYYY-MM-DD, UTC) instead of a whole year')
+    parser.add_argument('--end', help='Download up to and including this day, with --start - default is now')
     # add a simple 'combine' flag to combine all the data into one file
     parser.add_argument('-c', dest='combine', action='store_true', help='Combine all data into one file')  
+    parser.add_argument('-u', dest='update', action='store_true',
+                        help='Only download the klines after the last one stored, resuming from its checkpoint')
+    parser.add_argument('-w', dest='workers', type=int, default=4, help='How many symbols to download at the same time')
+    parser.add_argument('--window-workers', type=int, default=1,
+                        help='How many windows of one symbol to download at the same time, for deep intraday history')
+    parser.add_argument('--weight-limit', type=int, default=DEFAULT_WEIGHT_PER_MINUTE,
+                        help='Request weight to use per minute, shared by all workers')
+    parser.add_argument('--base-url', help='Download from another server, e.g. http://127.0.0.1:8000 for fake_kline_server.py')
     return parser
 
 
+# one client, and so one pooled HTTP session, per download thread.
+_thread_clients = threading.local()
+
+
+def get_client(limiter, base_url=None):
+    if not hasattr(_thread_clients, 'client'):
+        _thread_clients.client = RateLimitedClient(limiter, base_url)
+    return _thread_clients.client
+
+
+HEADER = ['Symbol',
+          'Open time',
+          'Open',
+          'High',
+          'Low',
+          'Close',
+          'Volume',
+          'Close time',
+          'Quote asset volume',
+          'Number of trades',
+          'Taker buy base asset volume',
+          'Taker buy quote asset volume',
+          'Ignore']
+CLOSE_TIME = HEADER.index('Close time')
+
+
+# the public Client method serving the klines of each market.
+KLINES_ENDPOINTS = {'spot': 'get_klines', 'futures': 'futures_klines'}
+
+
+def klines_endpoint_of(klines_type):
+    if klines_type not in KLINES_ENDPOINTS:
+        raise NameError(f'Invalid klines type {klines_type}')
+    return KLINES_ENDPOINTS[klines_type]
+
+
+def kline_file(klines_type, interval, year, symbol):
+    return f'./data/{klines_type}/{interval}/{year}_{symbol}.csv'
+
+
+def day_labels(open_ms):
+    """DD/MM/YYYY of each open time, formatting every distinct day once - a page of minute bars spans a day or two."""
+    days, inverse = np.unique(open_ms // DAY_MS, return_inverse=True)
+    labels = np.array([f'{day[8:10]}/{day[5:7]}/{day[:4]}' for day in np.datetime_as_string(days.astype('datetime64[D]'))],
+                      dtype=object)
+    return labels[inverse]
+
+
+def page_rows(page, symbol, now):
+    """The page's klines as rows - Symbol and the open day in front of the kline's own fields.
 
-def download_kline(symbol, klines_type, interval, start_year=2017):
+    The kline still in progress is dropped, it would be stored before its bar is complete.
+    """
+    if not page:
+        return []
+    # a page is in time order, so the closed klines come first.
+    closed = int(np.searchsorted(np.fromiter((kline[CLOSE_TIME - 1] for kline in page), np.int64, len(page)), now))
+    page = page[:closed]
+    days = day_labels(np.fromiter((kline[0] for kline in page), np.int64, len(page)))
+    return [[symbol, day, *kline[1:]] for day, kline in zip(days, page)]
+
+
+def write_pages(f, pages, symbol):
+    """Writes each page as it arrives, returning how many rows and the close time of the last (None for none)."""
+    writer = csv.writer(f)
+    now = now_ms()
+    rows = 0
+    last_close_time = None
+    for page in pages:
+        page = page_rows(page, symbol, now)
+        writer.writerows(page)
+        if page:
+            rows += len(page)
+            last_close_time = int(page[-1][CLOSE_TIME])
+    return rows, last_close_time
+
+
+def fetch_window(client, endpoint, symbol, interval, window):
+    """The klines opening inside the (start, end) window - a single request, as a window holds at most a page."""
+    start_ms, end_ms = window
+    return getattr(client, endpoint)(symbol=symbol, interval=interval, startTime=start_ms, endTime=end_ms,
+                                     limit=PAGE_LIMIT)
+
+
+def fetch_pages(clients, klines_type, symbol, interval, start_ms, end_ms, pool=None):
+    """Yields the pages of klines opening from start_ms to end_ms, in order.
+
+    The range is planned as bounded windows, so nothing outside it is downloaded.  With a pool the windows are
+    fetched side by side, each thread using its own client - clients() returns the calling thread's - but never
+    more than PAGES_AHEAD pages ahead of the one being written, so memory stays the same however long the range.
+    """
+    endpoint = klines_endpoint_of(klines_type)
+
+    def fetch(window):
+        return fetch_window(clients(), endpoint, symbol, interval, window)
+
+    windows = iter(plan_windows(start_ms, end_ms, interval))
+    if pool is None:
+        yield from map(fetch, windows)
+        return
+    pending = deque(pool.submit(fetch, window) for window in islice(windows, PAGES_AHEAD))
+    while pending:
+        page = pending.popleft().result()
+        pending.extend(pool.submit(fetch, window) for window in islice(windows, 1))
+        yield page
+
+
+def download_kline(clients, symbol, klines_type, interval, start_year=2017, start_ms=None, end_ms=None, pool=None):
     """Download spot/futures klines for selected symbol, and save the data into csv files.
 
+    The file is replaced in one step, and a checkpoint of its last kline is written for sync_kline.
+
     Args:
+        clients: returns the binance Client of the calling thread
         symbol (str): e.g., 'BTCUSDT'
         klines_type (str): 'spot' or 'futures'
         interval ([type]): e.g., '5m' for 5 minutes interval
         start_year: the year you wish to obtain data for
+        start_ms, end_ms: the part of the year to download, all of it by default
+        pool: downloads the windows of the year side by side when given
+
+    Returns:
+        the number of klines written, None if there is no data for the symbol
+    """
+    first, last = year_range(start_year)
+    start_ms = first if start_ms is None else start_ms
+    end_ms = last if end_ms is None else end_ms
+
+    # write into csv, a page at a time
+    def write(f):
+        csv.writer(f).writerow(HEADER)
+        return write_pages(f, fetch_pages(clients, klines_type, symbol, interval, start_ms, end_ms, pool), symbol)
+
+    try:
+        size, (rows, last_close_time) = replace_file(kline_file(klines_type, interval, start_year, symbol), write)
+    except Exception:
+        print(f'No {klines_type} data for {symbol}')
+        return
+    if last_close_time is None:
+        last_close_time = start_ms - 1
+    write_checkpoint(checkpoint_path(klines_type, interval, start_year, symbol), last_close_time, size)
+    return rows
+
+
+def checkpoint_from_file(filename, now=None):
+    """The checkpoint of a file written before there were checkpoints - its last complete, closed row, None
+    without one.
+
+    Such a file may end in the bar that was still open when it was written, or in a row half written by an
+    interrupted run.  The checkpoint is taken before them, so sync_kline cuts them off and downloads them again.
+    """
+    try:
+        with open(filename, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    now = now_ms() if now is None else now
+    size = data.rfind(b'\n') + 1
+    while size > 0:
+        start = data.rfind(b'\n', 0, size - 1) + 1
+        if start == 0:
+            return None  # only the header is left
+        row = next(csv.reader([data[start:size].decode()]), [])
+        if len(row) == len(HEADER) and row[CLOSE_TIME].isdigit() and int(row[CLOSE_TIME]) < now:
+            return int(row[CLOSE_TIME]), size
+        size = start
+    return None
+
+
+def sync_kline(clients, symbol, klines_type, interval, start_year, start_ms=None, end_ms=None, pool=None):
+    """Appends only the klines that closed since the last one stored - one request a day for daily bars.
+
+    The file is first cut back to the size recorded with its last kline, dropping anything half written by an
+    interrupted run, the new rows are appended and synced to disk, and only then does the checkpoint move on.
+    Without anything stored yet, the year is downloaded from start_ms on.  end_ms stops the update early.
+
+    Returns:
+        the number of klines appended, None if there is no data for the symbol
     """
-    the_start_time = get_start_time(start_year)
-    if klines_type == 'spot':
-        klines_enum = HistoricalKlinesType.SPOT
-    elif klines_type == 'futures':
-        klines_enum = HistoricalKlinesType.FUTURES
+    filename = kline_file(klines_type, interval, start_year, symbol)
+    checkpoint_file = checkpoint_path(klines_type, interval, start_year, symbol)
+    checkpoint = read_checkpoint(checkpoint_file) if os.path.exists(filename) else None
+    checkpoint = checkpoint or checkpoint_from_file(filename)
+    if checkpoint is None or os.path.getsize(filename) < checkpoint[1]:
+        return download_kline(clients, symbol, klines_type, interval, start_year, start_ms, end_ms, pool)
+
+    last_close_time, size = checkpoint
+    end_ms = year_range(start_year)[1] if end_ms is None else end_ms
+    if last_close_time + 1 > end_ms:
+        return 0  # the year is complete
+    pages = fetch_pages(clients, klines_type, symbol, interval, last_close_time + 1, end_ms, pool)
+
+    os.truncate(filename, size)
     try:
-        klines = client.get_historical_klines(
-            symbol=symbol,
-            klines_type=klines_enum,
-            interval=interval,
-            start_str=the_start_time,
-            limit=300
-        )
+        with open(filename, 'a', newline='') as f:
+            rows, appended_close_time = write_pages(f, pages, symbol)
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
     except Exception:
+        # whatever was appended is past the checkpoint, and cut off by the next update.
         print(f'No {klines_type} data for {symbol}')
         return
-    # write into csv
-    with open(f'./data/{klines_type}/{interval}/{start_year}_{symbol}.csv', 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(
-            ['Symbol',
-             'Open time',
-             'Open',
-             'High',
-             'Low',
-             'Close',
-             'Volume',
-             'Close time',
-             'Quote asset volume',
-             'Number of trades',
-             'Taker buy base asset volume',
-             'Taker buy quote asset volume',
-             'Ignore']
-        )
-
-        for kline in klines:
-            kline[0] = datetime.utcfromtimestamp(int(kline[0]) / 1000).strftime(DATE_FORMAT)
-            # get the year fom the kline[0] datetime, only export if within range (year is at the end)
-            if int(kline[0][-4:]) == start_year:
-                kline.insert(0, symbol)
-                writer.writerow(kline)
+    write_checkpoint(checkpoint_file, appended_close_time or last_close_time, size)
+    return rows
+
+
+def stored_rows(f):
+    """(close time, row) of each complete row of a yearly file, in the file's order - oldest first."""
+    for row in csv.reader(f):
+        # a row half written by an interrupted update has no close time yet.
+        if len(row) == len(HEADER) and row[CLOSE_TIME].isdigit():
+            yield int(row[CLOSE_TIME]), row
 
 
 def combine_csv_files(symbol, klines_type, interval, output_file):
-    all_data = []
-    file_pattern = f'./data/{klines_type}/{interval}/*_{symbol}.csv'
-    files = glob.glob(file_pattern)
+    """Merges the symbol's yearly files into one, oldest first, a row at a time.
 
-    header = None
-    for file in files:
-        with open(file, 'r') as f:
-            reader = csv.reader(f)
-            header = next(reader)  # Skip the header
-            for row in reader:
-                all_data.append(row)
+    Each yearly file is already in time order, so they are merged with a heap on the integer close times rather
+    than read whole and sorted.  A bar stored in two files - either side of New Year - is written once.
+
+    Returns:
+        the number of rows written, None if there are no files for the symbol
+    """
+    files = sorted(glob.glob(f'./data/{klines_type}/{interval}/*_{symbol}.csv'))
+    with ExitStack() as stack:
+        readers = [stack.enter_context(open(file, 'r', newline='')) for file in files]
+        header = None
+        for f in readers:
+            header = next(csv.reader(f), None) or header  # Skip the header
+        if header is None:
+            return
 
-    # Sort data by the 'Open time' column (assuming it's the first column)
-    all_data.sort(key=lambda x: datetime.strptime(x[1], DATE_FORMAT))
+        def write(out):
+            writer = csv.writer(out)
+            writer.writerow(header)
+            rows = 0
+            last_close_time = None
+            for close_time, row in heapq.merge(*map(stored_rows, readers), key=itemgetter(0)):
+                if close_time != last_close_time:
+                    writer.writerow(row)
+                    rows += 1
+                    last_close_time = close_time
+            return rows
 
-    if header is not None and len(all_data) > 0:
-        # Write combined and sorted data to the output file
-        with open(output_file, 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(header)  # Write the header
-            writer.writerows(all_data)
+        _, rows = replace_file(output_file, write)
+    return rows
+
+
+def combine_all(symbols, klines_type, interval, workers):
+    """Combines the files of every symbol, several symbols at a time in their own processes."""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(combine_csv_files, symbol, klines_type, interval,
+                               f'./data/{klines_type}/{interval}/combined/{symbol}.csv'): symbol for symbol in symbols}
+        with tqdm(total=len(futures), unit='symbol', desc='Combining') as progress:
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    tqdm.write(f'Combining {futures[future]} failed: {e}')
+                progress.update()
 
 
 if __name__ == '__main__':
@@ -109,14 +311,45 @@ if __name__ == '__main__':
     if args.interval not in INTERVALS:
         raise NameError('Invalid interval')
 
-    client = Client()
-    symbols = read_symbols()
+    if args.end and not args.start:
+        parser.error('--end needs a --start')
+    # (year, start, end) - each year is a file of its own.
+    try:
+        parts = split_by_year(*date_range(args.start, args.end)) if args.start else \
+            [(int(args.year), *year_range(int(args.year)))]
+    except ValueError as e:
+        parser.error(str(e))
+
+    symbols = [symbol for symbol in read_symbols() if symbol]
+    create_path('spot', args.interval)
+    # every worker draws from the same request weight budget.
+    limiter = WeightLimiter(args.weight_limit)
+    window_pool = ThreadPoolExecutor(max_workers=args.window_workers) if args.window_workers > 1 else None
 
-    for symbol in tqdm(symbols):
-        create_path('spot', args.interval)
-        download_kline(symbol, 'spot', args.interval, int(args.year))
-        if args.combine:
-            combine_csv_files(symbol, 'spot', args.interval, f'./data/spot/{args.interval}/combined/{symbol}.csv')
+    def clients():
+        return get_client(limiter, args.base_url)
+
+    def download(symbol):
+        rows = 0
+        fetch = sync_kline if args.update else download_kline
+        for year, start_ms, end_ms in parts:
+            rows += fetch(clients, symbol, 'spot', args.interval, year, start_ms, end_ms, window_pool) or 0
+        return rows
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(download, symbol): symbol for symbol in symbols}
+        with tqdm(total=len(futures), unit='symbol') as progress:
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    rows = future.result()
+                    progress.set_postfix_str(f'{symbol}: {rows or 0} klines')
+                except Exception as e:
+                    tqdm.write(f'Downloading {symbol} failed: {e}')
+                progress.update()
 
         # create_path('futures', args.interval)
         # klines = download_kline(symbol, 'futures', args.interval)
+
+    if args.combine:
+        combine_all(symbols, 'spot', args.interval, args.workers)
@@ -0,0 +1,97 @@
+import threading
+import time
+
+from binance.client import Client
+from binance.exceptions import BinanceAPIException
+
+# Binance allows 6000 request weight per minute per IP on the spot API, stay a little under it.
+DEFAULT_WEIGHT_PER_MINUTE = 5000
+# a klines request costs 2, whatever its limit.
+KLINES_WEIGHT = 2
+# 429 is a warning to back off, 418 means the IP has been banned for a while - both say how long in Retry-After.
+BACKOFF_STATUS_CODES = (418, 429)
+MAX_RETRIES = 6
+
+
+class WeightLimiter:
+    """Token bucket of request weight, shared by every download thread.
+
+    The bucket holds up to a minute's budget and refills continuously, so bursts are allowed while the
+    average stays under the limit.  The weight Binance reports as used (X-MBX-USED-WEIGHT-1M) is also taken
+    into account, as other programs may be using the same IP.  After a 429/418 everyone waits until the
+    Retry-After has passed.
+    """
+
+    def __init__(self, weight_per_minute=DEFAULT_WEIGHT_PER_MINUTE):
+        self.capacity = weight_per_minute
+        self.rate = weight_per_minute / 60.0
+        self.tokens = float(weight_per_minute)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self, weight):
+        """Blocks until the request's weight is available, then takes it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.paused_until and self.tokens >= weight:
+                    self.tokens -= weight
+                    return
+                wait = max(self.paused_until - now, (weight - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def observe_used_weight(self, used):
+        """What the exchange says has been used this minute - never assume more is left than that."""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, self.capacity - used)
+
+    def pause(self, seconds):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class RateLimitedClient(Client):
+    """A python-binance Client whose every request waits for the shared limiter, and retries on 429/418.
+
+    Each thread should have its own client - the client keeps the last response on itself - and the client's
+    requests session keeps its connections open between requests.  base_url points it at another server,
+    e.g. fake_kline_server.py.
+    """
+
+    def __init__(self, limiter, base_url=None, weight=KLINES_WEIGHT):
+        super().__init__(ping=False)
+        self.limiter = limiter
+        self.weight = weight
+        if base_url:
+            self.API_URL = base_url.rstrip('/') + '/api'
+            self.FUTURES_URL = base_url.rstrip('/') + '/fapi'
+
+    def _request(self, method, uri, signed, force_params=False, **kwargs):
+        for attempt in range(MAX_RETRIES + 1):
+            self.limiter.acquire(self.weight)
+            try:
+                result = super()._request(method, uri, signed, force_params, **kwargs)
+            except BinanceAPIException as e:
+                self._observe(e.response)
+                if e.status_code not in BACKOFF_STATUS_CODES or attempt == MAX_RETRIES:
+                    raise
+                retry_after = e.response.headers.get('Retry-After')
+                seconds = float(retry_after) if retry_after else 2 ** attempt
+                print(f'Rate limited ({e.status_code}), waiting {seconds:g}s')
+                self.limiter.pause(seconds)
+                continue
+            self._observe(self.response)
+            return result
+
+    def _observe(self, response):
+        used = response.headers.get('X-MBX-USED-WEIGHT-1M')
+        if used is not None:
+            self.limiter.observe_used_weight(int(used))
@@ -1 +1 @@
-python klines_downloader.py -y 2025 -c
+python klines_downloader.py -y (Get-Date).Year -u -c
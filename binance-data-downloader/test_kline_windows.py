@@ -0,0 +1,57 @@
+import unittest
+from datetime import datetime, timedelta
+
+from kline_windows import INTERVAL_MS, date_range, now_ms, plan_windows, split_by_year, utc_ms, year_range
+
+
+class TestYearBounds(unittest.TestCase):
+
+    def test_year_is_in_utc(self):
+        self.assertEqual(year_range(2024), (1704067200000, 1735689599999))
+
+    def test_range_across_new_year_is_split_at_midnight_utc(self):
+        start_ms, end_ms = date_range('2023-12-31', '2024-01-01')
+        self.assertEqual(split_by_year(start_ms, end_ms),
+                         [(2023, start_ms, year_range(2023)[1]), (2024, year_range(2024)[0], end_ms)])
+
+    def test_range_inside_one_year_is_one_part(self):
+        start_ms, end_ms = date_range('2023-03-01', '2023-03-31')
+        self.assertEqual(split_by_year(start_ms, end_ms), [(2023, start_ms, end_ms)])
+
+    def test_end_before_start(self):
+        with self.assertRaises(ValueError):
+            date_range('2024-01-02', '2024-01-01')
+
+
+class TestPlanWindows(unittest.TestCase):
+
+    def test_windows_cover_the_year_without_gaps_or_overlaps(self):
+        first, last = year_range(2023)
+        windows = plan_windows(first, last, '1h')
+        self.assertEqual(windows[0][0], first)
+        self.assertEqual(windows[-1][1], last)
+        for (_, end), (start, _) in zip(windows, windows[1:]):
+            self.assertEqual(end + 1, start)
+        # 8760 hours, at most a page of 1000 each.
+        self.assertEqual(len(windows), 9)
+        self.assertTrue(all(end - start < 1000 * INTERVAL_MS['1h'] for start, end in windows))
+
+    def test_last_bar_of_the_year_is_in_its_last_window(self):
+        first, last = year_range(2023)
+        last_open = utc_ms(datetime(2023, 12, 31, 23))
+        self.assertLessEqual(last_open, plan_windows(first, last, '1h')[-1][1])
+        self.assertGreater(year_range(2024)[0], plan_windows(first, last, '1h')[-1][1])
+
+    def test_nothing_is_planned_past_now(self):
+        now = now_ms()
+        windows = plan_windows(now - 10 * INTERVAL_MS['1d'], now + 10 * INTERVAL_MS['1d'], '1d', limit=3)
+        self.assertEqual(len(windows), 4)
+        self.assertLessEqual(windows[-1][1], now_ms())
+
+    def test_range_in_the_future(self):
+        start = utc_ms(datetime.utcnow() + timedelta(days=2))
+        self.assertEqual(plan_windows(start, start + INTERVAL_MS['1d'], '1d'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
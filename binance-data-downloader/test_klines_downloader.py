@@ -0,0 +1,170 @@
+import csv
+import os
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from fake_kline_server import make_server
+from kline_windows import INTERVAL_MS, date_range, now_ms, split_by_year, utc_ms, year_range
+from klines_downloader import (CLOSE_TIME, HEADER, checkpoint_from_file, combine_csv_files, day_labels,
+                               download_kline, kline_file, page_rows, sync_kline)
+from rate_limiter import RateLimitedClient, WeightLimiter
+from utils import checkpoint_path, create_path
+
+DAY_MS = INTERVAL_MS['1d']
+
+
+def kline(open_ms, interval='1d'):
+    """A kline as Binance returns it - open time, prices and volumes, close time and the rest."""
+    return [open_ms, '1.0', '2.0', '0.5', '1.5', '10', open_ms + INTERVAL_MS[interval] - 1, '15', 3, '5', '7.5', '0']
+
+
+class TestPageRows(unittest.TestCase):
+
+    def test_day_labels(self):
+        open_ms = np.array([utc_ms(datetime(2023, 12, 31, 22)), utc_ms(datetime(2023, 12, 31, 23)),
+                            utc_ms(datetime(2024, 1, 1))])
+        self.assertEqual(list(day_labels(open_ms)), ['31/12/2023', '31/12/2023', '01/01/2024'])
+
+    def test_rows_have_the_symbol_and_day_in_front(self):
+        open_ms = utc_ms(datetime(2024, 2, 29))
+        rows = page_rows([kline(open_ms)], 'BTCUSDT', now=open_ms + 2 * DAY_MS)
+        self.assertEqual(rows, [['BTCUSDT', '29/02/2024', *kline(open_ms)[1:]]])
+        self.assertEqual(len(rows[0]), len(HEADER))
+        self.assertEqual(rows[0][CLOSE_TIME], open_ms + DAY_MS - 1)
+
+    def test_open_kline_is_dropped(self):
+        open_ms = utc_ms(datetime(2024, 3, 1))
+        page = [kline(open_ms), kline(open_ms + DAY_MS), kline(open_ms + 2 * DAY_MS)]
+        rows = page_rows(page, 'BTCUSDT', now=open_ms + 2 * DAY_MS + 5)
+        self.assertEqual([row[1] for row in rows], ['01/03/2024', '02/03/2024'])
+
+    def test_empty_page(self):
+        self.assertEqual(page_rows([], 'BTCUSDT', now=now_ms()), [])
+
+
+class DownloaderCase(unittest.TestCase):
+    """Downloads from fake_kline_server.py into ./data of a temporary directory."""
+
+    def setUp(self):
+        self.server = make_server()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        client = RateLimitedClient(WeightLimiter(), f'http://127.0.0.1:{self.server.server_port}')
+        self.clients = lambda: client
+
+        self.cwd = os.getcwd()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp_dir.name)
+        create_path('spot', '1d')
+        create_path('spot', '1h')
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+        self.server.shutdown()
+        self.server.server_close()
+
+    @staticmethod
+    def read_rows(filename):
+        with open(filename, newline='') as f:
+            return list(csv.reader(f))[1:]
+
+
+class TestDownloadKline(DownloaderCase):
+
+    def test_each_year_has_only_its_own_bars(self):
+        for year, start_ms, end_ms in split_by_year(*date_range('2023-12-31', '2024-01-01')):
+            self.assertEqual(download_kline(self.clients, 'BTCUSDT', 'spot', '1h', year, start_ms, end_ms), 24)
+        self.assertEqual({row[1] for row in self.read_rows(kline_file('spot', '1h', 2023, 'BTCUSDT'))},
+                         {'31/12/2023'})
+        self.assertEqual({row[1] for row in self.read_rows(kline_file('spot', '1h', 2024, 'BTCUSDT'))},
+                         {'01/01/2024'})
+
+    def test_year_in_many_windows(self):
+        # 8760 hourly bars, in 9 windows fetched side by side.
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            self.assertEqual(download_kline(self.clients, 'BTCUSDT', 'spot', '1h', 2023, pool=pool), 8760)
+        close_times = [int(row[CLOSE_TIME]) for row in self.read_rows(kline_file('spot', '1h', 2023, 'BTCUSDT'))]
+        self.assertEqual(close_times, list(range(year_range(2023)[0] + INTERVAL_MS['1h'] - 1, year_range(2023)[1] + 1,
+                                                 INTERVAL_MS['1h'])))
+
+
+class TestSyncKline(DownloaderCase):
+
+    def test_resumes_after_a_partial_append(self):
+        filename = kline_file('spot', '1d', 2023, 'BTCUSDT')
+        download_kline(self.clients, 'BTCUSDT', 'spot', '1d', 2023)
+        with open(filename, newline='') as f:
+            expected = f.read()
+
+        download_kline(self.clients, 'BTCUSDT', 'spot', '1d', 2023, end_ms=utc_ms(datetime(2023, 6, 30)))
+        # an update interrupted half way through a row - the checkpoint is still before it.
+        with open(filename, 'a', newline='') as f:
+            f.write('BTCUSDT,01/07/2023,1.0,2.0')
+
+        self.assertEqual(sync_kline(self.clients, 'BTCUSDT', 'spot', '1d', 2023), 365 - 181)
+        with open(filename, newline='') as f:
+            self.assertEqual(f.read(), expected)
+        self.assertEqual(sync_kline(self.clients, 'BTCUSDT', 'spot', '1d', 2023), 0)
+
+    def test_file_without_checkpoint_resumes_after_its_last_closed_bar(self):
+        year = datetime.utcnow().year
+        filename = kline_file('spot', '1d', year, 'BTCUSDT')
+        download_kline(self.clients, 'BTCUSDT', 'spot', '1d', year, start_ms=now_ms() - 5 * DAY_MS)
+        with open(filename, newline='') as f:
+            downloaded = f.read()
+        # as written before open bars were dropped and there were checkpoints - today's bar is still open.
+        last_close_time = int(self.read_rows(filename)[-1][CLOSE_TIME])
+        with open(filename, 'a', newline='') as f:
+            csv.writer(f).writerow(['BTCUSDT', 'today', *kline(last_close_time + 1)[1:]])
+        os.remove(checkpoint_path('spot', '1d', year, 'BTCUSDT'))
+
+        self.assertEqual(checkpoint_from_file(filename), (last_close_time, len(downloaded)))
+        sync_kline(self.clients, 'BTCUSDT', 'spot', '1d', year)
+        with open(filename, newline='') as f:
+            self.assertTrue(f.read().startswith(downloaded))
+        self.assertNotIn('today', {row[1] for row in self.read_rows(filename)})
+
+    def test_file_of_only_open_bars_is_downloaded_again(self):
+        filename = kline_file('spot', '1d', 2023, 'BTCUSDT')
+        with open(filename, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(HEADER)
+            writer.writerow(['BTCUSDT', '01/01/2023', *kline(now_ms())[1:]])
+        self.assertIsNone(checkpoint_from_file(filename))
+        self.assertEqual(sync_kline(self.clients, 'BTCUSDT', 'spot', '1d', 2023), 365)
+
+
+class TestCombine(DownloaderCase):
+
+    def write_year(self, year, open_ms, tail=''):
+        with open(kline_file('spot', '1d', year, 'BTCUSDT'), 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(HEADER)
+            days = day_labels(np.array(open_ms))
+            writer.writerows(['BTCUSDT', day, *kline(ms)[1:]] for day, ms in zip(days, open_ms))
+            f.write(tail)
+
+    def test_bars_stored_twice_are_written_once(self):
+        new_year = year_range(2024)[0]
+        # the bar either side of New Year is in both files, and an update left half a row at the end of one.
+        self.write_year(2023, [new_year - 2 * DAY_MS, new_year - DAY_MS, new_year], tail='BTCUSDT,02/01/2024,1.0')
+        self.write_year(2024, [new_year, new_year + DAY_MS])
+
+        output = './data/spot/1d/combined/BTCUSDT.csv'
+        self.assertEqual(combine_csv_files('BTCUSDT', 'spot', '1d', output), 4)
+        rows = self.read_rows(output)
+        self.assertEqual([row[1] for row in rows], ['30/12/2023', '31/12/2023', '01/01/2024', '02/01/2024'])
+        with open(output, newline='') as f:
+            self.assertEqual(next(csv.reader(f)), HEADER)
+
+    def test_no_files(self):
+        self.assertIsNone(combine_csv_files('ETHUSDT', 'spot', '1d', './data/spot/1d/combined/ETHUSDT.csv'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import threading
+import time
+import unittest
+
+from fake_kline_server import LISTED_MS, WeightCounter, make_server
+from kline_windows import INTERVAL_MS
+from rate_limiter import KLINES_WEIGHT, RateLimitedClient, WeightLimiter
+
+
+class RejectFirst(WeightCounter):
+    """Answers the first klines request with 429 and a Retry-After of a second, as Binance does when over budget."""
+
+    def __init__(self):
+        super().__init__(6000)
+        self.rejected = 0
+
+    def add(self, weight):
+        used, retry_after = super().add(weight)
+        if weight == KLINES_WEIGHT and not self.rejected:
+            self.rejected += 1
+            return used, 1
+        return used, retry_after
+
+
+class TestRateLimitedClient(unittest.TestCase):
+
+    def setUp(self):
+        self.weights = RejectFirst()
+        self.server = make_server(weights=self.weights)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.limiter = WeightLimiter()
+        self.client = RateLimitedClient(self.limiter, f'http://127.0.0.1:{self.server.server_port}')
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_waits_out_retry_after_and_retries(self):
+        start = time.monotonic()
+        klines = self.client.get_klines(symbol='BTCUSDT', interval='1d', startTime=LISTED_MS,
+                                        endTime=LISTED_MS + 3 * INTERVAL_MS['1d'] - 1, limit=1000)
+        self.assertEqual(self.weights.rejected, 1)
+        self.assertGreaterEqual(time.monotonic() - start, 1)
+        self.assertEqual([kline[0] for kline in klines], [LISTED_MS + day * INTERVAL_MS['1d'] for day in range(3)])
+
+
+class TestWeightLimiter(unittest.TestCase):
+
+    def test_used_weight_reported_is_not_spent_again(self):
+        limiter = WeightLimiter(120)
+        limiter.observe_used_weight(118)
+        limiter.acquire(2)
+        # 120 a minute refills 2 a second, so the next request waits about a second.
+        start = time.monotonic()
+        limiter.acquire(2)
+        self.assertGreaterEqual(time.monotonic() - start, 0.8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,5 @@
+import json
+import os
 from pathlib import Path
 
 
@@ -14,3 +16,46 @@ def read_symbols():
 
 def create_path(kline_type, interval):
     Path(f'./data/{kline_type}/{interval}/combined').mkdir(parents=True, exist_ok=True)
+    Path(f'./data/{kline_type}/{interval}/checkpoints').mkdir(parents=True, exist_ok=True)
+
+
+def checkpoint_path(kline_type, interval, year, symbol):
+    return f'./data/{kline_type}/{interval}/checkpoints/{year}_{symbol}.json'
+
+
+def read_checkpoint(path):
+    """The close time of the last kline stored and the size of the file up to its end, None without a checkpoint."""
+    try:
+        with open(path, 'r') as f:
+            checkpoint = json.load(f)
+        return int(checkpoint['last_close_time']), int(checkpoint['size'])
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+
+
+def write_checkpoint(path, last_close_time, size):
+    """Replaces the checkpoint in one step, so an interruption leaves either the old one or the new one."""
+    with open(path + '.tmp', 'w') as f:
+        json.dump({'last_close_time': last_close_time, 'size': size}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + '.tmp', path)
+
+
+def replace_file(path, write):
+    """Writes a whole file through write(f) next to it, then moves it into place - if write fails, the file is
+    left as it was.
+
+    Returns the size of the file and whatever write returned.
+    """
+    try:
+        with open(path + '.tmp', 'w', newline='') as f:
+            result = write(f)
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+    except BaseException:
+        os.remove(path + '.tmp')
+        raise
+    os.replace(path + '.tmp', path)
+    return size, result
@@ -0,0 +1,184 @@
+import csv
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from datetime import datetime
+from typing import Callable, Dict
+
+from data.periods import PeriodType
+from data.performance_cube import PerformanceCube
+from data.trade_details import ProfitLossData
+from outputs.combined_performance_csv import CombinedPerformanceCSVGenerator
+from outputs.period_performance_csv import PerformanceCSVGenerator
+from price_extraction import StaticPriceProvider
+from synthetic_trades import AUS_SYMBOLS, SIZES, US_SYMBOLS, write_synthetic_trades
+from trade_extraction import mark_to_market, parse_trade_rows
+
+HTTP_ENDPOINTS = [
+    '/OrderClerkTrades.csv',
+    '/PeriodPerformance.csv?period=Week',
+    '/CombinedPerformance.csv?period=Month',
+]
+
+
+def get_parser():
+    parser = ArgumentParser(description="Times parsing, pricing, aggregation and HTTP responses on synthetic "
+                                        "trade files, and compares them with the previous run")
+    parser.add_argument('--sizes', nargs='+', default=['10k', '100k'], choices=list(SIZES),
+                        help='Trade file sizes to run at')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs of each case - the median is kept')
+    parser.add_argument('--output', default='benchmark-results.json',
+                        help='Results file, compared against and then replaced')
+    parser.add_argument('--data-dir', help='Keep the generated trade files here between runs')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Slow down, as a fraction of the previous median, reported as a regression')
+    parser.add_argument('--min-delta-ms', type=float, default=1.0,
+                        help='Slow downs smaller than this are timer noise, never a regression')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit with 1 if anything regressed')
+    return parser
+
+
+def time_case(case: Callable[[], object], repeat: int) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        case()
+        timings.append(time.perf_counter() - started)
+    return {'median': statistics.median(timings), 'min': min(timings)}
+
+
+def fake_price_provider() -> StaticPriceProvider:
+    """Every synthetic symbol priced at its typical price, so marking to market never touches Norgate."""
+    return StaticPriceProvider({**US_SYMBOLS, **AUS_SYMBOLS})
+
+
+def read_book(filename: str):
+    with open(filename, 'r', newline='') as f:
+        return parse_trade_rows(csv.DictReader(f))
+
+
+def benchmark_size(filename: str, repeat: int) -> Dict[str, Dict[str, float]]:
+    results = {'parse': time_case(lambda: read_book(filename), repeat)}
+    book = read_book(filename)
+
+    # a fresh provider each time, so every run prices all open positions rather than hitting the memo.
+    results['mark_to_market'] = time_case(lambda: mark_to_market(book, fake_price_provider()), repeat)
+    book = mark_to_market(book, fake_price_provider())
+
+    results['cube'] = time_case(lambda: PerformanceCube.build(book), repeat)
+    data = ProfitLossData(book=book)
+    _ = data.cube  # built once, as it is for a cached trade book.
+    for period_type in PeriodType:
+        results[f'period_{period_type.value.lower()}'] = time_case(
+            lambda: PerformanceCSVGenerator(data, period_type).get_data_rows(), repeat)
+    results['combined_month'] = time_case(
+        lambda: CombinedPerformanceCSVGenerator(ProfitLossData(book=book), PeriodType.MONTH).get_data_rows(),
+        repeat)
+
+    results.update(benchmark_http(filename, repeat))
+    return results
+
+
+def benchmark_http(filename: str, repeat: int) -> Dict[str, Dict[str, float]]:
+    """End to end through Flask's test client - a cold request parses and aggregates, a warm one is cached."""
+    work_dir = os.path.dirname(os.path.abspath(filename))
+    previous_dir = os.getcwd()
+    with open(os.path.join(work_dir, 'config.ini'), 'w') as f:
+        # without the refresher, so a cold request really parses the file.
+        f.write(f"[paths]\ninput_dir={work_dir}\n\n[pricing]\nprovider=none\n\n[refresh]\nenabled=false\n")
+    os.chdir(work_dir)
+    try:
+        import serve_orderclerk_trades as serve
+        from config import get_config
+        from http_caching import rendered_bodies
+        from metrics import metrics
+        from trade_cache import TradeBookCache
+        from trade_extraction import IncrementalTradeLoader
+        from trade_sources import TradeSources, sources_from_config
+
+        client = serve.app.test_client()
+        results = {}
+
+        def cold():
+            # a fresh trade book, with no subsets or conversions of its own yet - and no bodies rendered from an
+            # earlier run, as the same unchanged file gets the same ETag.
+            serve.get_service().trade_sources = TradeSources(
+                TradeBookCache(IncrementalTradeLoader(fake_price_provider())), sources_from_config(get_config()))
+            rendered_bodies.clear()
+            hits, aggregations = metrics.counter('response_cache_hits'), metrics.stage('aggregate')[0]
+            response = client.get(HTTP_ENDPOINTS[1])
+            assert response.status_code == 200, response.status_code
+            assert metrics.counter('response_cache_hits') == hits, "a cold request was served from the cache"
+            assert metrics.stage('aggregate')[0] == aggregations + 1, "a cold request did not aggregate"
+
+        results['http_cold'] = time_case(cold, repeat)
+        for endpoint in HTTP_ENDPOINTS:
+            client.get(endpoint)
+            results[f'http_warm {endpoint}'] = time_case(lambda: client.get(endpoint).get_data(), repeat)
+        return results
+    finally:
+        os.chdir(previous_dir)
+
+
+def compare(results: Dict[str, Dict[str, float]], previous: Dict[str, Dict[str, float]], threshold: float,
+            min_delta: float) -> int:
+    """Prints every case next to its previous median, and returns how many slowed down beyond the threshold."""
+    regressions = 0
+    print(f"{'Case':55} {'median ms':>10} {'previous':>10} {'change':>8}")
+    for name, timing in results.items():
+        median = timing['median'] * 1000
+        before = previous.get(name, {}).get('median')
+        if before is None:
+            print(f"{name:55} {median:10.2f} {'-':>10} {'-':>8}")
+            continue
+        change = timing['median'] / before - 1 if before else 0.0
+        flag = ''
+        if change > threshold and timing['median'] - before > min_delta:
+            regressions += 1
+            flag = '  REGRESSION'
+        print(f"{name:55} {median:10.2f} {before * 1000:10.2f} {change:+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    args = get_parser().parse_args(sys.argv[1:])
+
+    previous = {}
+    if os.path.exists(args.output):
+        with open(args.output) as f:
+            previous = json.load(f)['results']
+
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_dir = args.data_dir or temp_dir
+        os.makedirs(data_dir, exist_ok=True)
+        for size in args.sizes:
+            # one directory per size, as the server always reads OrderClerkTrades.csv.
+            size_dir = os.path.join(data_dir, size)
+            os.makedirs(size_dir, exist_ok=True)
+            filename = os.path.join(size_dir, 'OrderClerkTrades.csv')
+            if not os.path.exists(filename):
+                print(f"Writing {SIZES[size]} synthetic trades to {filename}")
+                write_synthetic_trades(filename, SIZES[size])
+            for name, timing in benchmark_size(filename, args.repeat).items():
+                results[f'{size} {name}'] = timing
+
+    regressions = compare(results, previous, args.threshold, args.min_delta_ms / 1000)
+    # cases that were not run this time, e.g. another size, keep their previous timings.
+    with open(args.output, 'w') as f:
+        json.dump({'created': datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+                   'machine': platform.machine(), 'repeat': args.repeat, 'results': {**previous, **results}},
+                  f, indent=2)
+    print(f"Results saved to {args.output}")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
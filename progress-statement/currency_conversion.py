@@ -0,0 +1,40 @@
+import os
+import threading
+from datetime import datetime, timezone
+
+from data.fx_rates import FxRates
+from metrics import metrics
+
+
+class FxRateFile:
+    """A daily exchange rate CSV (Date, Currency, Rate), read once and then again only when the file changes.
+
+    Rates are quoted against the pivot currency - Rate is what one unit of Currency is worth in the pivot.
+    """
+
+    def __init__(self, path: str, pivot: str = "USD"):
+        self.path = os.path.abspath(path)
+        self.pivot = pivot.upper()
+        self._lock = threading.Lock()
+        self._rates: FxRates | None = None
+
+    def get(self) -> FxRates:
+        """The current rates - raises OSError when the file cannot be read, ValueError when it is malformed."""
+        stat = os.stat(self.path)
+        version = f"{self.path}|{stat.st_size}|{stat.st_mtime_ns}"
+        with self._lock:
+            if self._rates is None or self._rates.version != version:
+                print(f"Reading exchange rates from: {self.path}")
+                with metrics.timer('fx_rates'):
+                    try:
+                        modified = datetime.fromtimestamp(stat.st_mtime_ns / 1e9, timezone.utc)
+                        self._rates = FxRates.read_csv(self.path, self.pivot, version, modified.replace(microsecond=0))
+                    except KeyError as e:
+                        raise ValueError(f"{self.path} needs Date, Currency and Rate columns, {e} is missing")
+            return self._rates
+
+
+def fx_rates_from_config(config) -> FxRateFile | None:
+    """[fx] rates_file - the exchange rate CSV, and pivot - the currency it is quoted in (default USD)."""
+    path = config.get('fx', 'rates_file', fallback=None)
+    return FxRateFile(path, config.get('fx', 'pivot', fallback='USD')) if path else None
@@ -0,0 +1,111 @@
+from datetime import date
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data.periods import PeriodType, period_keys
+from data.trade_book import TradeBook
+
+
+class CapitalTimeline:
+    """Capital deployed and positions open, per strategy, for every day from the first entry to the as-of day.
+
+    A trade holds its capital (QtyIn x PriceIn) from its entry day to its exit day, both inclusive - a position
+    that is still open holds it up to the as-of day.  Rather than visiting every trade for every day, each
+    trade adds an event on its entry day and removes it the day after its exit; a running sum over the days
+    then gives the level on each day, in O(n + days x strategies).
+    """
+
+    def __init__(self, days: np.ndarray, strategies: List[str], capital: np.ndarray, positions: np.ndarray,
+                 first_days: np.ndarray, last_days: np.ndarray):
+        self.days = days
+        self.strategies = strategies
+        # (days x strategies) matrices, in the order of `days` and `strategies`.
+        self.capital = capital
+        self.positions = positions
+        self.first_days = first_days
+        self.last_days = last_days
+
+    @staticmethod
+    def build(book: TradeBook, as_of: date) -> 'CapitalTimeline':
+        deployed = book["QtyIn"] > 0
+        entries = book["DateIn"][deployed].astype("datetime64[D]")
+        exits = book["DateOut"][deployed].astype("datetime64[D]")
+        exits = np.where(np.isnat(exits), np.datetime64(as_of, "D"), exits)
+        exits = np.maximum(exits, entries)
+        if len(entries) == 0:
+            empty = np.zeros((0, 0))
+            return CapitalTimeline(np.array([], dtype="datetime64[D]"), [], empty, empty,
+                                   np.array([], dtype="datetime64[D]"), np.array([], dtype="datetime64[D]"))
+
+        strategies, codes = np.unique(book["Strategy"][deployed].astype(str), return_inverse=True)
+        first = entries.min()
+        # run the days on to as_of, so the periods after the last exit average over their days with nothing in.
+        days = np.arange(first, max(exits.max(), np.datetime64(as_of, "D")) + 1)
+        starts = (entries - first).astype(np.int64)
+        ends = (exits - first).astype(np.int64) + 1
+
+        capital = np.zeros((len(days) + 1, len(strategies)))
+        positions = np.zeros((len(days) + 1, len(strategies)), dtype=np.int64)
+        used_capital = book.used_capital[deployed]
+        np.add.at(capital, (starts, codes), used_capital)
+        np.add.at(capital, (ends, codes), -used_capital)
+        np.add.at(positions, (starts, codes), 1)
+        np.add.at(positions, (ends, codes), -1)
+
+        first_ids = np.full(len(strategies), len(days))
+        last_ids = np.zeros(len(strategies), dtype=np.int64)
+        np.minimum.at(first_ids, codes, starts)
+        np.maximum.at(last_ids, codes, ends - 1)
+
+        capital = np.cumsum(capital, axis=0)[:-1]
+        # the sum of a strategy's entries and exits can leave float dust where nothing is deployed.
+        capital[np.abs(capital) < 1e-6] = 0.0
+        return CapitalTimeline(days, strategies.tolist(), capital, np.cumsum(positions, axis=0)[:-1],
+                               days[first_ids], days[last_ids])
+
+    def active(self) -> np.ndarray:
+        """(days x strategies) mask of the days between each strategy's first entry and its last exit."""
+        return (self.days[:, None] >= self.first_days[None, :]) & (self.days[:, None] <= self.last_days[None, :])
+
+    def to_frame(self) -> pd.DataFrame:
+        """One row per strategy and day it was trading, sorted by day then strategy."""
+        active = self.active()
+        day_ids, strategy_ids = np.nonzero(active)
+        return pd.DataFrame({
+            "Date": self.days[day_ids],
+            "Strategy": np.asarray(self.strategies, dtype=object)[strategy_ids] if self.strategies else [],
+            "CapitalDeployed": self.capital[active],
+            "OpenPositions": self.positions[active],
+        })
+
+    def average_capital(self, period_type: PeriodType, total_label: str | None = None) \
+            -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """The average capital deployed per period, and the average from a strategy's first entry to the
+        end of each period - the time-weighted denominators of a period's return and its cumulative return.
+
+        Both are (periods x strategies) frames, with periods in date order.  A strategy's days only count
+        from its first entry, so a strategy that started late is not diluted by the days before it traded.
+        With a total_label, a first column holds the capital of all strategies together.
+        """
+        capital = pd.DataFrame(self.capital, columns=self.strategies)
+        counted = pd.DataFrame(self.days[:, None] >= self.first_days[None, :], columns=self.strategies)
+        if total_label is not None:
+            # a strategy may have the same name as the total.
+            capital.insert(0, total_label, capital.sum(axis=1), allow_duplicates=True)
+            counted.insert(0, total_label, True, allow_duplicates=True)
+
+        # days are in order, so grouping in order of appearance keeps the periods chronological.
+        keys = period_keys(self.days, period_type)
+        capital_days = capital.groupby(keys, sort=False).sum()
+        counted_days = counted.astype(np.int64).groupby(keys, sort=False).sum()
+        average = _ratio(capital_days, counted_days)
+        cumulative = _ratio(capital_days.cumsum(), counted_days.cumsum())
+        return average, cumulative
+
+
+def _ratio(numerator: pd.DataFrame, denominator: pd.DataFrame) -> pd.DataFrame:
+    values = np.divide(numerator.to_numpy(), denominator.to_numpy(), out=np.zeros(numerator.shape),
+                       where=denominator.to_numpy() != 0)
+    return pd.DataFrame(values, index=numerator.index, columns=numerator.columns)
@@ -0,0 +1,132 @@
+from datetime import date
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data.trade_book import TradeBook
+
+
+class EquityCurve:
+    """Daily realized, unrealized and total PnL per strategy, with every position marked to each day's close.
+
+    A position is held at the close of every day from its entry day up to the day before its exit day (up to
+    the as-of day while it is still open), and its net PnL is realized on the exit day.  Rather than pricing
+    each trade on each day, the trades are summed into a signed quantity and cost per (strategy, symbol) and
+    day, so the unrealized PnL is one (days x positions) quantity x price - cost matrix.  Each symbol's
+    closes are fetched once, for the whole window it was held, and carried over days without a close.
+    """
+
+    def __init__(self, days: np.ndarray, strategies: List[str], realized: np.ndarray, unrealized: np.ndarray,
+                 first_days: np.ndarray, last_days: np.ndarray):
+        self.days = days
+        self.strategies = strategies
+        # (days x strategies) matrices - realized is the running total of PnL realized up to and on each day.
+        self.realized = realized
+        self.unrealized = unrealized
+        self.first_days = first_days
+        self.last_days = last_days
+
+    @staticmethod
+    def build(book: TradeBook, provider, as_of: date) -> 'EquityCurve':
+        """provider is a PriceProvider - its get_price_history is asked once for all symbols held."""
+        deployed = book["QtyIn"] > 0
+        book = book.take(deployed)
+        if len(book) == 0:
+            no_days = np.array([], dtype="datetime64[D]")
+            return EquityCurve(no_days, [], np.zeros((0, 0)), np.zeros((0, 0)), no_days, no_days)
+
+        realized = book.realized_mask
+        entries = book["DateIn"].astype("datetime64[D]")
+        exits = book["DateOut"].astype("datetime64[D]")
+        last_day = np.datetime64(as_of, "D")
+        # an open position is held at today's close, a closed one up to the close before its exit.
+        held_until = np.where(realized, exits, last_day + 1)
+        held_until = np.maximum(held_until, entries)
+
+        first = entries.min()
+        days = np.arange(first, max(exits[realized].max() if realized.any() else first, last_day) + 1)
+        starts = (entries - first).astype(np.int64)
+        ends = (held_until - first).astype(np.int64)
+
+        positions = pd.DataFrame({"Strategy": book["Strategy"], "Symbol": book["Symbol"],
+                                  "Currency": book["Currency"]}).groupby(["Strategy", "Symbol", "Currency"], sort=True)
+        position_ids = positions.ngroup().to_numpy()
+        position_keys = positions.size().index
+        strategies, strategy_of_position = np.unique(position_keys.get_level_values("Strategy").astype(str),
+                                                     return_inverse=True)
+
+        quantity = np.zeros((len(days) + 1, len(position_keys)))
+        cost = np.zeros((len(days) + 1, len(position_keys)))
+        signed_quantity = book["Side"] * book["QtyIn"]
+        np.add.at(quantity, (starts, position_ids), signed_quantity)
+        np.add.at(quantity, (ends, position_ids), -signed_quantity)
+        np.add.at(cost, (starts, position_ids), signed_quantity * book["PriceIn"])
+        np.add.at(cost, (ends, position_ids), -signed_quantity * book["PriceIn"])
+        quantity = np.cumsum(quantity, axis=0)[:-1]
+        cost = np.cumsum(cost, axis=0)[:-1]
+
+        prices = EquityCurve._price_matrix(book, provider, days, starts, ends, position_keys)
+        held = np.abs(quantity) > 1e-9
+        unrealized_by_position = np.where(held & ~np.isnan(prices), quantity * np.nan_to_num(prices) - cost, 0.0)
+
+        # (positions x strategies) indicator, so a matrix product sums each strategy's positions.
+        to_strategy = np.zeros((len(position_keys), len(strategies)))
+        to_strategy[np.arange(len(position_keys)), strategy_of_position] = 1.0
+        unrealized = unrealized_by_position @ to_strategy
+
+        strategy_ids = np.searchsorted(strategies, book["Strategy"].astype(str))
+        realized_pnl = np.zeros((len(days), len(strategies)))
+        np.add.at(realized_pnl, ((exits[realized] - first).astype(np.int64), strategy_ids[realized]),
+                  book.net_profit_loss[realized])
+
+        first_ids = np.full(len(strategies), len(days))
+        last_ids = np.zeros(len(strategies), dtype=np.int64)
+        np.minimum.at(first_ids, strategy_ids, starts)
+        np.maximum.at(last_ids, strategy_ids, np.where(realized, exits - first, last_day - first).astype(np.int64))
+        return EquityCurve(days, strategies.tolist(), np.cumsum(realized_pnl, axis=0), unrealized,
+                           days[first_ids], days[last_ids])
+
+    @staticmethod
+    def _price_matrix(book: TradeBook, provider, days: np.ndarray, starts: np.ndarray, ends: np.ndarray,
+                      position_keys: pd.MultiIndex) -> np.ndarray:
+        """(days x positions) closes, NaN before a symbol's first close within its window."""
+        held = ends > starts
+        windows: Dict[Tuple[str, str], Tuple[date, date]] = {}
+        if held.any():
+            frame = pd.DataFrame({"Symbol": book["Symbol"][held], "Currency": book["Currency"][held],
+                                  "Start": days[starts[held]], "End": days[ends[held] - 1]})
+            spans = frame.groupby(["Symbol", "Currency"]).agg(Start=("Start", "min"), End=("End", "max"))
+            windows = {key: (start.date(), end.date())
+                       for key, start, end in zip(spans.index, spans["Start"], spans["End"])}
+        histories = provider.get_price_history(windows) if windows else {}
+
+        day_index = pd.DatetimeIndex(days)
+        closes = {}
+        for key, history in histories.items():
+            history = history[~history.index.duplicated(keep="last")].sort_index()
+            closes[key] = history.reindex(history.index.union(day_index)).ffill().reindex(day_index).to_numpy()
+
+        prices = np.full((len(days), len(position_keys)), np.nan)
+        for column, (_, symbol, currency) in enumerate(position_keys):
+            if (symbol, currency) in closes:
+                prices[:, column] = closes[(symbol, currency)]
+        return prices
+
+    def active(self) -> np.ndarray:
+        """(days x strategies) mask of the days between each strategy's first entry and its last activity."""
+        return (self.days[:, None] >= self.first_days[None, :]) & (self.days[:, None] <= self.last_days[None, :])
+
+    def to_frame(self) -> pd.DataFrame:
+        """One row per strategy and day it was trading, sorted by day then strategy."""
+        active = self.active()
+        day_ids, strategy_ids = np.nonzero(active)
+        realized = self.realized[active]
+        unrealized = self.unrealized[active]
+        return pd.DataFrame({
+            "Date": self.days[day_ids],
+            "Strategy": np.asarray(self.strategies, dtype=object)[strategy_ids] if self.strategies else [],
+            "RealizedPnL": realized,
+            "UnrealizedPnL": unrealized,
+            "EquityPnL": realized + unrealized,
+        })
@@ -0,0 +1,91 @@
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data.trade_book import TradeBook
+
+# the money columns of a trade, and the day whose rate converts them - NaT, an open position's exit, takes
+# the latest rate, as does the mark to market price.
+PRICED_AT_ENTRY = ("PriceIn", "FeesIn")
+PRICED_AT_EXIT = ("PriceOut", "FeesOut")
+PRICED_NOW = ("M2MPrice",)
+
+
+class FxRates:
+    """Daily exchange rates of several currencies against one pivot currency.
+
+    A rate is what one unit of the currency is worth in the pivot currency, so converting from A to B on a day
+    multiplies by rate(A) / rate(B); the pivot's own rate is always 1.  Each currency keeps its days and rates as
+    sorted arrays, and the rate of any day is the last one published on or before it - an as-of join done with
+    one binary search per trade rather than a lookup per trade.  Days before a currency's first rate use that
+    first rate.
+    """
+
+    def __init__(self, pivot: str, rates: Dict[str, Tuple[np.ndarray, np.ndarray]], version: str = "",
+                 last_modified: datetime | None = None):
+        self.pivot = pivot
+        # currency -> (sorted datetime64[ns] days, rates on those days)
+        self.rates = rates
+        # changes whenever the rates do, so responses cut from them can tell.
+        self.version = version
+        # when the rates last changed, if known - a converted response is as new as the newer of the trades and this.
+        self.last_modified = last_modified
+
+    @staticmethod
+    def from_frame(frame: pd.DataFrame, pivot: str, version: str = "",
+                   last_modified: datetime | None = None) -> 'FxRates':
+        """From Date, Currency and Rate columns, in any order - a day given twice keeps its last rate."""
+        frame = frame.assign(Date=pd.to_datetime(frame["Date"]).astype("datetime64[ns]"),
+                             Currency=frame["Currency"].astype(str).str.strip().str.upper(),
+                             Rate=frame["Rate"].astype(float))
+        frame = frame[frame["Rate"] > 0].drop_duplicates(["Currency", "Date"], keep="last")
+        rates = {}
+        for currency, rows in frame.sort_values(["Currency", "Date"]).groupby("Currency", sort=False):
+            if currency != pivot:
+                rates[currency] = (rows["Date"].to_numpy(), rows["Rate"].to_numpy())
+        return FxRates(pivot, rates, version, last_modified)
+
+    @staticmethod
+    def read_csv(filename: str, pivot: str, version: str = "", last_modified: datetime | None = None) -> 'FxRates':
+        return FxRates.from_frame(pd.read_csv(filename), pivot, version, last_modified)
+
+    @property
+    def currencies(self) -> List[str]:
+        return sorted([self.pivot, *self.rates])
+
+    def rates_on(self, currency: str, days: np.ndarray) -> np.ndarray:
+        """The rate of the currency on each day, NaT being after every day."""
+        if currency == self.pivot:
+            return np.ones(len(days))
+        if currency not in self.rates:
+            raise ValueError(f"No exchange rates for {currency}, the rates cover {', '.join(self.currencies)}")
+        rate_days, rates = self.rates[currency]
+        # NaT sorts last in NumPy, so an open position's exit lands on the latest rate.
+        positions = np.searchsorted(rate_days, days.astype("datetime64[ns]"), side="right") - 1
+        return rates[np.maximum(positions, 0)]
+
+    def factors(self, currencies: np.ndarray, days: np.ndarray, to_currency: str) -> np.ndarray:
+        """What to multiply each amount by to turn it from its currency into to_currency, on its day."""
+        target = self.rates_on(to_currency, days)
+        factors = np.empty(len(days))
+        for currency in np.unique(currencies.astype(str)):
+            mine = currencies == currency
+            factors[mine] = self.rates_on(currency, days[mine]) / target[mine]
+        return factors
+
+    def convert(self, book: TradeBook, to_currency: str) -> TradeBook:
+        """The book with every price and fee in to_currency - entries at the entry day's rate, exits at the exit
+        day's and mark to market prices at the latest.  Quantities, and so the PnL arithmetic, are unchanged."""
+        currencies = book["Currency"]
+        at_entry = self.factors(currencies, book["DateIn"], to_currency)
+        at_exit = self.factors(currencies, book["DateOut"], to_currency)
+        now = self.factors(currencies, np.full(len(book), np.datetime64("NaT", "ns")), to_currency)
+
+        columns = dict(book.columns)
+        for names, factors in ((PRICED_AT_ENTRY, at_entry), (PRICED_AT_EXIT, at_exit), (PRICED_NOW, now)):
+            for name in names:
+                columns[name] = book[name] * factors
+        columns["Currency"] = np.full(len(book), to_currency, dtype=object)
+        return TradeBook(columns)
@@ -0,0 +1,61 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, TypeVar
+
+T = TypeVar('T')
+
+
+class LruCache(Generic[T]):
+    """Keeps at most max_size worth of values, dropping the least recently used first.
+
+    Each value counts as 1 unless size_of weighs it (e.g. a body by its bytes); a value heavier than the whole
+    cache is handed back without being kept.  As with ProfitLossData.memoize, the factory runs outside the lock,
+    so two threads missing the same key at once may both build it - the first one stored wins.
+    """
+
+    def __init__(self, max_size: int, size_of: Callable[[Any], int] | None = None):
+        self.max_size = max_size
+        self.size_of = size_of or (lambda value: 1)
+        self._lock = threading.Lock()
+        self._values: OrderedDict[Hashable, T] = OrderedDict()
+        self._size = 0
+        self.evictions = 0
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], T]) -> T:
+        with self._lock:
+            if key in self._values:
+                self._values.move_to_end(key)
+                return self._values[key]
+        value = factory()
+        size = self.size_of(value)
+        with self._lock:
+            if key in self._values:
+                self._values.move_to_end(key)
+                return self._values[key]
+            if size > self.max_size:
+                return value
+            self._values[key] = value
+            self._size += size
+            while self._size > self.max_size:
+                _, evicted = self._values.popitem(last=False)
+                self._size -= self.size_of(evicted)
+                self.evictions += 1
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+            self._size = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._values
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._values)
+
+    @property
+    def size(self) -> int:
+        with self._lock:
+            return self._size
@@ -0,0 +1,74 @@
+from typing import Dict, List
+
+import pandas as pd
+
+from data.periods import PeriodType, period_keys
+from data.trade_book import TradeBook
+
+CELL_COLUMNS = ["NetPnL", "UsedCapital", "Trades", "Fees"]
+
+
+class PerformanceCube:
+    """Realized performance per (period, strategy) for every PeriodType at once.
+
+    Each cell holds the NetPnL, UsedCapital, number of trades and fees of the trades that exited in that
+    period.  Trades are only visited once, to build the daily cells - weeks, months, quarters and years
+    are then rolled up from those, so switching period is a lookup rather than another pass over the book.
+    """
+
+    def __init__(self, cells: Dict[PeriodType, pd.DataFrame], starts: Dict[PeriodType, pd.Series]):
+        self._cells = cells
+        self._starts = starts
+
+    @staticmethod
+    def build(book: TradeBook) -> 'PerformanceCube':
+        realized = book.realized_mask
+        trades = pd.DataFrame({
+            "Day": book["DateOut"][realized].astype("datetime64[D]"),
+            "Strategy": book["Strategy"][realized],
+            "NetPnL": book.net_profit_loss[realized],
+            "UsedCapital": book.used_capital[realized],
+            "Trades": 1,
+            "Fees": book.total_fees[realized],
+        })
+        daily = trades.groupby(["Day", "Strategy"], sort=True)[CELL_COLUMNS].sum().reset_index()
+
+        cells, starts = {}, {}
+        for period_type in PeriodType:
+            daily["Period"] = period_keys(daily["Day"].to_numpy(), period_type)
+            cells[period_type] = daily.groupby(["Period", "Strategy"], sort=True)[CELL_COLUMNS].sum()
+            starts[period_type] = daily.groupby("Period")["Day"].min().sort_values()
+        return PerformanceCube(cells, starts)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Every cell of every granularity in one long frame, with the first day of its period - see from_frame."""
+        frames = []
+        for period_type, cells in self._cells.items():
+            frame = cells.reset_index()
+            frame.insert(0, "PeriodType", period_type.value)
+            frame["Start"] = frame["Period"].map(self._starts[period_type]).to_numpy(dtype="datetime64[ns]")
+            frames.append(frame)
+        return pd.concat(frames, ignore_index=True)
+
+    @staticmethod
+    def from_frame(frame: pd.DataFrame) -> 'PerformanceCube':
+        cells, starts = {}, {}
+        for period_type in PeriodType:
+            rows = frame[frame["PeriodType"] == period_type.value]
+            cells[period_type] = rows.set_index(["Period", "Strategy"])[CELL_COLUMNS]
+            starts[period_type] = rows.drop_duplicates("Period").set_index("Period")["Start"].sort_values()
+        return PerformanceCube(cells, starts)
+
+    def cells(self, period_type: PeriodType) -> pd.DataFrame:
+        """All cells for one granularity, indexed by (Period, Strategy) in sorted order."""
+        return self._cells[period_type]
+
+    def periods(self, period_type: PeriodType) -> List[str]:
+        """Period keys in date order - unlike the cell index, where 2023-W10 sorts before 2023-W2."""
+        return self._starts[period_type].index.tolist()
+
+    def cell(self, period_type: PeriodType, period_key: str, strategy: str) -> Dict[str, float] | None:
+        cells = self._cells[period_type]
+        if (period_key, strategy) not in cells.index:
+            return None
+        return cells.loc[(period_key, strategy)].to_dict()
@@ -0,0 +1,27 @@
+from enum import Enum
+
+import numpy as np
+import pandas as pd
+
+
+class PeriodType(Enum):
+    DAY = "Day"
+    WEEK = "Week"
+    MONTH = "Month"
+    QUARTER = "Quarter"
+    YEAR = "Year"
+
+
+def period_keys(dates: np.ndarray, period_type: PeriodType) -> np.ndarray:
+    """Labels each datetime64 value with the period it falls in, e.g. 2023-01-10, 2023-W2, 2023-01, 2023-Q1 or 2023."""
+    if period_type == PeriodType.DAY:
+        return np.datetime_as_string(dates.astype("datetime64[D]"))
+    elif period_type == PeriodType.WEEK:
+        iso = pd.DatetimeIndex(dates).isocalendar()
+        return (iso["year"].astype(str) + "-W" + iso["week"].astype(str)).to_numpy()
+    elif period_type == PeriodType.QUARTER:
+        index = pd.DatetimeIndex(dates)
+        return (index.year.astype(str) + "-Q" + index.quarter.astype(str)).to_numpy()
+    elif period_type == PeriodType.YEAR:
+        return np.datetime_as_string(dates.astype("datetime64[Y]"))
+    return np.datetime_as_string(dates.astype("datetime64[M]"))
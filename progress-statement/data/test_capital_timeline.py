@@ -0,0 +1,57 @@
+import unittest
+from datetime import date, datetime
+
+import numpy as np
+
+from data.capital_timeline import CapitalTimeline
+from data.periods import PeriodType
+from data.trade_book import TradeBook
+from data.trade_details import TradeDetails
+
+
+def make_trade(strategy, date_in, date_out, qty=10, price=100.0):
+    return TradeDetails(Side=1, Symbol="AAPL", Shares=qty, DateIn=date_in, PriceIn=price, QtyIn=qty,
+                        DateOut=date_out, PriceOut=price if date_out else 0.0, QtyOut=qty if date_out else 0,
+                        FeesIn=0.0, FeesOut=0.0, M2MPrice=0.0, Currency="USD", Strategy=strategy)
+
+
+class TestCapitalTimeline(unittest.TestCase):
+
+    def setUp(self):
+        book = TradeBook.from_trades([
+            make_trade("Long", datetime(2023, 1, 1, 10), datetime(2023, 1, 3, 15)),
+            make_trade("Long", datetime(2023, 1, 3), datetime(2023, 1, 4), qty=5),
+            make_trade("Short", datetime(2023, 1, 4), None, price=50.0),
+        ])
+        self.timeline = CapitalTimeline.build(book, as_of=date(2023, 1, 6))
+
+    def test_capital_is_held_from_entry_to_exit_inclusive(self):
+        frame = self.timeline.to_frame()
+        long = frame[frame["Strategy"] == "Long"]
+        self.assertEqual(long["Date"].dt.day.tolist(), [1, 2, 3, 4])
+        self.assertEqual(long["CapitalDeployed"].tolist(), [1000.0, 1000.0, 1500.0, 500.0])
+        self.assertEqual(long["OpenPositions"].tolist(), [1, 1, 2, 1])
+
+    def test_open_positions_run_to_the_as_of_day(self):
+        frame = self.timeline.to_frame()
+        short = frame[frame["Strategy"] == "Short"]
+        self.assertEqual(short["Date"].dt.day.tolist(), [4, 5, 6])
+        self.assertEqual(short["CapitalDeployed"].tolist(), [500.0, 500.0, 500.0])
+
+    def test_average_capital(self):
+        average, cumulative = self.timeline.average_capital(PeriodType.DAY, total_label="All")
+        self.assertEqual(average.columns.tolist(), ["All", "Long", "Short"])
+        self.assertEqual(average.loc["2023-01-04"].tolist(), [1000.0, 500.0, 500.0])
+        # Long has held 1000, 1000, 1500, 500 then nothing - Short only counts from its first entry.
+        self.assertEqual(cumulative.loc["2023-01-05"].tolist(), [5000.0 / 5, 4000.0 / 5, 500.0])
+
+        average, cumulative = self.timeline.average_capital(PeriodType.MONTH)
+        np.testing.assert_allclose(average.loc["2023-01"].to_numpy(), [4000.0 / 6, 500.0])
+
+    def test_empty_book(self):
+        timeline = CapitalTimeline.build(TradeBook.from_trades([]), as_of=date(2023, 1, 6))
+        self.assertEqual(len(timeline.to_frame()), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from datetime import date, datetime
+
+import pandas as pd
+
+from data.equity_curve import EquityCurve
+from data.trade_book import TradeBook
+from data.trade_details import TradeDetails
+from price_extraction import StaticPriceProvider
+
+
+def make_trade(symbol, strategy, side, date_in, price_in, date_out=None, price_out=0.0, qty=10):
+    return TradeDetails(Side=side, Symbol=symbol, Shares=qty, DateIn=date_in, PriceIn=price_in, QtyIn=qty,
+                        DateOut=date_out, PriceOut=price_out, QtyOut=qty if date_out else 0, FeesIn=1.0,
+                        FeesOut=1.0 if date_out else 0.0, M2MPrice=0.0, Currency="USD", Strategy=strategy)
+
+
+class TestEquityCurve(unittest.TestCase):
+
+    def setUp(self):
+        # Mon 2 Jan to Fri 6 Jan, then the weekend carries Friday's close.
+        self.provider = StaticPriceProvider(histories={
+            "AAPL": pd.Series([100.0, 102.0, 104.0, 103.0, 105.0], index=pd.bdate_range("2023-01-02", "2023-01-06")),
+            "TSLA": pd.Series([200.0, 190.0, 180.0, 185.0, 170.0], index=pd.bdate_range("2023-01-02", "2023-01-06")),
+        })
+        book = TradeBook.from_trades([
+            make_trade("AAPL", "Long", 1, datetime(2023, 1, 2), 100.0, datetime(2023, 1, 4), 104.0),
+            make_trade("AAPL", "Long", 1, datetime(2023, 1, 3), 102.0),
+            make_trade("TSLA", "Short", -1, datetime(2023, 1, 2), 200.0),
+        ])
+        self.frame = EquityCurve.build(book, self.provider, as_of=date(2023, 1, 7)).to_frame()
+
+    def strategy(self, name, column):
+        return self.frame[self.frame["Strategy"] == name][column].tolist()
+
+    def test_closed_position_is_marked_until_its_exit(self):
+        # day 1 the closed trade is flat, day 2 it is up 20, on its exit day its 38 net PnL is realized.
+        self.assertEqual(self.strategy("Long", "RealizedPnL"), [0.0, 0.0, 38.0, 38.0, 38.0, 38.0])
+        self.assertEqual(self.strategy("Long", "UnrealizedPnL"), [0.0, 20.0, 20.0, 10.0, 30.0, 30.0])
+        self.assertEqual(self.strategy("Long", "EquityPnL"), [0.0, 20.0, 58.0, 48.0, 68.0, 68.0])
+
+    def test_short_position_gains_when_the_price_falls(self):
+        self.assertEqual(self.strategy("Short", "UnrealizedPnL"), [0.0, 100.0, 200.0, 150.0, 300.0, 300.0])
+        self.assertEqual(self.frame["Date"].max(), pd.Timestamp("2023-01-07"))
+
+    def test_price_history_is_fetched_once_per_symbol(self):
+        self.assertEqual(self.provider.history_lookups, 2)
+        self.provider.get_price_history({("AAPL", "USD"): (date(2023, 1, 3), date(2023, 1, 5))})
+        self.assertEqual(self.provider.history_lookups, 2)
+        self.provider.get_price_history({("AAPL", "USD"): (date(2022, 12, 1), date(2023, 1, 5))})
+        self.assertEqual(self.provider.history_lookups, 3)
+
+    def test_unpriced_symbols_have_no_unrealized_pnl(self):
+        book = TradeBook.from_trades([make_trade("MSFT", "Long", 1, datetime(2023, 1, 2), 50.0)])
+        frame = EquityCurve.build(book, StaticPriceProvider(), as_of=date(2023, 1, 3)).to_frame()
+        self.assertEqual(frame["UnrealizedPnL"].tolist(), [0.0, 0.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
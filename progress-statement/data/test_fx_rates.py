@@ -0,0 +1,74 @@
+import unittest
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from data.fx_rates import FxRates
+from data.trade_book import TradeBook
+from data.trade_details import MAX_CONVERSIONS, TradeDetails, ProfitLossData
+
+
+def make_trade(currency, date_in, date_out, price_in=100.0, price_out=110.0, m2m=0.0):
+    return TradeDetails(Side=1, Symbol="X", Shares=10, DateIn=date_in, PriceIn=price_in, QtyIn=10,
+                        DateOut=date_out, PriceOut=price_out if date_out else 0.0, QtyOut=10 if date_out else 0,
+                        FeesIn=1.0, FeesOut=1.0 if date_out else 0.0, M2MPrice=m2m, Currency=currency,
+                        Strategy="Long")
+
+
+class TestFxRates(unittest.TestCase):
+
+    def setUp(self):
+        # AUD is quoted in USD, a day given twice keeps its last rate.
+        self.rates = FxRates.from_frame(pd.DataFrame({
+            "Date": ["2023-01-02", "2023-01-09", "2023-01-02", "2023-02-01"],
+            "Currency": ["AUD", "AUD", "AUD", "aud"],
+            "Rate": [0.60, 0.70, 0.50, 0.80],
+        }), pivot="USD")
+
+    def test_rate_is_the_last_one_on_or_before_the_day(self):
+        days = np.array(["2022-12-30", "2023-01-02T15:00", "2023-01-08", "2023-01-09", "2024-01-01", "NaT"],
+                        dtype="datetime64[ns]")
+        np.testing.assert_array_equal(self.rates.rates_on("AUD", days), [0.5, 0.5, 0.5, 0.7, 0.8, 0.8])
+        np.testing.assert_array_equal(self.rates.rates_on("USD", days), np.ones(6))
+        self.assertEqual(self.rates.currencies, ["AUD", "USD"])
+
+    def test_missing_currency_is_an_error(self):
+        with self.assertRaises(ValueError):
+            self.rates.rates_on("EUR", np.array(["2023-01-02"], dtype="datetime64[ns]"))
+
+    def test_convert_prices_entries_exits_and_open_positions_at_their_own_days(self):
+        book = TradeBook.from_trades([
+            make_trade("AUD", datetime(2023, 1, 3), datetime(2023, 1, 10)),
+            make_trade("USD", datetime(2023, 1, 3), None, m2m=120.0),
+        ])
+        converted = self.rates.convert(book, "USD")
+        np.testing.assert_allclose(converted["PriceIn"], [50.0, 100.0])
+        np.testing.assert_allclose(converted["PriceOut"], [77.0, 0.0])
+        np.testing.assert_allclose(converted["M2MPrice"], [0.0, 120.0])
+        self.assertEqual(converted["Currency"].tolist(), ["USD", "USD"])
+        # the USD trade in AUD: entry at 0.5, the open position at the latest rate, 0.8.
+        in_aud = self.rates.convert(book, "AUD")
+        np.testing.assert_allclose(in_aud["PriceIn"], [100.0, 200.0])
+        np.testing.assert_allclose(in_aud["M2MPrice"], [0.0, 150.0])
+
+    def test_rollups_add_up_in_one_currency(self):
+        data = ProfitLossData(trades=[make_trade("AUD", datetime(2023, 1, 3), datetime(2023, 1, 10)),
+                                      make_trade("USD", datetime(2023, 1, 3), datetime(2023, 1, 10))])
+        converted = data.in_currency(self.rates, "USD")
+        # AUD: 10 x 110 x 0.7 - 10 x 100 x 0.5 - 1 x 0.5 - 1 x 0.7, USD: 100 - 2.
+        np.testing.assert_allclose(converted.book.net_profit_loss, [268.8, 98.0])
+        self.assertIs(data.in_currency(self.rates, "USD"), converted)
+        with self.assertRaises(ValueError):
+            data.in_currency(self.rates, "EUR")
+
+    def test_conversions_with_old_rates_are_let_go(self):
+        data = ProfitLossData(trades=[make_trade("AUD", datetime(2023, 1, 3), datetime(2023, 1, 10))])
+        first = data.in_currency(self.rates, "USD")
+        for version in range(MAX_CONVERSIONS):
+            data.in_currency(FxRates(self.rates.pivot, self.rates.rates, str(version)), "USD")
+        self.assertIsNot(data.in_currency(self.rates, "USD"), first)
+
+
+if __name__ == '__main__':
+    unittest.main()
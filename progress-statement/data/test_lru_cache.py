@@ -0,0 +1,46 @@
+import unittest
+
+from data.lru_cache import LruCache
+
+
+class TestLruCache(unittest.TestCase):
+
+    def test_least_recently_used_is_dropped_first(self):
+        cache = LruCache(2)
+        cache.get_or_create("a", lambda: 1)
+        cache.get_or_create("b", lambda: 2)
+        # a is used again, so b is the one to go.
+        self.assertEqual(cache.get_or_create("a", lambda: -1), 1)
+        cache.get_or_create("c", lambda: 3)
+
+        self.assertEqual((len(cache), cache.evictions), (2, 1))
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(cache.get_or_create("b", lambda: 4), 4)
+
+    def test_values_are_weighed(self):
+        cache = LruCache(10, size_of=len)
+        cache.get_or_create("a", lambda: b"123456")
+        cache.get_or_create("b", lambda: b"1234")
+        self.assertEqual(cache.size, 10)
+
+        cache.get_or_create("c", lambda: b"12")
+        self.assertEqual(cache.size, 6)
+        self.assertNotIn("a", cache)
+
+    def test_value_larger_than_the_cache_is_not_kept(self):
+        cache = LruCache(4, size_of=len)
+        self.assertEqual(cache.get_or_create("a", lambda: b"12345"), b"12345")
+        self.assertEqual(len(cache), 0)
+
+
+    def test_clear(self):
+        cache = LruCache(10, size_of=len)
+        cache.get_or_create("a", lambda: b"123")
+        cache.clear()
+        self.assertEqual((len(cache), cache.size), (0, 0))
+        self.assertEqual(cache.get_or_create("a", lambda: b"45"), b"45")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from datetime import datetime
+
+from data.performance_cube import PerformanceCube
+from data.periods import PeriodType
+from data.trade_book import TradeBook
+from data.trade_details import TradeDetails
+
+
+class TestPerformanceCube(unittest.TestCase):
+
+    def setUp(self):
+        trades = [
+            TradeDetails(Side=1, Symbol="AAPL", Shares=100, DateIn=datetime(2023, 1, 1), PriceIn=150.0, QtyIn=100,
+                         DateOut=datetime(2023, 1, 10), PriceOut=155.0, QtyOut=100, FeesIn=10.0, FeesOut=10.0,
+                         M2MPrice=0.0, Currency="USD", Strategy="Apple"),
+            TradeDetails(Side=1, Symbol="AAPL", Shares=25, DateIn=datetime(2023, 1, 1), PriceIn=150.0, QtyIn=25,
+                         DateOut=datetime(2023, 5, 22), PriceOut=160.0, QtyOut=25, FeesIn=10.0, FeesOut=1.5,
+                         M2MPrice=0.0, Currency="USD", Strategy="Apple"),
+            TradeDetails(Side=-1, Symbol="TSLA", Shares=20, DateIn=datetime(2023, 12, 1), PriceIn=700.0, QtyIn=20,
+                         DateOut=datetime(2024, 1, 3), PriceOut=650.0, QtyOut=20, FeesIn=5.0, FeesOut=5.0,
+                         M2MPrice=0.0, Currency="USD", Strategy="Short"),
+            TradeDetails(Side=1, Symbol="MSFT", Shares=75, DateIn=datetime(2023, 1, 1), PriceIn=999.0, QtyIn=75,
+                         DateOut=None, PriceOut=0.0, QtyOut=0, FeesIn=7.5, FeesOut=0.0,
+                         M2MPrice=0.0, Currency="USD", Strategy="Apple"),
+        ]
+        self.cube = PerformanceCube.build(TradeBook.from_trades(trades))
+
+    def test_quarter_and_year_cells(self):
+        self.assertEqual(self.cube.cells(PeriodType.QUARTER).index.tolist(),
+                         [("2023-Q1", "Apple"), ("2023-Q2", "Apple"), ("2024-Q1", "Short")])
+        self.assertEqual(self.cube.cell(PeriodType.YEAR, "2023", "Apple"),
+                         {"NetPnL": 718.5, "UsedCapital": 18750.0, "Trades": 2, "Fees": 31.5})
+        self.assertEqual(self.cube.cell(PeriodType.YEAR, "2024", "Short"),
+                         {"NetPnL": 990.0, "UsedCapital": 14000.0, "Trades": 1, "Fees": 10.0})
+
+    def test_every_granularity_adds_up_to_the_same_totals(self):
+        for period_type in PeriodType:
+            totals = self.cube.cells(period_type).sum()
+            self.assertAlmostEqual(totals["NetPnL"], 1708.5)
+            self.assertEqual(totals["Trades"], 3)
+
+    def test_missing_cell(self):
+        self.assertIsNone(self.cube.cell(PeriodType.MONTH, "2023-02", "Apple"))
+
+
+if __name__ == '__main__':
+    unittest.main()
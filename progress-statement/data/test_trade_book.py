@@ -0,0 +1,54 @@
+import unittest
+from datetime import datetime
+
+import numpy as np
+
+from data.trade_book import TradeBook
+from data.trade_details import TradeDetails, ProfitLossData
+
+
+class TestTradeBook(unittest.TestCase):
+
+    def setUp(self):
+        self.trades = [
+            TradeDetails(Side=1, Symbol="AAPL", Shares=100, DateIn=datetime(2023, 1, 1), PriceIn=150.0, QtyIn=100,
+                         DateOut=datetime(2023, 1, 10), PriceOut=155.0, QtyOut=100, FeesIn=10.0, FeesOut=10.0,
+                         M2MPrice=0.0, Currency="USD", Strategy="Long"),
+            TradeDetails(Side=1, Symbol="GOOGL", Shares=50, DateIn=datetime(2023, 1, 1), PriceIn=2000.0, QtyIn=50,
+                         DateOut=None, PriceOut=0.0, QtyOut=0, FeesIn=5.0, FeesOut=0.0,
+                         M2MPrice=2100.0, Currency="USD", Strategy="Long"),
+            TradeDetails(Side=-1, Symbol="TSLA", Shares=20, DateIn=datetime(2023, 1, 1), PriceIn=700.0, QtyIn=20,
+                         DateOut=datetime(2023, 1, 10), PriceOut=650.0, QtyOut=20, FeesIn=5.0, FeesOut=5.0,
+                         M2MPrice=0.0, Currency="USD", Strategy="Short"),
+        ]
+        self.book = TradeBook.from_trades(self.trades)
+
+    def test_vectorized_metrics_match_trade_details(self):
+        np.testing.assert_array_equal(self.book.realized_mask, [t.is_realized() for t in self.trades])
+        np.testing.assert_array_equal(self.book.used_capital, [t.calculate_used_capital() for t in self.trades])
+        np.testing.assert_array_equal(self.book.total_fees, [t.calculate_total_fees() for t in self.trades])
+        np.testing.assert_array_equal(self.book.gross_profit_loss,
+                                      [t.calculate_gross_profit_loss() for t in self.trades])
+        np.testing.assert_array_equal(self.book.net_profit_loss, [t.calculate_net_profit_loss() for t in self.trades])
+
+    def test_open_trades_have_no_exit_date(self):
+        self.assertTrue(np.isnat(self.book["DateOut"][1]))
+        self.assertEqual(self.book["DateOut"][0], np.datetime64("2023-01-10"))
+        np.testing.assert_array_equal(self.book["IsOpen"], [False, True, False])
+
+    def test_trade_details_view_round_trips(self):
+        self.assertEqual(self.book.trades(), self.trades)
+
+    def test_take_and_concat(self):
+        realized = self.book.take(self.book.realized_mask)
+        self.assertEqual(list(realized["Symbol"]), ["AAPL", "TSLA"])
+        self.assertEqual(len(TradeBook.concat([realized, self.book])), 5)
+
+    def test_profit_loss_data_filters(self):
+        profit_loss_data = ProfitLossData(trades=self.trades)
+        self.assertEqual(profit_loss_data.realized_trades(), [self.trades[0], self.trades[2]])
+        self.assertEqual(profit_loss_data.unrealized_trades(), [self.trades[1]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+from datetime import date, datetime
+
+import numpy as np
+from werkzeug.datastructures import MultiDict
+
+from data.periods import PeriodType
+from data.trade_book import TradeBook
+from data.trade_details import MAX_SUBSETS, TradeDetails, ProfitLossData
+from data.trade_index import TradeIndex, TradeQuery
+
+
+def make_trade(symbol, strategy, date_out, currency="USD", account=""):
+    return TradeDetails(Side=1, Symbol=symbol, Shares=10, DateIn=datetime(2023, 1, 1), PriceIn=100.0, QtyIn=10,
+                        DateOut=date_out, PriceOut=110.0 if date_out else 0.0, QtyOut=10 if date_out else 0,
+                        FeesIn=1.0, FeesOut=1.0 if date_out else 0.0, M2MPrice=0.0, Currency=currency,
+                        Strategy=strategy, Account=account)
+
+
+class TestTradeIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.trades = [
+            make_trade("AAPL", "Long", datetime(2023, 3, 31, 15, 30)),
+            make_trade("BHP", "Aus", datetime(2023, 2, 1), currency="AUD", account="paper"),
+            make_trade("AAPL", "Short", None, account="paper"),
+            make_trade("MSFT", "Long", datetime(2023, 4, 1)),
+            make_trade("AAPL", "Long", datetime(2023, 1, 5)),
+        ]
+        self.index = TradeIndex(TradeBook.from_trades(self.trades))
+
+    def select(self, **kwargs):
+        return self.index.select(TradeQuery(**kwargs)).tolist()
+
+    def test_no_filter_selects_everything(self):
+        self.assertEqual(self.select(), [0, 1, 2, 3, 4])
+
+    def test_value_filters(self):
+        self.assertEqual(self.select(strategy=("Long",)), [0, 3, 4])
+        self.assertEqual(self.select(strategy=("Long", "Aus")), [0, 1, 3, 4])
+        self.assertEqual(self.select(symbol=("AAPL",), strategy=("Long",)), [0, 4])
+        self.assertEqual(self.select(currency=("AUD",)), [1])
+        self.assertEqual(self.select(account=("paper",)), [1, 2])
+        self.assertEqual(self.select(symbol=("NOPE",)), [])
+
+    def test_realized(self):
+        self.assertEqual(self.select(realized=True), [0, 1, 3, 4])
+        self.assertEqual(self.select(realized=False), [2])
+
+    def test_exit_date_range_is_inclusive(self):
+        self.assertEqual(self.select(date_from=date(2023, 1, 1), date_to=date(2023, 3, 31)), [0, 1, 4])
+        self.assertEqual(self.select(date_to=date(2023, 1, 5)), [4])
+
+    def test_open_trades_sort_after_every_date(self):
+        self.assertEqual(self.select(date_from=date(2023, 4, 1)), [2, 3])
+        self.assertEqual(self.select(date_from=date(2030, 1, 1)), [2])
+
+    def test_query_from_args(self):
+        query = TradeQuery.from_args(MultiDict([("strategy", "Long,Aus"), ("strategy", "Short"), ("from", "2023-01-01"),
+                                                ("realized", "true")]))
+        self.assertEqual(query, TradeQuery(strategy=("Long", "Aus", "Short"), date_from=date(2023, 1, 1),
+                                           realized=True))
+        self.assertTrue(TradeQuery.from_args(MultiDict()).is_empty())
+        with self.assertRaises(ValueError):
+            TradeQuery.from_args(MultiDict([("to", "last week")]))
+        with self.assertRaises(ValueError):
+            TradeQuery.from_args(MultiDict([("realized", "maybe")]))
+        self.assertEqual(TradeQuery.from_args(MultiDict([("account", "live"), ("split", "account")])),
+                         TradeQuery(account=("live",), split_by_account=True))
+        with self.assertRaises(ValueError):
+            TradeQuery.from_args(MultiDict([("split", "symbol")]))
+
+    def test_subset_has_its_own_performance(self):
+        data = ProfitLossData(trades=self.trades)
+        subset = data.subset(TradeQuery(strategy=("Long",), date_to=date(2023, 3, 31)))
+        self.assertEqual([t.Symbol for t in subset.trades], ["AAPL", "AAPL"])
+        np.testing.assert_array_equal(subset.cube.cells(PeriodType.YEAR)["NetPnL"].to_numpy(), [196.0])
+        self.assertIs(data.subset(TradeQuery(strategy=("Long",), date_to=date(2023, 3, 31))), subset)
+        self.assertIs(data.subset(TradeQuery()), data)
+
+    def test_only_the_latest_subsets_are_kept(self):
+        data = ProfitLossData(trades=self.trades)
+        first = data.subset(TradeQuery(date_from=date(2023, 1, 1)))
+        for day in range(1, MAX_SUBSETS + 1):
+            data.subset(TradeQuery(date_from=date.fromordinal(date(2023, 1, 1).toordinal() + day)))
+        self.assertIsNot(data.subset(TradeQuery(date_from=date(2023, 1, 1))), first)
+
+    def test_split_by_account_qualifies_strategies(self):
+        split = ProfitLossData(trades=self.trades).subset(TradeQuery(split_by_account=True))
+        self.assertEqual([t.Strategy for t in split.trades], ["Long", "paper/Aus", "paper/Short", "Long", "Long"])
+        self.assertEqual(split.cube.cells(PeriodType.YEAR).index.get_level_values("Strategy").tolist(),
+                         ["Long", "paper/Aus"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+from functools import cached_property
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+INTEGER_COLUMNS = ("Side",)
+FLOAT_COLUMNS = ("Shares", "PriceIn", "QtyIn", "QtyOut", "PriceOut", "FeesIn", "FeesOut", "M2MPrice")
+TEXT_COLUMNS = ("Symbol", "Currency", "Strategy", "Account")
+DATE_COLUMNS = ("DateIn", "DateOut")
+TRADE_COLUMNS = INTEGER_COLUMNS + FLOAT_COLUMNS + TEXT_COLUMNS + DATE_COLUMNS
+
+
+class TradeBook:
+    """Column-oriented store of trades - one NumPy array per TradeDetails field.
+
+    Dates are datetime64 columns, with NaT as the DateOut of a position that is still open; IsOpen
+    holds the same fact as a boolean column.
+
+    The per-trade metrics of TradeDetails are available here as arrays computed for the whole book at once.
+    A book is never modified after construction, so derived arrays are computed once and kept.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+
+    @staticmethod
+    def from_columns(columns: Dict[str, Sequence]) -> 'TradeBook':
+        arrays = {}
+        for name in INTEGER_COLUMNS:
+            arrays[name] = np.asarray(columns.get(name, ()), dtype=np.int64)
+        for name in FLOAT_COLUMNS:
+            arrays[name] = np.asarray(columns.get(name, ()), dtype=np.float64)
+        for name in TEXT_COLUMNS:
+            arrays[name] = np.asarray(columns.get(name, ()), dtype=object)
+        for name in DATE_COLUMNS:
+            arrays[name] = np.asarray(columns.get(name, ()), dtype="datetime64[ns]")
+        if "IsOpen" in columns:
+            arrays["IsOpen"] = np.asarray(columns["IsOpen"], dtype=bool)
+        else:
+            arrays["IsOpen"] = np.isnat(arrays["DateOut"])
+        return TradeBook(arrays)
+
+    @staticmethod
+    def from_trades(trades: Iterable['TradeDetails']) -> 'TradeBook':
+        trades = list(trades)
+        return TradeBook.from_columns({name: [getattr(trade, name) for trade in trades] for name in TRADE_COLUMNS})
+
+    @staticmethod
+    def concat(books: List['TradeBook']) -> 'TradeBook':
+        if not books:
+            return TradeBook.from_columns({})
+        return TradeBook({name: np.concatenate([book.columns[name] for book in books]) for name in books[0].columns})
+
+    def __len__(self) -> int:
+        return len(self.columns["Side"])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def take(self, indices: np.ndarray) -> 'TradeBook':
+        """A new book holding only the given rows (an integer index or boolean mask)."""
+        return TradeBook({name: values[indices] for name, values in self.columns.items()})
+
+    def with_column(self, name: str, values: np.ndarray) -> 'TradeBook':
+        columns = dict(self.columns)
+        columns[name] = values
+        return TradeBook(columns)
+
+    def split_by_account(self) -> 'TradeBook':
+        """The same trades with each strategy qualified by its account ("Live/Momentum"), so every report that
+        groups by strategy reports each account's strategies separately.  Trades without an account keep theirs.
+        """
+        accounts = self.columns["Account"].astype(str)
+        strategies = self.columns["Strategy"].astype(str)
+        qualified = np.where(accounts == "", strategies, np.char.add(np.char.add(accounts, "/"), strategies))
+        return self.with_column("Strategy", qualified.astype(object))
+
+    @cached_property
+    def realized_mask(self) -> np.ndarray:
+        return (self.columns["QtyIn"] > 0) & (self.columns["QtyOut"] > 0)
+
+    @cached_property
+    def used_capital(self) -> np.ndarray:
+        return self.columns["QtyIn"] * self.columns["PriceIn"]
+
+    @cached_property
+    def total_fees(self) -> np.ndarray:
+        return self.columns["FeesIn"] + self.columns["FeesOut"]
+
+    @cached_property
+    def gross_profit_loss(self) -> np.ndarray:
+        gross = self.columns["Side"] * (self.columns["QtyOut"] * self.columns["PriceOut"] - self.used_capital)
+        return np.where(self.realized_mask, gross, 0.0)
+
+    @cached_property
+    def net_profit_loss(self) -> np.ndarray:
+        return np.where(self.realized_mask, self.gross_profit_loss - self.total_fees, 0.0)
+
+    def trades(self) -> List['TradeDetails']:
+        """Row-wise TradeDetails views of the book, in their original order."""
+        from data.trade_details import TradeDetails
+
+        values = [self.columns[name].tolist() for name in INTEGER_COLUMNS + FLOAT_COLUMNS + TEXT_COLUMNS]
+        # datetime64[us] converts to datetime (NaT to None), where [ns] would give bare integers.
+        values += [self.columns[name].astype("datetime64[us]").tolist() for name in DATE_COLUMNS]
+        return [TradeDetails(**dict(zip(TRADE_COLUMNS, row))) for row in zip(*values)]
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.columns)
@@ -1,16 +1,34 @@
-from dataclasses import dataclass, field
-from typing import List
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime
+from functools import cached_property
+from typing import Any, Callable, Dict, List, TypeVar
 
+from data.capital_timeline import CapitalTimeline
+from data.equity_curve import EquityCurve
+from data.fx_rates import FxRates
+from data.lru_cache import LruCache
+from data.performance_cube import PerformanceCube
+from data.trade_book import TradeBook
+from data.trade_index import TradeIndex, TradeQuery
 
-@dataclass
+T = TypeVar("T")
+
+# filtered views of one book kept at a time - each has its own book, index, cube and reports.
+MAX_SUBSETS = 32
+# converted copies of one book kept at a time - one per report currency, and per version of the rates.
+MAX_CONVERSIONS = 4
+
+
+@dataclass(frozen=True, slots=True)
 class TradeDetails:
     Side: int
     Symbol: str
     Shares: float
-    DateIn: str
+    DateIn: datetime
     PriceIn: float
     QtyIn: float
-    DateOut: str
+    DateOut: datetime | None  # None while the position is still open
     QtyOut: float
     PriceOut: float
     FeesIn: float
@@ -18,6 +36,7 @@ class TradeDetails:
     M2MPrice: float
     Currency: str
     Strategy: str
+    Account: str = ""  # the account of the OrderClerk file the trade was read from, see trade_sources.py
 
     def is_long(self) -> bool:
         return self.Side == 1
@@ -25,6 +44,9 @@ class TradeDetails:
     def is_short(self) -> bool:
         return self.Side == -1
 
+    def is_open(self) -> bool:
+        return self.DateOut is None
+
     def is_realized(self) -> bool:
         return self.QtyIn > 0 and self.QtyOut > 0
 
@@ -45,12 +67,80 @@ class TradeDetails:
         return self.calculate_gross_profit_loss() - (self.FeesIn + self.FeesOut)
 
 
-@dataclass
 class ProfitLossData:
-    trades: List[TradeDetails] = field(default_factory=list)
+    """The trades of one OrderClerk file, held as a columnar TradeBook.
+
+    TradeDetails objects are still available through `trades` for code that works one trade at a time.
+    The performance cube, and any report passed through `memoize`, is built on first use and kept with the
+    book - so it is cached for exactly as long as the book itself.  Subsets are kept too, but only the
+    MAX_SUBSETS most recently used, as every distinct filter makes another one - as are the most recent
+    currency conversions, as every new version of the exchange rates makes another one.
+    """
+
+    def __init__(self, trades: List[TradeDetails] | None = None, book: TradeBook | None = None):
+        self.book = book if book is not None else TradeBook.from_trades(trades or [])
+        self._lock = threading.Lock()
+        self._reports: Dict[Any, Any] = {}
+        self._subsets: LruCache[ProfitLossData] = LruCache(MAX_SUBSETS)
+        self._conversions: LruCache[ProfitLossData] = LruCache(MAX_CONVERSIONS)
+
+    def memoize(self, key, factory: Callable[[], T]) -> T:
+        with self._lock:
+            if key in self._reports:
+                return self._reports[key]
+        report = factory()
+        with self._lock:
+            return self._reports.setdefault(key, report)
+
+    @cached_property
+    def cube(self) -> PerformanceCube:
+        return PerformanceCube.build(self.book)
+
+    @cached_property
+    def trades(self) -> List[TradeDetails]:
+        return self.book.trades()
+
+    def warm(self):
+        """Builds the TradeDetails views and the performance cube now, so the first request finds them ready."""
+        _ = self.trades, self.cube
+
+    def capital_timeline(self, as_of: date | None = None) -> CapitalTimeline:
+        """Daily capital deployed per strategy, with open positions held up to as_of (today by default)."""
+        as_of = as_of or date.today()
+        return self.memoize(("CapitalTimeline", as_of), lambda: CapitalTimeline.build(self.book, as_of))
+
+    def equity_curve(self, price_provider, as_of: date | None = None) -> EquityCurve:
+        """Daily realized and unrealized PnL per strategy, with positions marked to the closes of price_provider."""
+        as_of = as_of or date.today()
+        return self.memoize(("EquityCurve", as_of), lambda: EquityCurve.build(self.book, price_provider, as_of))
+
+    @cached_property
+    def index(self) -> TradeIndex:
+        return TradeIndex(self.book)
+
+    def subset(self, query: TradeQuery) -> 'ProfitLossData':
+        """The trades matching the query, as their own ProfitLossData - with its own cube and reports."""
+        if query.is_empty():
+            return self
+
+        def select():
+            book = self.book.take(self.index.select(query))
+            return ProfitLossData(book=book.split_by_account() if query.split_by_account else book)
+
+        return self._subsets.get_or_create(query, select)
+
+    def in_currency(self, rates: FxRates, currency: str) -> 'ProfitLossData':
+        """The trades with their prices and fees converted to the currency, as their own ProfitLossData.
+
+        Raises ValueError when the rates lack one of the book's currencies.
+        """
+        if currency not in rates.currencies:
+            raise ValueError(f"No exchange rates for {currency}, the rates cover {', '.join(rates.currencies)}")
+        return self._conversions.get_or_create((rates, currency),
+                                               lambda: ProfitLossData(book=rates.convert(self.book, currency)))
 
     def realized_trades(self) -> List[TradeDetails]:
-        return [trade for trade in self.trades if trade.is_realized()]
+        return [trade for trade, realized in zip(self.trades, self.book.realized_mask) if realized]
 
     def unrealized_trades(self) -> List[TradeDetails]:
-        return [trade for trade in self.trades if not trade.is_realized()]
+        return [trade for trade, realized in zip(self.trades, self.book.realized_mask) if not realized]
@@ -0,0 +1,126 @@
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, Tuple
+
+import numpy as np
+
+from data.trade_book import TradeBook
+
+# the column each TradeQuery value filter looks up, and the index built over it.
+VALUE_FILTERS = {"strategy": "Strategy", "symbol": "Symbol", "currency": "Currency", "account": "Account"}
+
+
+@dataclass(frozen=True)
+class TradeQuery:
+    """Which trades a request wants - every given condition must hold.
+
+    strategy/symbol/currency/account each match any one of their values.  date_from and date_to bound the exit
+    date, both days inclusive; a trade that is still open has not exited yet, so it sorts after every date - it
+    is kept by date_from alone and dropped by any date_to.  split_by_account doesn't filter anything, it reports
+    every account's strategies separately.
+    """
+    strategy: Tuple[str, ...] = ()
+    symbol: Tuple[str, ...] = ()
+    currency: Tuple[str, ...] = ()
+    account: Tuple[str, ...] = ()
+    date_from: date | None = None
+    date_to: date | None = None
+    realized: bool | None = None
+    split_by_account: bool = False
+
+    @staticmethod
+    def from_args(args) -> 'TradeQuery':
+        """Reads strategy=, symbol=, currency=, account=, from=, to=, realized= and split= from a request's
+        query string.
+
+        A value filter may be repeated, or given as a comma separated list.  Raises ValueError for a date
+        that is not YYYY-MM-DD, a realized= that is not true/false, or a split= other than account.
+        """
+        def values(name):
+            return tuple(value for arg in args.getlist(name) for value in arg.split(",") if value)
+
+        def day(name):
+            value = args.get(name)
+            return date.fromisoformat(value) if value else None
+
+        realized = args.get("realized")
+        if realized is not None:
+            if realized.lower() not in ("true", "false", "1", "0", "yes", "no"):
+                raise ValueError(f"Invalid realized value: {realized}")
+            realized = realized.lower() in ("true", "1", "yes")
+
+        split = args.get("split")
+        if split is not None and split.lower() not in ("account", ""):
+            raise ValueError(f"Invalid split: {split}, reports can only be split by account")
+
+        return TradeQuery(strategy=values("strategy"), symbol=values("symbol"), currency=values("currency"),
+                          account=values("account"), date_from=day("from"), date_to=day("to"), realized=realized,
+                          split_by_account=bool(split))
+
+    def is_empty(self) -> bool:
+        return self == TradeQuery()
+
+
+class TradeIndex:
+    """Prebuilt indexes over a TradeBook, so a query touches only the rows it returns.
+
+    Strategy, symbol and currency each map to the sorted row ids holding that value, and the exit dates are
+    kept sorted (open trades last) so a date range is two binary searches.  A query intersects the id lists
+    of its conditions, starting from the smallest.
+    """
+
+    def __init__(self, book: TradeBook):
+        self.book = book
+        self.by_value: Dict[str, Dict[str, np.ndarray]] = {
+            column: _group_row_ids(book[column]) for column in VALUE_FILTERS.values()
+        }
+        # NaT sorts last in NumPy, which is where an open trade belongs.
+        self.exit_order = np.argsort(book["DateOut"], kind="stable")
+        self.sorted_exits = book["DateOut"][self.exit_order]
+        self.realized_ids = np.flatnonzero(book.realized_mask)
+        self.unrealized_ids = np.flatnonzero(~book.realized_mask)
+
+    def select(self, query: TradeQuery) -> np.ndarray:
+        """The ids of the rows matching the query, in book order."""
+        candidates = []
+        for field, column in VALUE_FILTERS.items():
+            wanted = getattr(query, field)
+            if wanted:
+                index = self.by_value[column]
+                ids = [index[value] for value in wanted if value in index]
+                candidates.append(np.unique(np.concatenate(ids)) if ids else np.empty(0, dtype=np.int64))
+        if query.realized is not None:
+            candidates.append(self.realized_ids if query.realized else self.unrealized_ids)
+        if query.date_from is not None or query.date_to is not None:
+            candidates.append(self._exited_between(query.date_from, query.date_to))
+
+        if not candidates:
+            return np.arange(len(self.book))
+        candidates.sort(key=len)
+        selected = candidates[0]
+        for ids in candidates[1:]:
+            if len(selected) == 0:
+                break
+            selected = np.intersect1d(selected, ids, assume_unique=True)
+        return selected
+
+    def _exited_between(self, date_from: date | None, date_to: date | None) -> np.ndarray:
+        start = 0
+        end = len(self.sorted_exits)
+        if date_from is not None:
+            start = np.searchsorted(self.sorted_exits, np.datetime64(date_from, "ns"), side="left")
+        if date_to is not None:
+            end = np.searchsorted(self.sorted_exits, np.datetime64(date_to + timedelta(days=1), "ns"), side="left")
+        return np.sort(self.exit_order[start:max(start, end)])
+
+
+def _group_row_ids(values: np.ndarray) -> Dict[str, np.ndarray]:
+    """value -> the sorted ids of the rows holding it, from one stable sort of the column."""
+    if len(values) == 0:
+        return {}
+    order = np.argsort(values, kind="stable")
+    sorted_values = values[order]
+    boundaries = np.flatnonzero(sorted_values[1:] != sorted_values[:-1]) + 1
+    starts = np.concatenate(([0], boundaries))
+    ends = np.concatenate((boundaries, [len(values)]))
+    return {sorted_values[s]: order[s:e] for s, e in zip(starts, ends)}
@@ -42,5 +42,6 @@ Get-ChildItem -Path . -Filter *.py -Recurse | ForEach-Object {
 
 Copy-Item -Path config.ini -Destination $DEPLOYMENT_DIR
 Copy-Item -Path start_flask.bat -Destination $DEPLOYMENT_DIR
+Copy-Item -Path start_production.bat -Destination $DEPLOYMENT_DIR
 
 Write-Host "Upgrade complete - you can start the service now"
\ No newline at end of file
@@ -0,0 +1,84 @@
+import gzip
+import hashlib
+import zlib
+from datetime import datetime
+from typing import Callable, Tuple
+
+from flask import Response, request
+from werkzeug.http import is_resource_modified
+
+from data.lru_cache import LruCache
+from metrics import metrics
+from single_flight import SingleFlight
+from trade_cache import CachedTradeBook
+
+# bodies smaller than this are sent as they are, compressing them costs more than it saves.
+MIN_COMPRESS_SIZE = 1024
+
+# concurrent requests for the same body of the same trade book version wait for one render.
+report_renders = SingleFlight('coalesced_renders')
+
+# the bodies rendered most recently, up to this many bytes - every query string is a body of its own, so they
+# cannot all be kept for as long as the trade book is.
+MAX_RENDERED_BYTES = 64 * 1024 * 1024
+rendered_bodies = LruCache(MAX_RENDERED_BYTES, size_of=lambda rendered: len(rendered[0]))
+
+
+def conditional_response(entry: CachedTradeBook, render: Callable[[], bytes], mimetype: str = 'text/csv',
+                         compressible: bool = True, version: str = "",
+                         last_modified: datetime | None = None) -> Response:
+    """Serves a body derived from a cached trade book, honouring If-None-Match and If-Modified-Since.
+
+    The strong ETag is built from the source file's fingerprint, the pricing date, the request's path and
+    query string and the mimetype (which may come from the Accept header), plus the version of anything else
+    the body is derived from (e.g. exchange rates), so an unchanged file answers a poll with 304 Not Modified
+    without rendering anything.  Last-Modified is the later of the trade book's and last_modified, that of
+    whatever else the body is derived from.
+    The most recently rendered (and gzip or deflate encoded) bodies are kept, keyed by the ETag, and concurrent
+    requests for a body that is still being rendered wait for that render instead of starting their own.
+    """
+    args = sorted(request.args.items(multi=True))
+    digest = hashlib.sha1(f"{entry.version}|{version}|{request.path}|{args}|{mimetype}".encode()).hexdigest()
+    encoding = (request.accept_encodings.best_match(['gzip', 'deflate']) if compressible else None) or 'identity'
+    # each content coding is a different representation, so it needs its own strong ETag.
+    etag = digest if encoding == 'identity' else f"{digest}-{encoding}"
+
+    if last_modified is None or last_modified < entry.last_modified:
+        last_modified = entry.last_modified
+
+    metrics.increment('responses')
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        metrics.increment('responses_not_modified')
+        response = Response(status=304)
+    else:
+        rendered = []
+
+        def render_and_encode():
+            rendered.append(True)
+            return _encode(render(), encoding)
+
+        body, body_encoding = rendered_bodies.get_or_create(
+            (digest, encoding), lambda: report_renders.do((digest, encoding), render_and_encode))
+        if not rendered:
+            metrics.increment('response_cache_hits')
+        metrics.increment('bytes_sent', len(body))
+        response = Response(body, mimetype=mimetype)
+        if body_encoding is not None:
+            response.content_encoding = body_encoding
+
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.vary.add('Accept')
+    response.vary.add('Accept-Encoding')
+    response.cache_control.no_cache = True
+    return response
+
+
+def _encode(body: bytes, encoding: str) -> Tuple[bytes, str | None]:
+    """The encoded body, and the content coding actually applied to it."""
+    if encoding == 'identity' or len(body) < MIN_COMPRESS_SIZE:
+        return body, None
+    with metrics.timer('compress'):
+        if encoding == 'gzip':
+            return gzip.compress(body, compresslevel=6), 'gzip'
+        return zlib.compress(body, 6), 'deflate'
@@ -0,0 +1,102 @@
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from synthetic_trades import write_synthetic_trades
+
+ENDPOINTS = [
+    '/OrderClerkTrades.csv',
+    '/OrderClerkTrades.parquet',
+    '/PeriodPerformance.csv?period=Day',
+    '/PeriodPerformance.csv?period=Month',
+    '/CombinedPerformance.csv?period=Week',
+    '/CapitalTimeline.csv',
+]
+
+
+def get_parser():
+    parser = ArgumentParser(description="Measures latency and throughput of the progress-statement endpoints")
+    parser.add_argument('--url', help='Base URL of a running server, e.g. http://127.0.0.1:5050. '
+                                      'Without it a server is started on a synthetic trade file.')
+    parser.add_argument('--rows', type=int, default=10000, help='Rows in the synthetic trade file')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=8, help='Requests in flight at the same time')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes of the started server')
+    parser.add_argument('--threads', type=int, default=8, help='Threads per worker of the started server')
+    parser.add_argument('--gzip', action='store_true', help='Ask for gzip encoded responses')
+    return parser
+
+
+def start_server(work_dir: str, rows: int, workers: int, threads: int) -> tuple[subprocess.Popen, str]:
+    """Runs serve_production.py against a synthetic OrderClerkTrades.csv, with Norgate pricing switched off."""
+    write_synthetic_trades(os.path.join(work_dir, 'OrderClerkTrades.csv'), rows)
+
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    with open(os.path.join(work_dir, 'config.ini'), 'w') as f:
+        f.write(f"[paths]\ninput_dir={work_dir}\n\n[pricing]\nprovider=none\n\n"
+                f"[server]\nhost=127.0.0.1\nport={port}\nworkers={workers}\nthreads={threads}\n")
+
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'serve_production.py')
+    server = subprocess.Popen([sys.executable, script], cwd=work_dir)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return server, base_url
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("The server did not start listening within 30 seconds")
+
+
+def fetch(url: str, use_gzip: bool) -> tuple[float, int]:
+    request = urllib.request.Request(url, headers={'Accept-Encoding': 'gzip'} if use_gzip else {})
+    started = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        size = len(response.read())
+    return time.perf_counter() - started, size
+
+
+def run_endpoint(base_url: str, endpoint: str, requests: int, concurrency: int, use_gzip: bool):
+    fetch(base_url + endpoint, use_gzip)  # the first request builds the caches, so leave it out.
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: fetch(base_url + endpoint, use_gzip), range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = np.array([latency for latency, _ in results]) * 1000
+    print(f"{endpoint:40} {np.percentile(latencies, 50):9.2f} {np.percentile(latencies, 99):9.2f} "
+          f"{requests / elapsed:10.1f} {results[0][1]:12}")
+
+
+def main():
+    args = get_parser().parse_args(sys.argv[1:])
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        server = None
+        base_url = args.url
+        if base_url is None:
+            server, base_url = start_server(work_dir, args.rows, args.workers, args.threads)
+        try:
+            print(f"{'Endpoint':40} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>10} {'bytes':>12}")
+            for endpoint in ENDPOINTS:
+                run_endpoint(base_url.rstrip('/'), endpoint, args.requests, args.concurrency, args.gzip)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == '__main__':
+    main()
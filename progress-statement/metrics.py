@@ -0,0 +1,119 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Tuple
+
+# every counter this program keeps, and what it counts - shown as HELP in the Prometheus output.
+COUNTERS = {
+    "rows_parsed": "Trade rows parsed from OrderClerkTrades.csv",
+    "rows_skipped": "Trade rows skipped for a missing strategy or a bad number",
+    "price_lookups": "Closing prices fetched from the price provider",
+    "price_cache_hits": "Closing prices served from the provider's memo",
+    "price_history_lookups": "Price histories fetched from the price provider",
+    "trade_cache_hits": "Requests served from an already parsed trade file",
+    "trade_cache_misses": "Requests that had to read the trade file",
+    "responses": "Report responses sent, including 304s",
+    "responses_not_modified": "Report responses answered with 304 Not Modified",
+    "response_cache_hits": "Report bodies served from the rendered body memo",
+    "bytes_sent": "Report body bytes sent, after compression",
+    "file_events": "Changes to the trade file reported by the filesystem watcher",
+    "refreshes": "New versions of the trade file loaded by the background refresher",
+    "coalesced_loads": "Requests that waited for another request's read of the same trade file",
+    "coalesced_renders": "Requests that waited for another request's render of the same report",
+}
+
+# the request currently being profiled collects (stage, seconds) here - None when it did not ask.
+_profile: ContextVar[List[Tuple[str, float]] | None] = ContextVar("profile", default=None)
+
+
+class Metrics:
+    """Process-wide counters, and the count and total time of each stage of building a report.
+
+    A request can also collect the time of each stage it ran through, see start_profile.
+    """
+
+    def __init__(self, prefix: str = "progress"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {name: 0 for name in COUNTERS}
+        self._stages: Dict[str, List[float]] = {}
+
+    def increment(self, name: str, value: float = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            count_and_total = self._stages.setdefault(stage, [0, 0.0])
+            count_and_total[0] += 1
+            count_and_total[1] += seconds
+        profile = _profile.get()
+        if profile is not None:
+            profile.append((stage, seconds))
+
+    @contextmanager
+    def timer(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def counter(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def stage(self, stage: str) -> Tuple[int, float]:
+        """How often the stage ran, and the seconds it took in total."""
+        with self._lock:
+            count, total = self._stages.get(stage, (0, 0.0))
+            return count, total
+
+    def to_prometheus(self) -> str:
+        """All counters and stage timers in the Prometheus text exposition format."""
+        with self._lock:
+            counters = dict(self._counters)
+            stages = {stage: tuple(values) for stage, values in self._stages.items()}
+
+        lines = []
+        for name, value in counters.items():
+            metric = f"{self.prefix}_{name}_total"
+            lines.append(f"# HELP {metric} {COUNTERS.get(name, name)}")
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value:g}")
+
+        metric = f"{self.prefix}_stage_seconds"
+        lines.append(f"# HELP {metric} Time spent in each stage of reading, pricing and rendering reports")
+        lines.append(f"# TYPE {metric} summary")
+        for stage, (count, total) in sorted(stages.items()):
+            lines.append(f'{metric}_count{{stage="{stage}"}} {count:g}')
+            lines.append(f'{metric}_sum{{stage="{stage}"}} {total:.6f}')
+        return "\n".join(lines) + "\n"
+
+
+def start_profile():
+    """Starts collecting the stages run by the current request, returning the token for stop_profile."""
+    return _profile.set([])
+
+
+def profile_stages() -> List[Tuple[str, float]]:
+    """The stages the current request has run so far, empty when it is not being profiled."""
+    return list(_profile.get() or [])
+
+
+def stop_profile(token) -> List[Tuple[str, float]]:
+    stages = _profile.get() or []
+    _profile.reset(token)
+    return stages
+
+
+def server_timing(stages: List[Tuple[str, float]]) -> str:
+    """A Server-Timing header value - one entry per stage, in milliseconds, repeated stages added up."""
+    totals: Dict[str, float] = {}
+    for stage, seconds in stages:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return ", ".join(f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in totals.items())
+
+
+metrics = Metrics()
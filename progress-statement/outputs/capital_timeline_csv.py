@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+
+
+class CapitalTimelineCSVGenerator:
+    """Capital deployed and positions open per strategy, for each day the strategy was trading."""
+
+    def __init__(self, profit_loss_data):
+        self.profit_loss_data = profit_loss_data
+        self.frame = profit_loss_data.capital_timeline().to_frame()
+
+    @staticmethod
+    def get_header_row():
+        return ["Date", "Strategy", "CapitalDeployed", "OpenPositions"]
+
+    def get_frame(self) -> pd.DataFrame:
+        return self.frame
+
+    def get_data_rows(self):
+        dates = np.datetime_as_string(self.frame["Date"].to_numpy().astype("datetime64[D]")).tolist()
+        return [[day, strategy, str(capital), str(positions)]
+                for day, strategy, capital, positions in zip(dates, self.frame["Strategy"].tolist(),
+                                                             self.frame["CapitalDeployed"].tolist(),
+                                                             self.frame["OpenPositions"].tolist())]
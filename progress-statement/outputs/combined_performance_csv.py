@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+from data.periods import PeriodType
+
+# the Strategy value of the row holding the sum over all strategies.
+ALL_STRATEGIES = "All"
+
+
+class CombinedPerformanceCSVGenerator:
+    """Per period, the total over all strategies followed by each strategy's own figures.
+
+    Every row carries the strategy's share of the period's total NetPnL, and the running NetPnL, UsedCapital
+    and return on used capital from the first period up to and including this one.  Running totals are
+    cumulative sums down a (period x strategy) matrix, with periods in date order.
+
+    When time weighted, UsedCapital is the average capital deployed over the period instead of the capital of
+    the trades that exited in it, and the cumulative figure is the average from the strategy's first entry.
+    """
+
+    def __init__(self, profit_loss_data, period_type: PeriodType = PeriodType.MONTH, time_weighted: bool = False):
+        self.profit_loss_data = profit_loss_data
+        self.period_type = period_type
+        self.time_weighted = time_weighted
+        self.frame = profit_loss_data.memoize(("CombinedPerformance", period_type, time_weighted),
+                                              self._calculate_frame)
+
+    def _calculate_frame(self) -> pd.DataFrame:
+        cube = self.profit_loss_data.cube
+        cells = cube.cells(self.period_type)
+        periods = cube.periods(self.period_type)
+        if not periods:
+            return pd.DataFrame(columns=self.get_header_row())
+
+        net_pnl = cells["NetPnL"].unstack("Strategy", fill_value=0.0).reindex(periods)
+        used_capital = cells["UsedCapital"].unstack("Strategy", fill_value=0.0).reindex(periods)
+        strategies = net_pnl.columns
+        # the total goes in front of the strategies by position, as a strategy may well be called "All" itself.
+        net = _with_total(net_pnl.to_numpy())
+        cumulative_net = np.cumsum(net, axis=0)
+        if self.time_weighted:
+            average, cumulative = self.profit_loss_data.capital_timeline().average_capital(self.period_type,
+                                                                                           ALL_STRATEGIES)
+            used = _total_first(average, periods, strategies)
+            cumulative_used = _total_first(cumulative, periods, strategies)
+        else:
+            used = _with_total(used_capital.to_numpy())
+            cumulative_used = np.cumsum(used, axis=0)
+        totals = net[:, :1]
+
+        frame = pd.DataFrame({
+            "Date": np.repeat(periods, net.shape[1]),
+            "Strategy": np.tile(np.array([ALL_STRATEGIES, *strategies], dtype=object), len(periods)),
+            "PeriodType": self.period_type.value,
+            "NetPnL": net.ravel(),
+            "UsedCapital": used.ravel(),
+            "Return": _ratio(net, used).ravel(),
+            "ShareOfNetPnL": _ratio(net, np.broadcast_to(totals, net.shape)).ravel(),
+            "CumulativeNetPnL": cumulative_net.ravel(),
+            "CumulativeUsedCapital": cumulative_used.ravel(),
+            "CumulativeReturn": _ratio(cumulative_net, cumulative_used).ravel(),
+        })
+        # a strategy that has not traded yet has nothing to report.
+        return frame[cumulative_used.ravel() != 0].reset_index(drop=True)
+
+    @staticmethod
+    def get_header_row():
+        return ["Date", "Strategy", "PeriodType", "NetPnL", "UsedCapital", "Return", "ShareOfNetPnL",
+                "CumulativeNetPnL", "CumulativeUsedCapital", "CumulativeReturn"]
+
+    def get_frame(self) -> pd.DataFrame:
+        return self.frame
+
+    def get_data_rows(self):
+        return [[str(value) for value in row] for row in self.frame.itertuples(index=False, name=None)]
+
+
+def _with_total(values: np.ndarray) -> np.ndarray:
+    """The (periods x strategies) values with the sum over all strategies as a first column."""
+    return np.column_stack([values.sum(axis=1), values])
+
+
+def _total_first(frame: pd.DataFrame, periods, strategies) -> np.ndarray:
+    """A capital timeline frame, whose first column is the total, lined up with the periods and strategies."""
+    total = frame.iloc[:, 0].reindex(periods, fill_value=0.0).to_numpy()
+    values = frame.iloc[:, 1:].reindex(index=periods, columns=strategies, fill_value=0.0).to_numpy()
+    return np.column_stack([total, values])
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """numerator / denominator, with 0.0 wherever the denominator is zero."""
+    return np.divide(numerator, denominator, out=np.zeros(numerator.shape), where=denominator != 0)
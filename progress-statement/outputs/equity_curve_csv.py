@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+from price_extraction import get_price_provider
+
+
+class EquityCurveCSVGenerator:
+    """Realized, unrealized and total PnL per strategy for each day, with open positions marked to that day's close."""
+
+    def __init__(self, profit_loss_data, price_provider=None):
+        self.profit_loss_data = profit_loss_data
+        self.frame = profit_loss_data.equity_curve(price_provider or get_price_provider()).to_frame()
+
+    @staticmethod
+    def get_header_row():
+        return ["Date", "Strategy", "RealizedPnL", "UnrealizedPnL", "EquityPnL"]
+
+    def get_frame(self) -> pd.DataFrame:
+        return self.frame
+
+    def get_data_rows(self):
+        dates = np.datetime_as_string(self.frame["Date"].to_numpy().astype("datetime64[D]")).tolist()
+        return [[day, strategy, str(realized), str(unrealized), str(equity)]
+                for day, strategy, realized, unrealized, equity in zip(dates, self.frame["Strategy"].tolist(),
+                                                                       self.frame["RealizedPnL"].tolist(),
+                                                                       self.frame["UnrealizedPnL"].tolist(),
+                                                                       self.frame["EquityPnL"].tolist())]
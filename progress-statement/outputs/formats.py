@@ -0,0 +1,57 @@
+import csv
+import io
+from typing import Iterable, List
+
+import pandas as pd
+
+# extension -> mimetype, in the order we prefer them when the Accept header allows several.
+MIMETYPES = {
+    "csv": "text/csv",
+    "json": "application/json",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+
+# parquet bodies are compressed already, the rest are worth compressing for the wire.
+COMPRESSIBLE_FORMATS = {"csv", "json", "arrow"}
+
+
+def negotiate_format(extension: str | None, accept_mimetypes) -> str | None:
+    """Picks the output format from the URL's extension, or the Accept header when there is none.
+
+    Returns None for an extension or Accept header that none of the formats can satisfy.
+    """
+    if extension is not None:
+        return extension.lower() if extension.lower() in MIMETYPES else None
+    if not accept_mimetypes:
+        return "csv"
+    best = accept_mimetypes.best_match(list(MIMETYPES.values()))
+    return next((fmt for fmt, mimetype in MIMETYPES.items() if mimetype == best), None)
+
+
+def write_csv(header: List[str], rows: Iterable[List[str]]) -> bytes:
+    """Writes the rows with one csv.writer call, quoting any value that contains a comma or quote."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(header)
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+def write_frame(frame: pd.DataFrame, fmt: str) -> bytes:
+    """Serializes a columnar frame as JSON records, Parquet or an Arrow IPC file."""
+    if fmt == "json":
+        return frame.to_json(orient="records", date_format="iso", date_unit="s").encode()
+
+    import pyarrow as pa  # only needed for the binary formats
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(table, sink)
+    elif fmt == "arrow":
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        raise ValueError(f"Unsupported output format: {fmt}")
+    return sink.getvalue().to_pybytes()
@@ -1,57 +1,42 @@
-from datetime import datetime
-from enum import Enum
 from typing import List
-from data.performance_row import PerformanceRow
-from data.trade_details import TradeDetails
 
+import pandas as pd
 
-class PeriodType(Enum):
-    DAY = "Day"
-    WEEK = "Week"
-    MONTH = "Month"
+from data.performance_row import PerformanceRow
+from data.periods import PeriodType
 
 
 class PerformanceCSVGenerator:
-    def __init__(self, profit_loss_data, period_type: PeriodType = PeriodType.MONTH):
+    def __init__(self, profit_loss_data, period_type: PeriodType = PeriodType.MONTH, time_weighted: bool = False):
         self.profit_loss_data = profit_loss_data
         self.period_type = period_type
+        self.time_weighted = time_weighted
         self.period_stats = self._calculate_period_stats()
 
+    def _cells(self) -> pd.DataFrame:
+        """NetPnL and UsedCapital per (period, strategy).  UsedCapital is the capital of the trades that exited in
+        the period, or when time weighted, the average capital the strategy had deployed over the period."""
+        cells = self.profit_loss_data.cube.cells(self.period_type)[["NetPnL", "UsedCapital"]]
+        if self.time_weighted:
+            average, _ = self.profit_loss_data.capital_timeline().average_capital(self.period_type)
+            used_capital = average.stack().reindex(cells.index.tolist(), fill_value=0.0)
+            cells = cells.assign(UsedCapital=used_capital.to_numpy())
+        return cells
+
     def _calculate_period_stats(self):
-        grouped = {}
-        for trade in self.profit_loss_data.trades:
-            if not trade.is_realized():
-                continue
-            dt_out = datetime.fromisoformat(trade.DateOut)
-            period_key = self._get_period_key(dt_out)
-            if period_key not in grouped:
-                grouped[period_key] = {}
-            if trade.Strategy not in grouped[period_key]:
-                grouped[period_key][trade.Strategy] = {
-                    "NetPnL": 0.0,
-                    "UsedCapital": 0.0,
-                    "PeriodType": self.period_type.value
-                }
-            net_pnl = trade.calculate_net_profit_loss()
-            used_capital = trade.calculate_used_capital()
-            grouped[period_key][trade.Strategy]["UsedCapital"] += used_capital
-            grouped[period_key][trade.Strategy]["NetPnL"] += net_pnl
+        cells = self._cells()
 
         sorted_grouped = {}
-        for date_key in sorted(grouped.keys()):
-            sub_dict = grouped[date_key]
-            sorted_sub_dict = {k: sub_dict[k] for k in sorted(sub_dict.keys())}
-            sorted_grouped[date_key] = sorted_sub_dict
+        for (date_key, strategy), net_pnl, used_capital in zip(cells.index.tolist(),
+                                                                  cells["NetPnL"].tolist(),
+                                                                  cells["UsedCapital"].tolist()):
+            sorted_grouped.setdefault(date_key, {})[strategy] = {
+                "NetPnL": net_pnl,
+                "UsedCapital": used_capital,
+                "PeriodType": self.period_type.value
+            }
         return sorted_grouped
 
-    def _get_period_key(self, dt_out: datetime) -> str:
-        if self.period_type == PeriodType.DAY:
-            return dt_out.strftime("%Y-%m-%d")
-        elif self.period_type == PeriodType.WEEK:
-            year, week, _ = dt_out.isocalendar()
-            return f"{year}-W{week}"
-        return dt_out.strftime("%Y-%m")
-
     def get_performance_rows(self) -> List[PerformanceRow]:
         rows = []
         for date_key, strategies in self.period_stats.items():
@@ -80,3 +65,8 @@ class PerformanceCSVGenerator:
                 str(row.UsedCapital)
             ])
         return data
+
+    def get_frame(self) -> pd.DataFrame:
+        frame = self._cells().reset_index()
+        frame.insert(2, "PeriodType", self.period_type.value)
+        return frame.rename(columns={"Period": "Date"})
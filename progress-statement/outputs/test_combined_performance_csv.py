@@ -0,0 +1,59 @@
+import unittest
+from datetime import datetime
+
+from data.trade_details import TradeDetails, ProfitLossData
+from outputs.combined_performance_csv import CombinedPerformanceCSVGenerator
+from outputs.period_performance_csv import PeriodType
+
+
+class TestCombinedPerformanceCSVGenerator(unittest.TestCase):
+
+    def setUp(self):
+        def trade(strategy, date_out, price_out):
+            return TradeDetails(Side=1, Symbol="AAPL", Shares=10, DateIn=datetime(2023, 1, 2), PriceIn=100.0,
+                                QtyIn=10, DateOut=date_out, PriceOut=price_out, QtyOut=10, FeesIn=0.0,
+                                FeesOut=0.0, M2MPrice=0.0, Currency="USD", Strategy=strategy)
+
+        # weeks 2 and 10 - which sort the wrong way round as plain strings.
+        self.profit_loss_data = ProfitLossData(trades=[
+            trade("Apple", datetime(2023, 1, 10), 110.0),
+            trade("Google", datetime(2023, 1, 11), 90.0),
+            trade("Google", datetime(2023, 3, 8), 130.0),
+        ])
+
+    def test_weekly_totals_shares_and_running_figures(self):
+        generator = CombinedPerformanceCSVGenerator(self.profit_loss_data, PeriodType.WEEK)
+        frame = generator.frame
+
+        self.assertEqual(frame["Date"].tolist(), ["2023-W2"] * 3 + ["2023-W10"] * 3)
+        self.assertEqual(frame["Strategy"].tolist(), ["All", "Apple", "Google"] * 2)
+        self.assertEqual(frame["NetPnL"].tolist(), [0.0, 100.0, -100.0, 300.0, 0.0, 300.0])
+        self.assertEqual(frame["ShareOfNetPnL"].tolist(), [0.0, 0.0, 0.0, 1.0, 0.0, 1.0])
+        self.assertEqual(frame["CumulativeNetPnL"].tolist(), [0.0, 100.0, -100.0, 300.0, 100.0, 200.0])
+        self.assertEqual(frame["CumulativeUsedCapital"].tolist(), [2000.0, 1000.0, 1000.0, 3000.0, 1000.0, 2000.0])
+        self.assertEqual(frame["CumulativeReturn"].tolist(), [0.0, 0.1, -0.1, 0.1, 0.1, 0.1])
+
+    def test_strategy_called_all_is_kept_apart_from_the_total(self):
+        self.profit_loss_data = ProfitLossData(trades=[
+            TradeDetails(Side=1, Symbol="AAPL", Shares=10, DateIn=datetime(2023, 1, 2), PriceIn=100.0, QtyIn=10,
+                         DateOut=datetime(2023, 1, 10), PriceOut=110.0, QtyOut=10, FeesIn=0.0, FeesOut=0.0,
+                         M2MPrice=0.0, Currency="USD", Strategy=strategy)
+            for strategy in ("All", "Apple")])
+        for time_weighted in (False, True):
+            frame = CombinedPerformanceCSVGenerator(self.profit_loss_data, PeriodType.MONTH, time_weighted).frame
+            self.assertEqual(frame["Strategy"].tolist(), ["All", "All", "Apple"])
+            self.assertEqual(frame["NetPnL"].tolist(), [200.0, 100.0, 100.0])
+            self.assertEqual(frame["ShareOfNetPnL"].tolist(), [1.0, 0.5, 0.5])
+
+    def test_report_is_cached_with_the_trade_book(self):
+        first = CombinedPerformanceCSVGenerator(self.profit_loss_data, PeriodType.MONTH)
+        second = CombinedPerformanceCSVGenerator(self.profit_loss_data, PeriodType.MONTH)
+        self.assertIs(first.frame, second.frame)
+
+    def test_no_realized_trades(self):
+        generator = CombinedPerformanceCSVGenerator(ProfitLossData(), PeriodType.MONTH)
+        self.assertEqual(generator.get_data_rows(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
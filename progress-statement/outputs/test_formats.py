@@ -0,0 +1,64 @@
+import io
+import unittest
+from datetime import datetime
+
+import pandas as pd
+from werkzeug.datastructures import MIMEAccept
+
+from outputs.formats import negotiate_format, write_csv, write_frame
+
+
+class TestNegotiateFormat(unittest.TestCase):
+
+    def test_extension_wins(self):
+        self.assertEqual(negotiate_format("Parquet", MIMEAccept([("application/json", 1)])), "parquet")
+
+    def test_unknown_extension(self):
+        self.assertIsNone(negotiate_format("xlsx", MIMEAccept()))
+
+    def test_accept_header(self):
+        accept = MIMEAccept([("application/vnd.apache.arrow.file", 1), ("text/csv", 0.5)])
+        self.assertEqual(negotiate_format(None, accept), "arrow")
+
+    def test_defaults_to_csv(self):
+        self.assertEqual(negotiate_format(None, MIMEAccept()), "csv")
+        self.assertEqual(negotiate_format(None, MIMEAccept([("*/*", 1)])), "csv")
+
+    def test_unacceptable(self):
+        self.assertIsNone(negotiate_format(None, MIMEAccept([("image/png", 1)])))
+
+
+class TestWriters(unittest.TestCase):
+
+    def setUp(self):
+        self.frame = pd.DataFrame({
+            "Strategy": ["Long", "Short"],
+            "NetPnL": [480.0, -10.5],
+            "DateOut": [datetime(2023, 1, 10), pd.NaT],
+        })
+
+    def test_write_csv_quotes(self):
+        self.assertEqual(write_csv(["a", "b"], [["1", "x,y"]]), b'a,b\n1,"x,y"\n')
+
+    def test_json(self):
+        round_trip = pd.read_json(io.BytesIO(write_frame(self.frame, "json")), orient="records")
+        self.assertEqual(list(round_trip["NetPnL"]), [480.0, -10.5])
+
+    def test_parquet_and_arrow_keep_types(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        for table in (pq.read_table(io.BytesIO(write_frame(self.frame, "parquet"))),
+                      pa.ipc.open_file(io.BytesIO(write_frame(self.frame, "arrow"))).read_all()):
+            round_trip = table.to_pandas()
+            self.assertEqual(list(round_trip["Strategy"]), ["Long", "Short"])
+            self.assertEqual(round_trip["NetPnL"].dtype, "float64")
+            self.assertTrue(pd.isna(round_trip["DateOut"][1]))
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            write_frame(self.frame, "xlsx")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 from datetime import datetime
-from data.trade_details import TradeDetails
+from data.trade_details import TradeDetails, ProfitLossData
 from outputs.period_performance_csv import PerformanceCSVGenerator, PeriodType
 
 
@@ -9,29 +9,29 @@ class TestPerformanceCSVGenerator(unittest.TestCase):
     def setUp(self):
         # month 1 - first symbol, across multiple weeks
 
-        self.realized_trade1 = TradeDetails(Side=1, Symbol="AAPL", Shares=100, DateIn="2023-01-01", PriceIn=150.0,
-                                            QtyIn=100, DateOut="2023-01-10", PriceOut=155.0, QtyOut=100, FeesIn=10.0,
+        self.realized_trade1 = TradeDetails(Side=1, Symbol="AAPL", Shares=100, DateIn=datetime(2023, 1, 1), PriceIn=150.0,
+                                            QtyIn=100, DateOut=datetime(2023, 1, 10), PriceOut=155.0, QtyOut=100, FeesIn=10.0,
                                             FeesOut=10.0, M2MPrice=0.0, Currency="USD", Strategy="Apple")
-        self.realized_trade2 = TradeDetails(Side=1, Symbol="AAPL", Shares=25, DateIn="2023-01-01", PriceIn=150.0,
-                                            QtyIn=25, DateOut="2023-02-10", PriceOut=160.0, QtyOut=25, FeesIn=10.0,
+        self.realized_trade2 = TradeDetails(Side=1, Symbol="AAPL", Shares=25, DateIn=datetime(2023, 1, 1), PriceIn=150.0,
+                                            QtyIn=25, DateOut=datetime(2023, 2, 10), PriceOut=160.0, QtyOut=25, FeesIn=10.0,
                                             FeesOut=1.5, M2MPrice=0.0, Currency="USD", Strategy="Apple")
-        self.realized_trade2 = TradeDetails(Side=1, Symbol="AAPL", Shares=25, DateIn="2023-01-01", PriceIn=150.0,
-                                            QtyIn=25, DateOut="2023-02-22", PriceOut=160.0, QtyOut=25, FeesIn=10.0,
+        self.realized_trade2 = TradeDetails(Side=1, Symbol="AAPL", Shares=25, DateIn=datetime(2023, 1, 1), PriceIn=150.0,
+                                            QtyIn=25, DateOut=datetime(2023, 2, 22), PriceOut=160.0, QtyOut=25, FeesIn=10.0,
                                             FeesOut=1.5, M2MPrice=0.0, Currency="USD", Strategy="Apple")
 
         # month 1, second symbol
 
-        self.realized_trade3 = TradeDetails(Side=1, Symbol="GOOGL", Shares=100, DateIn="2023-01-01", PriceIn=2000.0,
-                                            QtyIn=100, DateOut="2023-01-15", PriceOut=2100.0, QtyOut=100, FeesIn=5.0,
+        self.realized_trade3 = TradeDetails(Side=1, Symbol="GOOGL", Shares=100, DateIn=datetime(2023, 1, 1), PriceIn=2000.0,
+                                            QtyIn=100, DateOut=datetime(2023, 1, 15), PriceOut=2100.0, QtyOut=100, FeesIn=5.0,
                                             FeesOut=5.0, M2MPrice=0.0, Currency="USD", Strategy="Google")
 
-        self.unrealized_trade = TradeDetails(Side=1, Symbol="MSFT", Shares=75, DateIn="2023-01-01", PriceIn=999.0,
-                                             QtyIn=75, DateOut="0001-01-01 00:00:00", PriceOut=0.0, QtyOut=0,
+        self.unrealized_trade = TradeDetails(Side=1, Symbol="MSFT", Shares=75, DateIn=datetime(2023, 1, 1), PriceIn=999.0,
+                                             QtyIn=75, DateOut=None, PriceOut=0.0, QtyOut=0,
                                              FeesIn=7.5, FeesOut=0.0, M2MPrice=0.0, Currency="USD", Strategy="Long")
 
-        self.profit_loss_data = type('ProfitLossData', (object,), {
-            'trades': [self.realized_trade1, self.realized_trade2, self.realized_trade3, self.unrealized_trade]
-        })()
+        self.profit_loss_data = ProfitLossData(
+            trades=[self.realized_trade1, self.realized_trade2, self.realized_trade3, self.unrealized_trade]
+        )
 
         self.expected_stats_monthly = {
             "2023-01": {
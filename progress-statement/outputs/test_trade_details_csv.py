@@ -1,5 +1,6 @@
 
 import unittest
+from datetime import datetime
 from data.trade_details import TradeDetails
 from outputs.trade_details_csv import TradeDetailsCSVGenerator
 
@@ -11,10 +12,10 @@ class TestTradeDetails(unittest.TestCase):
             Side=1,
             Symbol="AAPL",
             Shares=100,
-            DateIn="2023-01-01",
+            DateIn=datetime(2023, 1, 1),
             PriceIn=150.0,
             QtyIn=100,
-            DateOut="2023-01-10",
+            DateOut=datetime(2023, 1, 10),
             PriceOut=155.0,
             QtyOut=100,
             FeesIn=10.0,
@@ -28,10 +29,10 @@ class TestTradeDetails(unittest.TestCase):
             Side=1,
             Symbol="GOOGL",
             Shares=50,
-            DateIn="2023-01-01",
+            DateIn=datetime(2023, 1, 1),
             PriceIn=2000.0,
             QtyIn=50,
-            DateOut="0001-01-01 00:00:00",
+            DateOut=None,
             PriceOut=0.0,
             QtyOut=0,
             FeesIn=5.0,
@@ -45,10 +46,10 @@ class TestTradeDetails(unittest.TestCase):
             Side=-1,
             Symbol="TSLA",
             Shares=20,
-            DateIn="2023-01-01",
+            DateIn=datetime(2023, 1, 1),
             PriceIn=700.0,
             QtyIn=20,
-            DateOut="2023-01-10",
+            DateOut=datetime(2023, 1, 10),
             PriceOut=650.0,
             QtyOut=20,
             FeesIn=5.0,
@@ -87,19 +88,19 @@ class TestTradeDetails(unittest.TestCase):
             "Side", "Symbol", "Shares", "DateIn", "QtyIn", "PriceIn", "FeesIn",
             "Currency", "DateOut", "QtyOut", "PriceOut", "FeesOut", "M2MPrice",
             "UsedCapital", "TotalFees", "GrossProfitLoss", "NetProfitLoss",
-            "Strategy", "IsRealized"
+            "Strategy", "IsRealized", "Account"
         ]
 
         expected_realized_data_row = [
-            "1", "AAPL", "100", "2023-01-01", "100", "150.0", "10.0", "USD",
-            "2023-01-10", "100", "155.0", "10.0", "0.0", "15000.0", "20.0",
-            "500.0", "480.0", "Long", "True"
+            "1", "AAPL", "100", "2023-01-01 00:00:00", "100", "150.0", "10.0", "USD",
+            "2023-01-10 00:00:00", "100", "155.0", "10.0", "0.0", "15000.0", "20.0",
+            "500.0", "480.0", "Long", "True", ""
         ]
 
         expected_unrealized_data_row = [
-            "1", "GOOGL", "50", "2023-01-01", "50", "2000.0", "5.0", "USD",
+            "1", "GOOGL", "50", "2023-01-01 00:00:00", "50", "2000.0", "5.0", "USD",
             "", "0", "0.0", "0.0", "0.0", "100000.0", "5.0",
-            "0.0", "0.0", "Long", "False"
+            "0.0", "0.0", "Long", "False", ""
         ]
 
         self.assertEqual(header, expected_header)
@@ -1,5 +1,11 @@
+import pandas as pd
+
+from data.trade_book import TradeBook
 from data.trade_details import TradeDetails
 
+# the same layout OrderClerk writes its own timestamps in.
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
 
 class TradeDetailsCSVGenerator:
     @staticmethod
@@ -28,19 +34,20 @@ class TradeDetailsCSVGenerator:
             "GrossProfitLoss",
             "NetProfitLoss",
             "Strategy",
-            "IsRealized"
+            "IsRealized",
+            "Account"
         ]
 
     @staticmethod
     def get_data_row(trade):
-        date_out = "" if trade.DateOut == "0001-01-01 00:00:00" else trade.DateOut
+        date_out = "" if trade.is_open() else f"{trade.DateOut:{DATE_FORMAT}}"
 
         row = [
             str(trade.Side),
             trade.Symbol,
             str(trade.Shares),
 
-            trade.DateIn,
+            f"{trade.DateIn:{DATE_FORMAT}}",
             f"{trade.QtyIn}",
             f"{trade.PriceIn}",
             f"{trade.FeesIn}",
@@ -60,6 +67,55 @@ class TradeDetailsCSVGenerator:
             f"{trade.calculate_net_profit_loss()}",
 
             trade.Strategy,
-            str(trade.is_realized())
+            str(trade.is_realized()),
+            trade.Account
         ]
         return row
+
+    @staticmethod
+    def get_frame(book: TradeBook) -> pd.DataFrame:
+        """The same columns as the CSV, taken straight from the book's arrays - open trades have a null DateOut."""
+        return pd.DataFrame({
+            "Side": book["Side"],
+            "Symbol": book["Symbol"],
+            "Shares": book["Shares"],
+
+            "DateIn": book["DateIn"],
+            "QtyIn": book["QtyIn"],
+            "PriceIn": book["PriceIn"],
+            "FeesIn": book["FeesIn"],
+
+            "Currency": book["Currency"],
+
+            "DateOut": book["DateOut"],
+            "QtyOut": book["QtyOut"],
+            "PriceOut": book["PriceOut"],
+            "FeesOut": book["FeesOut"],
+
+            "M2MPrice": book["M2MPrice"],
+            "UsedCapital": book.used_capital,
+
+            "TotalFees": book.total_fees,
+            "GrossProfitLoss": book.gross_profit_loss,
+            "NetProfitLoss": book.net_profit_loss,
+            "Strategy": book["Strategy"],
+            "IsRealized": book.realized_mask,
+            "Account": book["Account"]
+        })
+
+
+class TradeBookDataset:
+    """The trade list of a ProfitLossData, with the same interface as the performance generators."""
+
+    def __init__(self, profit_loss_data):
+        self.profit_loss_data = profit_loss_data
+
+    @staticmethod
+    def get_header_row():
+        return TradeDetailsCSVGenerator.get_header_row()
+
+    def get_data_rows(self):
+        return (TradeDetailsCSVGenerator.get_data_row(trade) for trade in self.profit_loss_data.trades)
+
+    def get_frame(self) -> pd.DataFrame:
+        return TradeDetailsCSVGenerator.get_frame(self.profit_loss_data.book)
@@ -1,16 +1,37 @@
-from datetime import datetime
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Tuple
+
 import pandas as pd
 import norgatedata
 
+from metrics import metrics
+
+# (symbol, currency, date) - a close is only ever fetched once per key.
+PriceKey = Tuple[str, str, date]
+# (symbol, currency) -> the first and last day of closes wanted for it.
+PriceWindows = Dict[Tuple[str, str], Tuple[date, date]]
+
+# the history of a symbol Norgate has no closes for.
+NO_HISTORY = pd.Series([], index=pd.DatetimeIndex([]), dtype=float)
+
+
+def prior_business_day(today: date | None = None) -> date:
+    """The most recent business day before today - the latest close Norgate will have for us."""
+    today = today or date.today()
+    return (pd.Timestamp(today) - pd.offsets.BDay(1)).date()
+
 
-def get_closing_price_from_norgate(symbol: str, currency: str) -> float:
+def get_closing_price_from_norgate(symbol: str, currency: str, on_date: date | None = None) -> float:
     """Fetches the closing price from Norgate for a given symbol and currency."""
-    prior_business_day: datetime = datetime.today() - pd.offsets.BDay(1)
+    price_date: datetime = datetime.combine(on_date or prior_business_day(), datetime.min.time())
     try:
         price_recarray = norgatedata.price_timeseries(
             (symbol + ".au") if currency == "AUD" else symbol,
-            start_date=prior_business_day,
-            end_date=prior_business_day
+            start_date=price_date,
+            end_date=price_date
         )
         price_dataframe = pd.DataFrame(price_recarray)
         return price_dataframe.iloc[0]['Close']
@@ -18,3 +39,169 @@ def get_closing_price_from_norgate(symbol: str, currency: str) -> float:
         print(f"Error fetching price from Norgate for {symbol}: {e}")
         return 0.0  # Return a default value in case of an error
 
+
+def get_price_history_from_norgate(symbol: str, currency: str, start: date, end: date) -> pd.Series:
+    """Fetches the daily closes from Norgate between two dates, indexed by date."""
+    try:
+        price_recarray = norgatedata.price_timeseries(
+            (symbol + ".au") if currency == "AUD" else symbol,
+            start_date=datetime.combine(start, datetime.min.time()),
+            end_date=datetime.combine(end, datetime.min.time())
+        )
+        price_dataframe = pd.DataFrame(price_recarray)
+        return pd.Series(price_dataframe['Close'].to_numpy(dtype=float),
+                         index=pd.DatetimeIndex(price_dataframe['Date']).normalize())
+    except Exception as e:
+        print(f"Error fetching price history from Norgate for {symbol}: {e}")
+        return NO_HISTORY
+
+
+class PriceProvider(ABC):
+    """Looks up closing prices for a batch of open positions at once.
+
+    Requests are de-duplicated by (symbol, currency, date) and memoized for the trading day,
+    subclasses only have to implement _fetch_closes for the keys that are not known yet, and _fetch_histories.
+
+    Daily price histories are memoized per (symbol, currency) along with the window they cover, and only
+    fetched again - once, for the whole wider window - when a request reaches outside it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._closes: Dict[PriceKey, float] = {}
+        self._histories: Dict[Tuple[str, str], Tuple[date, date, pd.Series]] = {}
+        self.lookups = 0
+        self.history_lookups = 0
+
+    def get_closing_prices(self, positions: Iterable[Tuple[str, str]],
+                           on_date: date | None = None) -> Dict[Tuple[str, str], float]:
+        on_date = on_date or prior_business_day()
+        wanted = {(symbol, currency, on_date) for symbol, currency in positions}
+
+        with self._lock:
+            # closes from earlier trading days are never asked for again.
+            for key in [key for key in self._closes if key[2] != on_date]:
+                del self._closes[key]
+            missing = [key for key in wanted if key not in self._closes]
+        metrics.increment('price_cache_hits', len(wanted) - len(missing))
+
+        if missing:
+            with metrics.timer('pricing'):
+                fetched = self._fetch_closes(missing)
+            metrics.increment('price_lookups', len(missing))
+            with self._lock:
+                self.lookups += len(missing)
+                # a zero close means the lookup failed, so let the next request try again.
+                self._closes.update({key: close for key, close in fetched.items() if close})
+
+        with self._lock:
+            return {(symbol, currency): self._closes.get((symbol, currency, price_date), 0.0)
+                    for symbol, currency, price_date in wanted}
+
+    def get_price_history(self, windows: PriceWindows) -> Dict[Tuple[str, str], pd.Series]:
+        """Daily closes of each (symbol, currency) over its window, as a Series indexed by date."""
+        with self._lock:
+            missing = {}
+            for key, (start, end) in windows.items():
+                known = self._histories.get(key)
+                if known is None:
+                    missing[key] = (start, end)
+                elif known[0] > start or known[1] < end:
+                    missing[key] = (min(start, known[0]), max(end, known[1]))
+
+        if missing:
+            with metrics.timer('price_history'):
+                fetched = self._fetch_histories(missing)
+            metrics.increment('price_history_lookups', len(missing))
+            with self._lock:
+                self.history_lookups += len(missing)
+                # as with closes, an empty history is a failed lookup that the next request should retry.
+                self._histories.update({key: missing[key] + (history,)
+                                        for key, history in fetched.items() if len(history)})
+
+        with self._lock:
+            histories = {}
+            for key, (start, end) in windows.items():
+                history = self._histories.get(key, (start, end, NO_HISTORY))[2]
+                histories[key] = history[pd.Timestamp(start):pd.Timestamp(end)]
+            return histories
+
+    @abstractmethod
+    def _fetch_closes(self, keys: List[PriceKey]) -> Dict[PriceKey, float]:
+        """The close of every key - 0.0 for one that could not be looked up."""
+
+    @abstractmethod
+    def _fetch_histories(self, windows: PriceWindows) -> Dict[Tuple[str, str], pd.Series]:
+        """The daily closes of every (symbol, currency) over its window - empty for one that could not be looked up."""
+
+
+class NorgatePriceProvider(PriceProvider):
+    """Fetches closes from Norgate through a bounded thread pool."""
+
+    def __init__(self, max_workers: int = 8):
+        super().__init__()
+        self.max_workers = max_workers
+
+    def _fetch_closes(self, keys: List[PriceKey]) -> Dict[PriceKey, float]:
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(keys))) as pool:
+            closes = pool.map(lambda key: get_closing_price_from_norgate(*key), keys)
+            return dict(zip(keys, closes))
+
+    def _fetch_histories(self, windows: PriceWindows) -> Dict[Tuple[str, str], pd.Series]:
+        keys = list(windows)
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(keys))) as pool:
+            histories = pool.map(lambda key: get_price_history_from_norgate(*key, *windows[key]), keys)
+            return dict(zip(keys, histories))
+
+
+class StaticPriceProvider(PriceProvider):
+    """Serves closes from a fixed symbol -> price mapping, for tests and benchmarks without Norgate.
+
+    A symbol's history is its series in `histories` if it has one, otherwise its fixed close on every
+    business day of the window.
+    """
+
+    def __init__(self, closes: Dict[str, float] | None = None, histories: Dict[str, pd.Series] | None = None):
+        super().__init__()
+        self.closes = closes or {}
+        self.histories = histories or {}
+
+    def _fetch_closes(self, keys: List[PriceKey]) -> Dict[PriceKey, float]:
+        return {key: self.closes.get(key[0], 0.0) for key in keys}
+
+    def _fetch_histories(self, windows: PriceWindows) -> Dict[Tuple[str, str], pd.Series]:
+        histories = {}
+        for (symbol, currency), (start, end) in windows.items():
+            if symbol in self.histories:
+                histories[(symbol, currency)] = self.histories[symbol][pd.Timestamp(start):pd.Timestamp(end)]
+            elif symbol in self.closes:
+                histories[(symbol, currency)] = pd.Series(self.closes[symbol], index=pd.bdate_range(start, end))
+            else:
+                histories[(symbol, currency)] = NO_HISTORY
+        return histories
+
+
+def price_provider_from_config(config) -> PriceProvider:
+    """[pricing] provider=norgate (the default) or provider=none, which leaves open positions unpriced."""
+    provider = config.get('pricing', 'provider', fallback='norgate')
+    if provider == 'none':
+        return StaticPriceProvider()
+    if provider != 'norgate':
+        raise ValueError(f"Unknown price provider '{provider}' in the 'pricing' section of the configuration.")
+    return NorgatePriceProvider(config.getint('pricing', 'max_workers', fallback=8))
+
+
+_price_provider: PriceProvider | None = None
+
+
+def get_price_provider() -> PriceProvider:
+    global _price_provider
+    if _price_provider is None:
+        _price_provider = NorgatePriceProvider()
+    return _price_provider
+
+
+def set_price_provider(provider: PriceProvider | None):
+    """Replaces the process-wide provider, e.g. with a StaticPriceProvider when Norgate is unavailable."""
+    global _price_provider
+    _price_provider = provider
@@ -0,0 +1,106 @@
+import threading
+
+from config import get_config
+from currency_conversion import fx_rates_from_config
+from metrics import metrics
+from outputs.combined_performance_csv import CombinedPerformanceCSVGenerator
+from outputs.period_performance_csv import PeriodType
+from price_extraction import price_provider_from_config, set_price_provider
+from refresher import refresher_from_config
+from snapshot import snapshot_from_config
+from trade_cache import CachedTradeBook, TradeBookCache
+from trade_extraction import IncrementalTradeLoader
+from trade_sources import TradeSources, parse_executor, sources_from_config
+
+
+class ProgressService:
+    """Everything the reports are served from - the trade files of every account, their cache, the snapshot,
+    the exchange rates and the background refresh.
+
+    Nothing is set up when the modules are imported: the parse pool's spawned workers import the main module
+    again, and a gunicorn master imports the app before it forks, and neither may load, price or watch anything.
+    Each serving process gets its own service from get_service().
+    """
+
+    def __init__(self, config):
+        set_price_provider(price_provider_from_config(config))
+
+        # the OrderClerk file of every account, parsed side by side and merged into one trade book.
+        self.sources = sources_from_config(config)
+
+        # parsed trade files are shared by every request until the file on disk changes, and then only
+        # the rows OrderClerk appended since are parsed.
+        self.trade_loader = IncrementalTradeLoader(
+            accounts={source.path: source.account for source in self.sources},
+            executor=parse_executor(self.sources))
+        self.trade_book_cache = TradeBookCache(self.trade_loader)
+        self.trade_sources = TradeSources(self.trade_book_cache, self.sources)
+
+        # a restart carries on from the books, prices and rollups saved by the previous run, when there are any.
+        self.snapshot = snapshot_from_config(config)
+        if self.snapshot is not None:
+            for source in self.sources:
+                restored = self.snapshot.for_account(source.account).load(source.path)
+                if restored is not None:
+                    self.trade_loader.reader(source.path).restore(*restored)
+
+        # exchange rates to report in another currency than the trades' own, see report_currency.
+        self.fx_rate_file = fx_rates_from_config(config)
+        self.default_report_currency = config.get('fx', 'report_currency', fallback=None)
+
+        # path -> the version of the trade file last saved to the snapshot.
+        self.saved_versions = {}
+
+        # watches the trade files and swaps in a parsed, priced and rolled up snapshot whenever it changes.
+        self.refresher = refresher_from_config(config, self.trade_sources, self.warm_reports)
+
+    def start(self):
+        if self.refresher is not None:
+            self.refresher.start()
+
+    def read_trade_book(self) -> CachedTradeBook | None:
+        if self.refresher is not None and self.refresher.sources is self.trade_sources:
+            entry = self.refresher.snapshot()
+            if entry is not None:
+                return entry
+        # nothing loaded yet - read it on the request.
+        return self.trade_sources.get_entry()
+
+    def warm_reports(self, entry: CachedTradeBook):
+        """Builds the rollups every report is cut from, so the first request after a change finds them ready,
+        and saves each account's trade file to the snapshot."""
+        data = entry.profit_loss_data
+        data.warm()
+        for period_type in PeriodType:
+            # the generator memoizes its frame on the book.
+            _ = CombinedPerformanceCSVGenerator(data, period_type).frame
+
+        if self.snapshot is None:
+            return
+        for source in self.sources:
+            source_entry = self.trade_book_cache.peek(source.path)
+            state = self.trade_loader.reader(source.path).state()
+            # only when the reader has not moved on since the entry was loaded, and the file changed since it
+            # was saved.
+            if source_entry is None or state is None or state.book is not source_entry.profit_loss_data.book:
+                continue
+            if self.saved_versions.get(source.path) == source_entry.version:
+                continue
+            with metrics.timer('snapshot'):
+                # rollups were only built for the book served, which is the file's own with a single account.
+                self.snapshot.for_account(source.account).save(state, data.cube if source_entry is entry else None)
+            self.saved_versions[source.path] = source_entry.version
+
+
+_service: ProgressService | None = None
+_service_lock = threading.Lock()
+
+
+def get_service() -> ProgressService:
+    """The service of this process, set up from config.ini and started on first use."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ProgressService(get_config())
+            _service.start()
+        return _service
@@ -0,0 +1,133 @@
+import os
+import threading
+from typing import Callable
+
+from metrics import metrics
+from trade_cache import CachedTradeBook
+from trade_sources import TradeSources
+
+
+class Refresher:
+    """Keeps the trade book of the trade files up to date in the background, so requests never wait for a parse.
+
+    A filesystem watcher (watchdog - inotify, or its equivalent on Windows - when it is installed) wakes the
+    refresher as soon as a file is written, and the files are polled every `poll_interval` seconds regardless,
+    which also picks up the daily re-pricing.  A burst of writes is debounced: nothing is read until the file
+    have been quiet for `debounce` seconds.  The new entry is built, and warmed by `warm`, off the request path
+    and only then published as the snapshot, so a request always gets a complete one.
+
+    The refresher is a thread of the process that serves the requests - with several gunicorn workers, each
+    worker starts its own (see serve_production.py), as a thread started before the fork does not survive it.
+    """
+
+    def __init__(self, sources: TradeSources, warm: Callable[[CachedTradeBook], None] | None = None,
+                 debounce: float = 1.0, poll_interval: float = 5.0, use_watcher: bool = True):
+        self.sources = sources
+        self.paths = [os.path.abspath(path) for path in sources.paths]
+        self.warm = warm
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_watcher = use_watcher
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._observer = None
+        self._lock = threading.Lock()
+        self._entry: CachedTradeBook | None = None
+        self.refreshes = 0
+
+    def start(self):
+        if self.use_watcher:
+            self._observer = self._start_watcher()
+        self._thread = threading.Thread(target=self._run, name="trade-file-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+        if self._thread is not None:
+            self._thread.join()
+
+    def notify(self):
+        """Called for every change to a file - the refresh follows once the writes have settled."""
+        metrics.increment('file_events')
+        self._wake.set()
+
+    def snapshot(self) -> CachedTradeBook | None:
+        """The latest warmed entry, without checking whether the file has changed since."""
+        with self._lock:
+            return self._entry
+
+    def refresh(self) -> CachedTradeBook | None:
+        """Brings the trade book up to date now, warming it when it changed before publishing it."""
+        with self._lock:
+            before = self._entry
+        entry = self.sources.get_entry()
+        if entry is not None and entry is not before:
+            if self.warm is not None:
+                with metrics.timer('warm'):
+                    self.warm(entry)
+            with self._lock:
+                self._entry = entry
+            self.refreshes += 1
+            metrics.increment('refreshes')
+        return entry
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Refreshing {', '.join(self.paths)} failed: {e}")
+
+            if self._wake.wait(self.poll_interval) and not self._stop.is_set():
+                # keep waiting until a whole debounce period passes without another write.
+                self._wake.clear()
+                while self._wake.wait(self.debounce) and not self._stop.is_set():
+                    self._wake.clear()
+            self._wake.clear()
+
+    def _start_watcher(self):
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            print(f"watchdog is not installed, polling {', '.join(self.paths)} every {self.poll_interval} seconds")
+            return None
+
+        refresher = self
+
+        class TradeFileHandler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                paths = (event.src_path, getattr(event, 'dest_path', None))
+                if any(path and os.path.abspath(path) in refresher.paths for path in paths):
+                    refresher.notify()
+
+        observer = Observer()
+        observer.daemon = True
+        try:
+            handler = TradeFileHandler()
+            for directory in sorted({os.path.dirname(path) for path in self.paths}):
+                observer.schedule(handler, directory, recursive=False)
+            observer.start()
+        except OSError as e:
+            print(f"Unable to watch {', '.join(self.paths)} ({e}), polling every {self.poll_interval} seconds")
+            return None
+        return observer
+
+
+def refresher_from_config(config, sources: TradeSources,
+                          warm: Callable[[CachedTradeBook], None] | None = None) -> Refresher | None:
+    """[refresh] enabled (default true), debounce_seconds, poll_seconds and watcher=auto|poll."""
+    if not config.getboolean('refresh', 'enabled', fallback=True):
+        return None
+    watcher = config.get('refresh', 'watcher', fallback='auto')
+    if watcher not in ('auto', 'poll'):
+        raise ValueError(f"Unknown watcher '{watcher}' in the 'refresh' section of the configuration.")
+    return Refresher(sources, warm,
+                     debounce=config.getfloat('refresh', 'debounce_seconds', fallback=1.0),
+                     poll_interval=config.getfloat('refresh', 'poll_seconds', fallback=5.0),
+                     use_watcher=watcher == 'auto')
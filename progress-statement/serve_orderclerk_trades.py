@@ -1,92 +1,124 @@
-import csv
 import os
+import time
+from typing import Tuple
 
-from flask import Flask, Response, request
+from flask import Flask, Response, g, request
 
-from config import get_config
-from outputs.trade_details_csv import TradeDetailsCSVGenerator
+from outputs.formats import COMPRESSIBLE_FORMATS, MIMETYPES, negotiate_format, write_csv, write_frame
+from outputs.trade_details_csv import TradeBookDataset
+from outputs.capital_timeline_csv import CapitalTimelineCSVGenerator
+from outputs.equity_curve_csv import EquityCurveCSVGenerator
+from outputs.combined_performance_csv import CombinedPerformanceCSVGenerator
 from outputs.period_performance_csv import PerformanceCSVGenerator, PeriodType
-from price_extraction import get_closing_price_from_norgate
-from data.trade_details import TradeDetails, ProfitLossData
+from http_caching import conditional_response
+from metrics import metrics, profile_stages, server_timing, start_profile, stop_profile
+from progress_service import get_service
+from trade_cache import CachedTradeBook
+from data.trade_details import ProfitLossData
+from data.trade_index import TradeQuery
 
 app = Flask(__name__)
 
 
+def read_trade_book() -> CachedTradeBook | None:
+    return get_service().read_trade_book()
+
+
 def read_trade_csv_list() -> ProfitLossData | None:
-    config = get_config()
-    input_dir = config.get('paths', 'input_dir', fallback='.')
-    filename = os.path.join(input_dir, 'OrderClerkTrades.csv')
-    print(f"Reading CSV from: {filename}")
+    entry = read_trade_book()
+    return entry.profit_loss_data if entry is not None else None
+
+
+def dataset_response(entry: CachedTradeBook, extension: str | None, generator_factory, convertible: bool = True):
+    """Serves one dataset as CSV, JSON, Parquet or Arrow, chosen by the URL's extension or the Accept header.
+
+    The generator is built over the trades matching the request's filters, with their prices and fees in the
+    report_currency when there is one (from the request, or the [fx] section) and the dataset is convertible.
+    The filters are applied first, so currency= matches the trades' own currencies rather than the one reported in.
+    CSV is written from its string rows, every other format from its columnar frame.
+    """
+    fmt = negotiate_format(extension, request.accept_mimetypes)
+    if fmt is None:
+        return f"Unsupported format, use one of: {', '.join(MIMETYPES)}", 406
+    try:
+        query = TradeQuery.from_args(request.args)
+    except ValueError as e:
+        return str(e), 400
+
+    data = entry.profit_loss_data.subset(query)
+    rates_version = ""
+    rates_modified = None
+    currency = request.args.get('report_currency')
+    if currency and not convertible:
+        return f"{request.path} can only be reported in the trades' own currencies", 400
+    service = get_service()
+    currency = currency or (service.default_report_currency if convertible else None)
+    if currency:
+        if service.fx_rate_file is None:
+            return "No exchange rates configured, see rates_file in the 'fx' section of the configuration", 400
+        try:
+            rates = service.fx_rate_file.get()
+        except (OSError, ValueError) as e:
+            print(f"Unable to read exchange rates: {e}")
+            return "Unable to read exchange rates", 503
+        try:
+            with metrics.timer('convert'):
+                data = data.in_currency(rates, currency.upper())
+        except ValueError as e:
+            return str(e), 400
+        rates_version = rates.version
+        rates_modified = rates.last_modified
+
+    def render():
+        with metrics.timer('aggregate'):
+            generator = generator_factory(data)
+        with metrics.timer('serialize'):
+            if fmt == 'csv':
+                return write_csv(generator.get_header_row(), generator.get_data_rows())
+            return write_frame(generator.get_frame(), fmt)
+
+    return conditional_response(entry, render, MIMETYPES[fmt], compressible=fmt in COMPRESSIBLE_FORMATS,
+                                version=rates_version, last_modified=rates_modified)
+
+
+# capital=exit books a trade's capital in the period it exited, capital=time_weighted uses the average capital
+# deployed over the period - see /CapitalTimeline.
+CAPITAL_BASES = ('exit', 'time_weighted')
+
+
+def period_options() -> Tuple[PeriodType, bool]:
+    """The period= and capital= of a per period report - the period type, and whether capital is time weighted.
+
+    Raises ValueError for an unknown period or capital basis.
+    """
+    period_type_str = request.args.get('period', 'Month')
+    try:
+        period_type = PeriodType[period_type_str.upper()]
+    except KeyError:
+        raise ValueError(f"Invalid period type: {period_type_str}")
+
+    capital_str = request.args.get('capital', 'exit')
+    if capital_str.lower() not in CAPITAL_BASES:
+        raise ValueError(f"Invalid capital basis: {capital_str}, use one of: {', '.join(CAPITAL_BASES)}")
+    return period_type, capital_str.lower() == 'time_weighted'
 
-    grouped_data = ProfitLossData()
+
+# Per period, the total over all strategies plus each strategy's share of it, along with running
+# totals of the PnL and of the return on used capital - an all-strategy equity curve for Excel.
+@app.route('/CombinedPerformance')
+@app.route('/CombinedPerformance.<extension>')
+def serve_combined_performance_data(extension=None):
+    entry = read_trade_book()
+    if entry is None:
+        return "No data available", 404
 
     try:
-        with open(filename, 'r', newline='') as csvfile:
-            reader = csv.DictReader(csvfile)
-            if reader.fieldnames is None:
-                print("CSV file is empty or has no header.")
-                return None
-
-            for row in reader:
-                try:
-                    symbol: str = row['Symbol']
-                    strategy: str = row['Strategy'].strip()
-                    if not strategy:
-                        trade_id = row['TradeID']
-                        date_in = row['DateIn']
-                        print(f"Skipping trade {trade_id} for symbol {symbol} on {date_in} due to missing strategy.")
-                        continue
-
-                    side: int = int(row['Side'])
-                    shares: float = float(row['Shares'])
-                    date_in_str: str = row['DateIn']
-                    qty_in: float = float(row['QtyIn'])  # zero if not filled.
-                    price_in: float = float(row['PriceIn'])
-                    fees_in: float = float(row['FeesIn'])
-                    currency: str = row['Currency']
-                    date_out_str: str = row['DateOut']
-                    qty_out: float = float(row['QtyOut'])  # zero if no exit
-                    price_out: float = float(row['PriceOut'])
-                    fees_out: float = float(row['FeesOut'])
-                    m2m_price: float = 0
-
-                    if date_out_str == '0001-01-01 00:00:00' and qty_out == 0:
-                        m2m_price = get_closing_price_from_norgate(symbol, currency)
-
-                    trade_details = TradeDetails(
-                        Side=side,
-                        Symbol=symbol,
-                        Shares=shares,
-                        DateIn=date_in_str,
-                        PriceIn=price_in,
-                        QtyIn=qty_in,
-                        DateOut=date_out_str,
-                        PriceOut=price_out,
-                        QtyOut=qty_out,
-                        FeesIn=fees_in,
-                        FeesOut=fees_out,
-                        M2MPrice=m2m_price,
-                        Currency=currency,
-                        Strategy=strategy  # Added strategy attribute
-                    )
-                    grouped_data.trades.append(trade_details)
-
-                except ValueError as e:
-                    print(f"Error processing row: {row}. Error: {e}")
-                    continue
-    except FileNotFoundError:
-        print(f"Error: The file '{filename}' was not found.")
-        return None
-    except Exception as e:
-        print(f"An unexpected error occurred: {e}")
-        return None
-
-    return grouped_data
-
-
-@app.route('/CombinedPerformance.csv')
-def serve_combined_performance_data():
-    pass
+        period_type, time_weighted = period_options()
+    except ValueError as e:
+        return str(e), 400
+
+    return dataset_response(entry, extension,
+                            lambda data: CombinedPerformanceCSVGenerator(data, period_type, time_weighted))
 
 
 # I would like to see the %age return on Used Capital for a time unit (day/week/month).
@@ -101,43 +133,99 @@ def serve_combined_performance_data():
 # - I can do histograms of %age return over time periods, per strategy.
 #
 # This function serves the period performance data as a CSV file.
-# The user can specify the period type (daily/weekly/monthly/yearly) via a query parameter.
-@app.route('/PeriodPerformance.csv')
-def serve_period_performance_data():
-    profit_loss_data = read_trade_csv_list()
-    if profit_loss_data is None:
+# The user can specify the period type (day/week/month/quarter/year) via a query parameter - all of them
+# are rolled up together and cached with the trade book, so switching period is only a lookup.
+@app.route('/PeriodPerformance')
+@app.route('/PeriodPerformance.<extension>')
+def serve_period_performance_data(extension=None):
+    entry = read_trade_book()
+    if entry is None:
         return "No data available", 404
 
-    period_type_str = request.args.get('period', 'Month')
     try:
-        period_type = PeriodType[period_type_str.upper()]
-    except KeyError:
-        return f"Invalid period type: {period_type_str}", 400
+        period_type, time_weighted = period_options()
+    except ValueError as e:
+        return str(e), 400
 
-    performance_gen = PerformanceCSVGenerator(profit_loss_data, period_type)
+    return dataset_response(entry, extension, lambda data: PerformanceCSVGenerator(data, period_type, time_weighted))
 
-    def generate():
-        header = performance_gen.get_header_row()
-        yield ','.join(header) + '\n'
-        for row in performance_gen.get_data_rows():
-            yield ','.join(row) + '\n'
 
-    return Response(generate(), mimetype='text/csv')
+# Return the total list of order clerk trades, including additional data - as a CSV file (or .json,
+# .parquet or .arrow).
+@app.route('/OrderClerkTrades')
+@app.route('/OrderClerkTrades.<extension>')
+def serve_order_clerk_trades_data(extension=None):
+    entry = read_trade_book()
+    if entry is None:
+        return "No data available", 404
+
+    return dataset_response(entry, extension, TradeBookDataset)
 
 
-# Return the total list of order clerk trades, including additional data - as a CSV file.
-@app.route('/OrderClerkTrades.csv')
-def serve_order_clerk_trades_data():
-    profit_loss_data = read_trade_csv_list()
-    if profit_loss_data is None:
+# Capital deployed and open positions per strategy for every day - a trade holds its capital from its entry
+# day to its exit day, or up to today while it is open.
+@app.route('/CapitalTimeline')
+@app.route('/CapitalTimeline.<extension>')
+def serve_capital_timeline_data(extension=None):
+    entry = read_trade_book()
+    if entry is None:
         return "No data available", 404
 
+    return dataset_response(entry, extension, CapitalTimelineCSVGenerator)
+
+
+# Realized and unrealized PnL per strategy for every day - open positions are marked to each day's close, with
+# each symbol's price history fetched once for the whole time it was held.
+@app.route('/EquityCurve')
+@app.route('/EquityCurve.<extension>')
+def serve_equity_curve_data(extension=None):
+    entry = read_trade_book()
+    if entry is None:
+        return "No data available", 404
+
+    # the curve values positions at each day's close in the symbol's own currency, so it is not converted.
+    return dataset_response(entry, extension, EquityCurveCSVGenerator, convertible=False)
+
+
+# Counters and stage timings in the Prometheus text format - per process, so each gunicorn worker has its own.
+@app.route('/metrics')
+def serve_metrics():
+    return Response(metrics.to_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
+# A request sent with an X-Profile header gets a Server-Timing header back, with the time of every stage it ran.
+@app.before_request
+def start_request_profile():
+    if request.headers.get('X-Profile'):
+        g.profile_token = start_profile()
+        g.profile_started = time.perf_counter()
+
+
+@app.after_request
+def add_server_timing(response):
+    if 'profile_token' in g:
+        stages = profile_stages()
+        stages.append(('total', time.perf_counter() - g.profile_started))
+        response.headers['Server-Timing'] = server_timing(stages)
+    return response
+
+
+# after_request is skipped when a handler raises, teardown is not - the server's threads serve one request after
+# another, and the next one must not record its stages into this one's profile.
+@app.teardown_request
+def stop_request_profile(error=None):
+    token = g.pop('profile_token', None)
+    if token is not None:
+        stop_profile(token)
+
+
+# Hit/miss counters for the trade book cache, so we can confirm it is doing its job.
+@app.route('/CacheStats.csv')
+def serve_cache_stats():
     def generate():
-        header = TradeDetailsCSVGenerator.get_header_row()
-        yield ','.join(header) + '\n'
-        for trade in profit_loss_data.trades:
-            row = TradeDetailsCSVGenerator.get_data_row(trade)
-            yield ','.join(row) + '\n'
+        yield 'Name,Value\n'
+        for name, value in get_service().trade_book_cache.stats().items():
+            yield f'{name},{value}\n'
 
     return Response(generate(), mimetype='text/csv')
 
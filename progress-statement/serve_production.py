@@ -0,0 +1,68 @@
+import os
+
+from config import get_config
+
+
+def get_server_settings(config):
+    """The [server] section of config.ini, falling back to the FLASK_RUN_* variables start_flask.bat sets."""
+    return {
+        'host': config.get('server', 'host', fallback=os.environ.get('FLASK_RUN_HOST', '127.0.0.1')),
+        'port': config.getint('server', 'port', fallback=int(os.environ.get('FLASK_RUN_PORT', 5000))),
+        'workers': config.getint('server', 'workers', fallback=1),
+        'threads': config.getint('server', 'threads', fallback=8),
+    }
+
+
+def start_service():
+    """Loads the trade files and starts the background refresh before the first request comes in."""
+    from progress_service import get_service
+    get_service()
+
+
+def serve_with_gunicorn(host: str, port: int, workers: int, threads: int):
+    """Several worker processes, each with its own thread pool - POSIX only."""
+    from gunicorn.app.base import BaseApplication
+
+    class ProgressApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f'{host}:{port}')
+            self.cfg.set('workers', workers)
+            self.cfg.set('threads', threads)
+            self.cfg.set('worker_class', 'gthread')
+            # the master only forks: each worker imports the app in load() and sets up its own service - its
+            # caches, Norgate connection, parse pool and refresh thread - once it is running, so none of it is
+            # created before the fork and shared, or lost, over it.
+            self.cfg.set('preload_app', False)
+            self.cfg.set('post_worker_init', lambda worker: start_service())
+
+        def load(self):
+            from serve_orderclerk_trades import app
+            return app
+
+    ProgressApplication().run()
+
+
+def serve_with_waitress(host: str, port: int, threads: int):
+    """One process with a pool of request threads - works on Windows, where the service runs."""
+    from waitress import serve
+    from serve_orderclerk_trades import app
+    start_service()
+    serve(app, host=host, port=port, threads=threads)
+
+
+def main():
+    settings = get_server_settings(get_config())
+    print(f"Serving on {settings['host']}:{settings['port']} with {settings['workers']} worker(s) "
+          f"of {settings['threads']} thread(s)")
+
+    if settings['workers'] > 1:
+        if os.name == 'nt':
+            print("Multiple worker processes are not supported on Windows, using a single waitress process.")
+        else:
+            serve_with_gunicorn(settings['host'], settings['port'], settings['workers'], settings['threads'])
+            return
+    serve_with_waitress(settings['host'], settings['port'], settings['threads'])
+
+
+if __name__ == "__main__":
+    main()
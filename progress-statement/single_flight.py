@@ -0,0 +1,55 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, TypeVar
+
+from metrics import metrics
+
+T = TypeVar("T")
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Runs one call per key at a time - callers arriving while it runs wait for it and share its result.
+
+    Only calls that overlap are coalesced, nothing is kept once a call has finished; the caches around
+    it decide how long a result lives.  An exception is raised to every caller that waited for it.
+    """
+
+    def __init__(self, metric: str | None = None):
+        self.metric = metric
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            if self.metric is not None:
+                metrics.increment(self.metric)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
@@ -0,0 +1,119 @@
+import json
+import os
+from datetime import date
+from typing import Tuple
+
+import pyarrow as pa
+import pyarrow.ipc
+
+from data.performance_cube import PerformanceCube
+from data.trade_book import TEXT_COLUMNS, TradeBook
+from trade_extraction import ReaderState
+
+# bumped whenever the layout of the files changes, older snapshots are then ignored.
+SNAPSHOT_FORMAT = "2"
+
+BOOK_FILE = "trade_book.arrow"
+ROLLUPS_FILE = "rollups.arrow"
+
+
+class TradeBookSnapshot:
+    """The priced trade book and its rollups, kept on disk so a restarted service starts warm.
+
+    A snapshot is a directory of two Arrow IPC files: the columns of the trade book, M2M prices included,
+    and the performance cube's cells.  The book's schema metadata records the source file's path, size and
+    mtime, the pricing date and how far into the file it was read (offset and CRC), which is all an
+    IncrementalTradeReader needs to carry on.  Loading copies the columns in as they are, without parsing
+    or pricing anything, so it takes milliseconds.
+
+    Nothing is trusted blindly: a changed file is checked against the recorded offset and CRC, and read
+    again in full if its start no longer matches; a snapshot priced on an earlier day is re-priced.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def for_account(self, account: str) -> 'TradeBookSnapshot':
+        """The snapshot of one account's trade file, in a directory of its own - this one for no account."""
+        return TradeBookSnapshot(os.path.join(self.path, account)) if account else self
+
+    def save(self, state: ReaderState, cube: PerformanceCube | None = None):
+        """Writes the files next to the snapshot, then moves them into place, so a reader never sees half."""
+        os.makedirs(self.path, exist_ok=True)
+        tag = f"{state.size}|{state.mtime_ns}|{state.offset}|{state.checksum}"
+        if cube is not None:
+            rollups = pa.Table.from_pandas(cube.to_frame(), preserve_index=False)
+            self._write(ROLLUPS_FILE, rollups.replace_schema_metadata({"tag": tag}))
+
+        metadata = {
+            "format": SNAPSHOT_FORMAT,
+            "tag": tag,
+            "filename": state.filename,
+            "fieldnames": json.dumps(state.fieldnames),
+            "offset": str(state.offset),
+            "checksum": str(state.checksum),
+            "priced_on": state.priced_on.isoformat() if state.priced_on else "",
+            "size": str(state.size),
+            "mtime_ns": str(state.mtime_ns),
+            "tail_rows": str(state.tail_rows),
+        }
+        book = pa.table({name: pa.array(values, from_pandas=True) for name, values in state.book.columns.items()})
+        self._write(BOOK_FILE, book.replace_schema_metadata(metadata))
+
+    def load(self, filename: str) -> Tuple[ReaderState, PerformanceCube | None] | None:
+        """The saved state of the given trade file, with its rollups when they belong to the same read.
+
+        None when there is no usable snapshot of that file.
+        """
+        try:
+            book_table = self._read(BOOK_FILE)
+        except (FileNotFoundError, pa.ArrowInvalid) as e:
+            print(f"No trade book snapshot in {self.path}: {e}")
+            return None
+
+        metadata = {key.decode(): value.decode() for key, value in (book_table.schema.metadata or {}).items()}
+        if metadata.get("format") != SNAPSHOT_FORMAT or metadata.get("filename") != os.path.abspath(filename):
+            print(f"Ignoring the snapshot in {self.path}, it is not a snapshot of {filename}")
+            return None
+
+        columns = {}
+        for name in book_table.column_names:
+            values = book_table.column(name).to_numpy(zero_copy_only=False)
+            columns[name] = values.astype(object) if name in TEXT_COLUMNS else values
+        state = ReaderState(
+            filename=metadata["filename"],
+            book=TradeBook(columns),
+            fieldnames=json.loads(metadata["fieldnames"]),
+            offset=int(metadata["offset"]),
+            checksum=int(metadata["checksum"]),
+            priced_on=date.fromisoformat(metadata["priced_on"]) if metadata["priced_on"] else None,
+            size=int(metadata["size"]),
+            mtime_ns=int(metadata["mtime_ns"]),
+            tail_rows=int(metadata.get("tail_rows", 0)),
+        )
+
+        cube = None
+        try:
+            rollups = self._read(ROLLUPS_FILE)
+            if (rollups.schema.metadata or {}).get(b"tag", b"").decode() == metadata["tag"]:
+                cube = PerformanceCube.from_frame(rollups.to_pandas())
+        except (FileNotFoundError, pa.ArrowInvalid):
+            pass
+        return state, cube
+
+    def _write(self, name: str, table: pa.Table):
+        target = os.path.join(self.path, name)
+        with pa.OSFile(target + ".tmp", "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(target + ".tmp", target)
+
+    def _read(self, name: str) -> pa.Table:
+        with pa.OSFile(os.path.join(self.path, name), "rb") as source:
+            return pa.ipc.open_file(source).read_all()
+
+
+def snapshot_from_config(config) -> TradeBookSnapshot | None:
+    """[snapshot] path - the directory to keep the snapshot in, no snapshot without it."""
+    path = config.get('snapshot', 'path', fallback=None)
+    return TradeBookSnapshot(path) if path else None
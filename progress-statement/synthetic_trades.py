@@ -0,0 +1,112 @@
+import sys
+from argparse import ArgumentParser
+
+import numpy as np
+import pandas as pd
+
+HEADER = ["TradeID", "Side", "Symbol", "Shares", "DateIn", "QtyIn", "PriceIn", "FeesIn", "Currency",
+          "DateOut", "QtyOut", "PriceOut", "FeesOut", "Strategy"]
+
+# symbol -> a typical price, US listings trade in USD and ASX listings in AUD.
+US_SYMBOLS = {"AAPL": 150.0, "MSFT": 300.0, "GOOGL": 120.0, "AMZN": 130.0, "TSLA": 220.0, "NVDA": 400.0,
+              "META": 280.0, "JPM": 150.0, "XOM": 100.0, "SPY": 420.0}
+AUS_SYMBOLS = {"BHP": 45.0, "CBA": 105.0, "CSL": 290.0, "WES": 55.0, "FMG": 20.0, "NAB": 30.0}
+SYMBOLS = list(US_SYMBOLS) + list(AUS_SYMBOLS)
+
+# strategy -> (share of all trades, the symbols it trades, mean days held, share of short trades)
+STRATEGIES = {
+    "Momentum": (0.35, list(US_SYMBOLS), 20, 0.05),
+    "MeanReversion": (0.25, list(US_SYMBOLS), 4, 0.30),
+    "Breakout": (0.15, list(US_SYMBOLS), 12, 0.05),
+    "AusMomentum": (0.15, list(AUS_SYMBOLS), 25, 0.0),
+    "ShortTerm": (0.10, SYMBOLS, 2, 0.30),
+}
+
+# row counts the benchmarks are run at.
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+OPEN_DATE_OUT = "0001-01-01 00:00:00"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def synthetic_trades(rows: int, seed: int = 42, open_fraction: float = 0.02) -> pd.DataFrame:
+    """`rows` random, but repeatable, OrderClerk trades in the file's column order, oldest entry first.
+
+    Strategies, symbols and currencies are mixed as in STRATEGIES, each trade risks a few thousand in its
+    currency, holding times are geometric around the strategy's mean and exits move the price by a random
+    amount that grows with the time held.
+    """
+    rng = np.random.default_rng(seed)
+    names = list(STRATEGIES)
+    shares = np.array([STRATEGIES[name][0] for name in names])
+    strategy_ids = rng.choice(len(names), size=rows, p=shares / shares.sum())
+
+    symbols = np.empty(rows, dtype=object)
+    holding_days = np.empty(rows, dtype=np.int64)
+    sides = np.ones(rows, dtype=np.int64)
+    for strategy_id, name in enumerate(names):
+        _, universe, mean_days, short_share = STRATEGIES[name]
+        mine = np.flatnonzero(strategy_ids == strategy_id)
+        symbols[mine] = np.asarray(universe, dtype=object)[rng.integers(0, len(universe), len(mine))]
+        holding_days[mine] = rng.geometric(1.0 / mean_days, len(mine)) - 1
+        sides[mine[rng.random(len(mine)) < short_share]] = -1
+
+    is_aus = np.isin(symbols, list(AUS_SYMBOLS))
+    base_prices = np.array([US_SYMBOLS.get(symbol) or AUS_SYMBOLS[symbol] for symbol in symbols])
+    price_in = np.round(base_prices * rng.lognormal(0.0, 0.3, rows), 2)
+    qty = np.maximum(1, np.round(rng.uniform(2000, 20000, rows) / price_in))
+    move = rng.normal(0.0, 0.02 * np.sqrt(holding_days + 1))
+    price_out = np.round(np.maximum(0.01, price_in * (1 + move)), 2)
+    fees_in = np.round(np.maximum(1.0, qty * price_in * 0.0005), 2)
+    fees_out = np.round(np.maximum(1.0, qty * price_out * 0.0005), 2)
+
+    business_days = pd.bdate_range("2015-01-01", "2024-12-31")
+    # entries during market hours, exits the same time of day a number of calendar days later.
+    date_in = (business_days[rng.integers(0, len(business_days), rows)].to_numpy()
+               + rng.integers(10 * 3600, 16 * 3600, rows).astype("timedelta64[s]"))
+    date_out = date_in + holding_days.astype("timedelta64[D]")
+    is_open = rng.random(rows) < open_fraction
+
+    order = np.argsort(date_in, kind="stable")
+    frame = pd.DataFrame({
+        "TradeID": np.arange(1, rows + 1),
+        "Side": sides[order],
+        "Symbol": symbols[order],
+        "Shares": qty[order],
+        "DateIn": pd.DatetimeIndex(date_in[order]).strftime(DATE_FORMAT),
+        "QtyIn": qty[order],
+        "PriceIn": price_in[order],
+        "FeesIn": fees_in[order],
+        "Currency": np.where(is_aus, "AUD", "USD")[order],
+        "DateOut": np.where(is_open, OPEN_DATE_OUT, pd.DatetimeIndex(date_out).strftime(DATE_FORMAT))[order],
+        "QtyOut": np.where(is_open, 0, qty)[order],
+        "PriceOut": np.where(is_open, 0, price_out)[order],
+        "FeesOut": np.where(is_open, 0, fees_out)[order],
+        "Strategy": np.asarray(names, dtype=object)[strategy_ids][order],
+    })
+    return frame[HEADER]
+
+
+def write_synthetic_trades(filename: str, rows: int, seed: int = 42, open_fraction: float = 0.02):
+    """Writes an OrderClerkTrades.csv with `rows` random, but repeatable, trades."""
+    synthetic_trades(rows, seed, open_fraction).to_csv(filename, index=False, lineterminator='\n')
+
+
+def get_parser():
+    parser = ArgumentParser(description="Writes a synthetic OrderClerkTrades.csv")
+    parser.add_argument('rows', help=f"Number of trades, or one of {', '.join(SIZES)}")
+    parser.add_argument('-o', '--output', default='OrderClerkTrades.csv', help='The file to write')
+    parser.add_argument('--seed', type=int, default=42, help='Seed of the random generator')
+    parser.add_argument('--open-fraction', type=float, default=0.02, help='Share of trades still open')
+    return parser
+
+
+def main():
+    args = get_parser().parse_args(sys.argv[1:])
+    rows = SIZES.get(args.rows.lower()) or int(args.rows)
+    write_synthetic_trades(args.output, rows, args.seed, args.open_fraction)
+    print(f"Wrote {rows} trades to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
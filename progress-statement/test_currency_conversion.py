@@ -0,0 +1,49 @@
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime, timezone
+
+from currency_conversion import FxRateFile
+
+
+class TestFxRateFile(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp_dir.name, 'rates.csv')
+        self.write("Date,Currency,Rate\n2023-01-02,AUD,0.68\n")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write(self, content):
+        with open(self.filename, 'w') as f:
+            f.write(content)
+
+    def test_rates_are_read_again_only_when_the_file_changes(self):
+        rate_file = FxRateFile(self.filename, pivot="usd")
+        first = rate_file.get()
+        self.assertIs(rate_file.get(), first)
+        self.assertEqual(first.currencies, ["AUD", "USD"])
+
+        time.sleep(0.01)
+        self.write("Date,Currency,Rate\n2023-01-02,AUD,0.68\n2023-01-02,EUR,1.07\n")
+        second = rate_file.get()
+        self.assertIsNot(second, first)
+        self.assertNotEqual(second.version, first.version)
+        self.assertEqual(second.currencies, ["AUD", "EUR", "USD"])
+
+    def test_rates_know_when_the_file_changed(self):
+        os.utime(self.filename, ns=(1_700_000_000_500_000_000, 1_700_000_000_500_000_000))
+        self.assertEqual(FxRateFile(self.filename).get().last_modified,
+                         datetime(2023, 11, 14, 22, 13, 20, tzinfo=timezone.utc))
+
+    def test_missing_columns_are_an_error(self):
+        self.write("Day,Currency,Rate\n2023-01-02,AUD,0.68\n")
+        with self.assertRaises(ValueError):
+            FxRateFile(self.filename).get()
+
+
+if __name__ == '__main__':
+    unittest.main()
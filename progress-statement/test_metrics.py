@@ -0,0 +1,45 @@
+import unittest
+
+from metrics import Metrics, server_timing, start_profile, stop_profile
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = Metrics(prefix="test")
+
+    def test_counters(self):
+        self.metrics.increment("rows_parsed", 10)
+        self.metrics.increment("rows_parsed")
+        self.assertEqual(self.metrics.counter("rows_parsed"), 11)
+        self.assertEqual(self.metrics.counter("rows_skipped"), 0)
+
+    def test_timer_counts_and_sums(self):
+        with self.metrics.timer("parse"):
+            pass
+        self.metrics.observe("parse", 0.5)
+        count, total = self.metrics.stage("parse")
+        self.assertEqual(count, 2)
+        self.assertGreaterEqual(total, 0.5)
+
+    def test_prometheus_text(self):
+        self.metrics.increment("bytes_sent", 1234)
+        self.metrics.observe("serialize", 0.25)
+        text = self.metrics.to_prometheus()
+        self.assertIn("# TYPE test_bytes_sent_total counter\ntest_bytes_sent_total 1234\n", text)
+        self.assertIn('test_stage_seconds_count{stage="serialize"} 1\n', text)
+        self.assertIn('test_stage_seconds_sum{stage="serialize"} 0.250000\n', text)
+
+    def test_profile_collects_only_while_started(self):
+        self.metrics.observe("parse", 0.1)
+        token = start_profile()
+        self.metrics.observe("parse", 0.002)
+        self.metrics.observe("aggregate", 0.003)
+        self.metrics.observe("parse", 0.001)
+        stages = stop_profile(token)
+        self.metrics.observe("parse", 0.1)
+        self.assertEqual(server_timing(stages), "parse;dur=3.00, aggregate;dur=3.00")
+
+
+if __name__ == '__main__':
+    unittest.main()
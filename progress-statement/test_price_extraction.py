@@ -0,0 +1,52 @@
+import unittest
+from datetime import date
+
+from price_extraction import NO_HISTORY, PriceProvider, StaticPriceProvider, prior_business_day
+
+
+class CountingPriceProvider(PriceProvider):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def _fetch_closes(self, keys):
+        self.batches.append(sorted(keys))
+        return {key: 10.0 for key in keys}
+
+    def _fetch_histories(self, windows):
+        return {key: NO_HISTORY for key in windows}
+
+
+class TestPriceProvider(unittest.TestCase):
+
+    def setUp(self):
+        self.on_date = date(2024, 3, 1)
+
+    def test_positions_are_deduplicated_into_one_batch(self):
+        provider = CountingPriceProvider()
+        closes = provider.get_closing_prices([("AAPL", "USD"), ("AAPL", "USD"), ("BHP", "AUD")], self.on_date)
+        self.assertEqual(closes, {("AAPL", "USD"): 10.0, ("BHP", "AUD"): 10.0})
+        self.assertEqual(provider.batches, [[("AAPL", "USD", self.on_date), ("BHP", "AUD", self.on_date)]])
+
+    def test_closes_are_memoized_for_the_day(self):
+        provider = CountingPriceProvider()
+        provider.get_closing_prices([("AAPL", "USD")], self.on_date)
+        provider.get_closing_prices([("AAPL", "USD"), ("MSFT", "USD")], self.on_date)
+        self.assertEqual(provider.batches[1], [("MSFT", "USD", self.on_date)])
+        self.assertEqual(provider.lookups, 2)
+
+        provider.get_closing_prices([("AAPL", "USD")], date(2024, 3, 4))
+        self.assertEqual(len(provider.batches), 3)
+
+    def test_failed_lookups_are_retried(self):
+        provider = StaticPriceProvider({})
+        self.assertEqual(provider.get_closing_prices([("AAPL", "USD")], self.on_date), {("AAPL", "USD"): 0.0})
+        provider.closes["AAPL"] = 101.5
+        self.assertEqual(provider.get_closing_prices([("AAPL", "USD")], self.on_date), {("AAPL", "USD"): 101.5})
+
+    def test_prior_business_day_skips_the_weekend(self):
+        self.assertEqual(prior_business_day(date(2024, 3, 4)), date(2024, 3, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
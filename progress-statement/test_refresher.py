@@ -0,0 +1,89 @@
+import os
+import tempfile
+import time
+import unittest
+
+from data.trade_details import ProfitLossData
+from refresher import Refresher
+from trade_cache import TradeBookCache
+from trade_sources import TradeSource, TradeSources
+
+
+class TestRefresher(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp_dir.name, 'OrderClerkTrades.csv')
+        with open(self.filename, 'w') as f:
+            f.write('Symbol\nAAPL\n')
+        self.loads = 0
+        self.warmed = []
+        self.sources = TradeSources(TradeBookCache(self._loader), [TradeSource("", self.filename)])
+        self.refresher = None
+
+    def tearDown(self):
+        if self.refresher is not None:
+            self.refresher.stop()
+        self.tmp_dir.cleanup()
+
+    def _loader(self, filename):
+        self.loads += 1
+        return ProfitLossData()
+
+    def wait_for(self, condition, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("timed out")
+            time.sleep(0.01)
+
+    def test_refresh_warms_only_new_entries(self):
+        refresher = Refresher(self.sources, warm=self.warmed.append, use_watcher=False)
+        first = refresher.refresh()
+        self.assertIs(refresher.refresh(), first)
+        self.assertEqual(self.warmed, [first])
+        self.assertIs(refresher.snapshot(), first)
+
+    def test_entry_is_published_once_warmed(self):
+        published = []
+        refresher = Refresher(self.sources, warm=lambda entry: published.append(refresher.snapshot()),
+                              use_watcher=False)
+        first = refresher.refresh()
+        self.assertEqual(published, [None])
+        self.assertIs(refresher.snapshot(), first)
+
+    def test_snapshot_is_served_until_the_refresh_swaps_it(self):
+        refresher = Refresher(self.sources, use_watcher=False)
+        first = refresher.refresh()
+        with open(self.filename, 'a') as f:
+            f.write('MSFT\n')
+        self.assertIs(refresher.snapshot(), first)
+        self.assertIsNot(refresher.refresh(), first)
+
+    def test_polling_picks_up_changes(self):
+        self.refresher = Refresher(self.sources, debounce=0.01, poll_interval=0.05, use_watcher=False)
+        self.refresher.start()
+        self.wait_for(lambda: self.refresher.snapshot() is not None)
+        first = self.refresher.snapshot()
+        with open(self.filename, 'a') as f:
+            f.write('MSFT\n')
+        self.wait_for(lambda: self.refresher.snapshot() is not first)
+        self.assertEqual(self.loads, 2)
+
+    def test_bursts_of_writes_are_debounced(self):
+        self.refresher = Refresher(self.sources, debounce=0.2, poll_interval=60, use_watcher=False)
+        self.refresher.start()
+        self.wait_for(lambda: self.refresher.snapshot() is not None)
+        for symbol in ('MSFT', 'TSLA', 'NVDA'):
+            with open(self.filename, 'a') as f:
+                f.write(symbol + '\n')
+            self.refresher.notify()
+            time.sleep(0.05)
+        self.assertEqual(self.loads, 1)
+        self.wait_for(lambda: self.loads == 2)
+        time.sleep(0.3)
+        self.assertEqual(self.loads, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
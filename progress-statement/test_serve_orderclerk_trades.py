@@ -0,0 +1,84 @@
+import configparser
+import csv
+import io
+import os
+import tempfile
+import unittest
+
+import progress_service
+from metrics import metrics, profile_stages
+from progress_service import ProgressService
+from serve_orderclerk_trades import app
+from test_trade_extraction import HEADER
+
+
+class ServedBookCase(unittest.TestCase):
+    """The reports of a book of AUD and USD trades, with exchange rates to serve them in USD."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.tmp_dir.name, 'OrderClerkTrades.csv'), 'w', newline='') as f:
+            f.write(HEADER)
+            f.write("1,1,BHP,10,2023-01-02 00:00:00,10,40,1,AUD,2023-01-10 00:00:00,10,44,1,Mining\n")
+            f.write("2,1,AAPL,10,2023-01-03 00:00:00,10,100,1,USD,2023-01-11 00:00:00,10,110,1,Tech\n")
+        rates_file = os.path.join(self.tmp_dir.name, 'rates.csv')
+        with open(rates_file, 'w') as f:
+            f.write("Date,Currency,Rate\n2023-01-01,AUD,0.5\n")
+
+        config = configparser.ConfigParser()
+        config.read_dict({'paths': {'input_dir': self.tmp_dir.name}, 'pricing': {'provider': 'none'},
+                          'refresh': {'enabled': 'false'}, 'fx': {'rates_file': rates_file}})
+        progress_service._service = ProgressService(config)
+        self.client = app.test_client()
+
+    def tearDown(self):
+        progress_service._service = None
+        self.tmp_dir.cleanup()
+
+    def rows(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+        return list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+
+
+class TestReportCurrency(ServedBookCase):
+
+    def test_currency_filter_matches_the_trades_own_currency(self):
+        rows = self.rows('/OrderClerkTrades.csv?currency=AUD&report_currency=USD')
+        self.assertEqual([row['Symbol'] for row in rows], ['BHP'])
+        self.assertEqual(float(rows[0]['PriceIn']), 20.0)
+
+    def test_currency_filter_in_a_per_period_report(self):
+        rows = self.rows('/PeriodPerformance.csv?currency=AUD&report_currency=USD')
+        self.assertEqual({row['Strategy'] for row in rows} - {'All'}, {'Mining'})
+
+    def test_report_currency_alone_converts_every_trade(self):
+        rows = self.rows('/OrderClerkTrades.csv?report_currency=USD')
+        self.assertEqual({row['Currency'] for row in rows}, {'USD'})
+        self.assertEqual(len(rows), 2)
+
+
+class TestProfile(ServedBookCase):
+
+    def test_profiled_request_gets_its_stages(self):
+        response = self.client.get('/OrderClerkTrades.csv', headers={'X-Profile': '1'})
+        self.assertIn('total;dur=', response.headers['Server-Timing'])
+        self.assertEqual(profile_stages(), [])
+
+    def test_failed_request_leaves_no_profile_behind(self):
+        # a service without a trade book, so the handler raises - and the error reaches the server, which is
+        # when Flask skips after_request.
+        progress_service._service = object()
+        self.addCleanup(app.config.__setitem__, 'PROPAGATE_EXCEPTIONS', app.config['PROPAGATE_EXCEPTIONS'])
+        app.config['PROPAGATE_EXCEPTIONS'] = True
+        with self.assertRaises(AttributeError):
+            self.client.get('/OrderClerkTrades.csv', headers={'X-Profile': '1'})
+
+        # the next request served on this thread records into no one's profile.
+        with metrics.timer('parse'):
+            pass
+        self.assertEqual(profile_stages(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+from test_trade_extraction import HEADER
+
+SERVE_PRODUCTION = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'serve_production.py')
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def descendants(pid: int) -> dict:
+    """pid -> parent pid of every process below pid, from /proc."""
+    parents = {}
+    for name in os.listdir('/proc'):
+        try:
+            with open(f'/proc/{name}/stat') as f:
+                # the command name in brackets may hold spaces, the parent pid is the second field after it.
+                parents[int(name)] = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (ValueError, OSError, IndexError):
+            continue
+    found, frontier = {}, [pid]
+    while frontier:
+        parent = frontier.pop()
+        for child, child_parent in parents.items():
+            if child_parent == parent and child not in found:
+                found[child] = parent
+                frontier.append(child)
+    return found
+
+
+class ServeProductionCase(unittest.TestCase):
+    """Runs serve_production.py as the service runs, over two accounts' trade files."""
+
+    workers = 1
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.files = {}
+        for account, symbol in (("live", "AAPL"), ("paper", "MSFT")):
+            os.makedirs(os.path.join(self.tmp_dir.name, account))
+            self.files[account] = os.path.join(self.tmp_dir.name, account, 'OrderClerkTrades.csv')
+            with open(self.files[account], 'w', newline='') as f:
+                f.write(HEADER)
+                f.write(f"1,1,{symbol},10,2023-01-02 00:00:00,10,100,1,USD,2023-01-10 00:00:00,10,110,1,Tech\n")
+
+        self.port = free_port()
+        with open(os.path.join(self.tmp_dir.name, 'config.ini'), 'w') as f:
+            f.write(f"[paths]\ninput_dir={self.tmp_dir.name}\n\n"
+                    f"[sources]\nlive={self.files['live']}\npaper={self.files['paper']}\n\n"
+                    f"[pricing]\nprovider=none\n\n"
+                    f"[refresh]\nwatcher=poll\npoll_seconds=0.2\ndebounce_seconds=0.1\n\n"
+                    f"[server]\nport={self.port}\nworkers={self.workers}\nthreads=2\n")
+        self.server = subprocess.Popen([sys.executable, SERVE_PRODUCTION], cwd=self.tmp_dir.name,
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def tearDown(self):
+        self.server.terminate()
+        try:
+            self.server.wait(10)
+        except subprocess.TimeoutExpired:
+            self.server.kill()
+            self.server.wait()
+        for pid in descendants(self.server.pid):
+            try:
+                os.kill(pid, 9)
+            except OSError:
+                pass
+        self.tmp_dir.cleanup()
+
+    def get(self, path: str) -> str:
+        with urllib.request.urlopen(f"http://127.0.0.1:{self.port}{path}", timeout=10) as response:
+            return response.read().decode()
+
+    def wait_for_rows(self, rows: int, timeout: float = 30.0) -> str:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                body = self.get('/OrderClerkTrades.csv')
+                if len(body.splitlines()) == rows + 1:
+                    return body
+            except (urllib.error.URLError, ConnectionError):
+                pass
+            if time.monotonic() > deadline:
+                self.fail(f"no response with {rows} rows")
+            time.sleep(0.1)
+
+    def append_row(self, account: str):
+        with open(self.files[account], 'a', newline='') as f:
+            f.write("2,1,TSLA,10,2023-01-03 00:00:00,10,200,1,USD,2023-01-11 00:00:00,10,210,1,Tech\n")
+
+
+@unittest.skipUnless(os.path.isdir('/proc'), "needs /proc to see the server's processes")
+class TestServeProduction(ServeProductionCase):
+
+    def test_both_accounts_are_served_by_one_pool(self):
+        body = self.wait_for_rows(2)
+        self.assertIn(',live', body)
+        self.assertIn(',paper', body)
+
+        # give any worker that set up a service of its own the time to spawn a pool of its own.
+        time.sleep(2)
+        processes = descendants(self.server.pid)
+        self.assertLessEqual(len(processes), 3, processes)
+        # the pool's workers - and multiprocessing's resource tracker - start nothing themselves.
+        self.assertEqual(set(processes.values()), {self.server.pid}, processes)
+
+    def test_appended_rows_are_served(self):
+        self.wait_for_rows(2)
+        self.append_row("live")
+        self.wait_for_rows(3)
+
+
+@unittest.skipIf(os.name == 'nt', "gunicorn does not run on Windows")
+class TestServeProductionWorkers(ServeProductionCase):
+
+    workers = 2
+
+    def test_every_worker_refreshes(self):
+        self.wait_for_rows(2)
+        self.append_row("paper")
+        self.wait_for_rows(3)
+        # one worker has it - the other one polls the file within a few poll_seconds too.
+        time.sleep(1)
+        # the requests are spread over both workers, and every one of them has the new row.
+        for _ in range(20):
+            self.assertEqual(len(self.get('/OrderClerkTrades.csv').splitlines()), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from data.periods import PeriodType
+from price_extraction import StaticPriceProvider
+from snapshot import TradeBookSnapshot
+from test_trade_extraction import HEADER
+from trade_extraction import IncrementalTradeReader
+
+
+class TestTradeBookSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp_dir.name, 'OrderClerkTrades.csv')
+        with open(self.filename, 'w', newline='') as f:
+            f.write(HEADER)
+            f.write("1,1,AAPL,100,2023-01-01 00:00:00,100,150,10,USD,2023-01-10 00:00:00,100,155,10,Apple\n")
+            f.write("2,1,BHP,100,2023-01-01 00:00:00,100,40,10,AUD,0001-01-01 00:00:00,0,0,0,Aus\n")
+        self.provider = StaticPriceProvider({"BHP": 45.0, "MSFT": 310.0})
+        self.snapshot = TradeBookSnapshot(os.path.join(self.tmp_dir.name, 'snapshot'))
+
+        reader = IncrementalTradeReader(self.filename, self.provider)
+        self.data = reader.read()
+        self.snapshot.save(reader.state(), self.data.cube)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def restored_reader(self):
+        reader = IncrementalTradeReader(self.filename, self.provider)
+        reader.restore(*self.snapshot.load(self.filename))
+        return reader
+
+    def test_round_trip(self):
+        state, cube = self.snapshot.load(self.filename)
+        for name, values in self.data.book.columns.items():
+            np.testing.assert_array_equal(state.book[name], values)
+        self.assertTrue(np.isnat(state.book["DateOut"][1]))
+        self.assertEqual(state.book["M2MPrice"][1], 45.0)
+        self.assertEqual(cube.periods(PeriodType.WEEK), self.data.cube.periods(PeriodType.WEEK))
+        self.assertEqual(cube.cell(PeriodType.MONTH, "2023-01", "Apple"),
+                         self.data.cube.cell(PeriodType.MONTH, "2023-01", "Apple"))
+
+    def test_restored_reader_does_not_parse_an_unchanged_file(self):
+        reader = self.restored_reader()
+        data = reader.read()
+        self.assertEqual(reader.full_reloads, 0)
+        self.assertEqual([trade.Symbol for trade in data.trades], ["AAPL", "BHP"])
+        self.assertIsNotNone(data.__dict__.get("cube"))
+
+    def test_appended_rows_are_read_on_top_of_the_snapshot(self):
+        with open(self.filename, 'a', newline='') as f:
+            f.write("3,1,MSFT,10,2023-01-03 00:00:00,10,300,1,USD,0001-01-01 00:00:00,0,0,0,Tech\n")
+        reader = self.restored_reader()
+        data = reader.read()
+        self.assertEqual((reader.full_reloads, reader.appends), (0, 1))
+        self.assertEqual([trade.M2MPrice for trade in data.trades], [0.0, 45.0, 310.0])
+        # the rollups belonged to the snapshot's rows, so they are built again.
+        self.assertIsNone(data.__dict__.get("cube"))
+
+    def test_last_row_without_a_newline_is_read_again_after_a_restore(self):
+        with open(self.filename, 'a', newline='') as f:
+            f.write("3,1,MSFT,10,2023-01-03 00:00:00,10,300,1,USD,0001-01-01 00:00:00,0,0,0,Te")
+        reader = IncrementalTradeReader(self.filename, self.provider)
+        reader.read()
+        self.snapshot.save(reader.state())
+
+        with open(self.filename, 'a', newline='') as f:
+            f.write("ch\n")
+        data = self.restored_reader().read()
+        self.assertEqual([trade.Strategy for trade in data.trades], ["Apple", "Aus", "Tech"])
+
+    def test_rewritten_file_is_read_again(self):
+        with open(self.filename, 'w', newline='') as f:
+            f.write(HEADER)
+            f.write("2,1,BHP,100,2023-01-01 00:00:00,100,40,10,AUD,2023-02-01 00:00:00,100,42,10,Aus\n")
+        reader = self.restored_reader()
+        data = reader.read()
+        self.assertEqual(reader.full_reloads, 1)
+        self.assertEqual(len(data.trades), 1)
+
+    def test_snapshot_of_another_file_is_ignored(self):
+        self.assertIsNone(self.snapshot.load(os.path.join(self.tmp_dir.name, 'Other.csv')))
+        self.assertIsNone(TradeBookSnapshot(os.path.join(self.tmp_dir.name, 'missing')).load(self.filename))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from synthetic_trades import AUS_SYMBOLS, HEADER, STRATEGIES, synthetic_trades, write_synthetic_trades
+from trade_extraction import read_trade_csv
+from price_extraction import StaticPriceProvider
+
+
+class TestSyntheticTrades(unittest.TestCase):
+
+    def test_same_seed_same_trades(self):
+        self.assertTrue(synthetic_trades(500, seed=7).equals(synthetic_trades(500, seed=7)))
+        self.assertFalse(synthetic_trades(500, seed=7).equals(synthetic_trades(500, seed=8)))
+
+    def test_mix(self):
+        frame = synthetic_trades(5000, open_fraction=0.1)
+        self.assertEqual(list(frame.columns), HEADER)
+        self.assertEqual(set(frame["Strategy"]), set(STRATEGIES))
+        is_aus = frame["Symbol"].isin(list(AUS_SYMBOLS))
+        self.assertTrue((frame["Currency"][is_aus] == "AUD").all())
+        self.assertTrue((frame["Currency"][~is_aus] == "USD").all())
+        self.assertFalse(is_aus[frame["Strategy"] == "Momentum"].any())
+        self.assertAlmostEqual((frame["QtyOut"] == 0).mean(), 0.1, delta=0.02)
+        self.assertTrue(np.all(np.diff(frame["DateIn"].to_numpy().astype("datetime64[s]")) >= np.timedelta64(0)))
+
+    def test_file_parses(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, "OrderClerkTrades.csv")
+            write_synthetic_trades(filename, 1000)
+            data = read_trade_csv(filename, StaticPriceProvider())
+        self.assertEqual(len(data.book), 1000)
+        self.assertEqual(int(data.book.realized_mask.sum()) + int(data.book["IsOpen"].sum()), 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from data.trade_details import ProfitLossData
+from trade_cache import TradeBookCache
+
+
+class TestTradeBookCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp_dir.name, 'OrderClerkTrades.csv')
+        with open(self.filename, 'w') as f:
+            f.write('Symbol\nAAPL\n')
+        self.load_count = 0
+        self.cache = TradeBookCache(self._loader)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _loader(self, filename):
+        self.load_count += 1
+        return ProfitLossData()
+
+    def test_unchanged_file_is_served_from_memory(self):
+        first = self.cache.get(self.filename)
+        second = self.cache.get(self.filename)
+        self.assertIs(first, second)
+        self.assertEqual(self.load_count, 1)
+        self.assertEqual(self.cache.stats(), {"hits": 1, "misses": 1, "entries": 1, "coalesced": 0})
+
+    def test_changed_file_is_reloaded(self):
+        self.cache.get(self.filename)
+        with open(self.filename, 'a') as f:
+            f.write('MSFT\n')
+        self.cache.get(self.filename)
+        self.assertEqual(self.load_count, 2)
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_concurrent_misses_share_one_load(self):
+        release = threading.Event()
+
+        def slow_loader(filename):
+            self.load_count += 1
+            release.wait(5)
+            return ProfitLossData()
+
+        cache = TradeBookCache(slow_loader)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get(self.filename))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        while cache.stats()["coalesced"] < 3:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.load_count, 1)
+        self.assertEqual(len(set(map(id, results))), 1)
+
+    def test_missing_file_returns_none(self):
+        self.assertIsNone(self.cache.get(os.path.join(self.tmp_dir.name, 'missing.csv')))
+        self.assertEqual(self.load_count, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from price_extraction import StaticPriceProvider
+from trade_extraction import OPEN_DATE_OUT, IncrementalTradeReader, parse_orderclerk_date, read_trade_csv
+
+HEADER = "TradeID,Side,Symbol,Shares,DateIn,QtyIn,PriceIn,FeesIn,Currency,DateOut,QtyOut,PriceOut,FeesOut,Strategy\n"
+
+
+class FailingPriceProvider(StaticPriceProvider):
+    """Fails every lookup while failing is set, as a price service that is down does."""
+
+    failing = False
+
+    def _fetch_closes(self, keys):
+        if self.failing:
+            raise ConnectionError("price service unavailable")
+        return super()._fetch_closes(keys)
+
+
+class TestReadTradeCsv(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp_dir.name, 'OrderClerkTrades.csv')
+        with open(self.filename, 'w', newline='') as f:
+            f.write(HEADER)
+            f.write("1,1,AAPL,100,2023-01-01 00:00:00,100,150,10,USD,2023-01-10 00:00:00,100,155,10,Apple\n")
+            f.write("2,1,BHP,100,2023-01-01 00:00:00,100,40,10,AUD,0001-01-01 00:00:00,0,0,0,Aus\n")
+            f.write("3,1,BHP,50,2023-01-02 00:00:00,50,41,10,AUD,0001-01-01 00:00:00,0,0,0,Aus\n")
+            f.write("4,1,MSFT,10,2023-01-02 00:00:00,10,300,1,USD,0001-01-01 00:00:00,0,0,0, \n")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_open_trades_are_priced_in_one_batch(self):
+        provider = StaticPriceProvider({"BHP": 45.0})
+        profit_loss_data = read_trade_csv(self.filename, provider)
+
+        self.assertEqual(len(profit_loss_data.trades), 3)
+        self.assertEqual([trade.M2MPrice for trade in profit_loss_data.trades], [0, 45.0, 45.0])
+        self.assertEqual(provider.lookups, 1)
+
+    def test_dates_are_parsed_at_ingest(self):
+        profit_loss_data = read_trade_csv(self.filename, StaticPriceProvider({"BHP": 45.0}))
+        realized, first_open = profit_loss_data.trades[0], profit_loss_data.trades[1]
+
+        self.assertEqual(realized.DateOut, datetime(2023, 1, 10))
+        self.assertEqual(first_open.DateIn, datetime(2023, 1, 1))
+        self.assertTrue(first_open.is_open())
+        self.assertIsNone(parse_orderclerk_date(OPEN_DATE_OUT))
+
+    def test_missing_file_returns_none(self):
+        self.assertIsNone(read_trade_csv(os.path.join(self.tmp_dir.name, 'missing.csv'), StaticPriceProvider()))
+
+
+class TestIncrementalTradeReader(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp_dir.name, 'OrderClerkTrades.csv')
+        self.open_row = "1,1,BHP,100,2023-01-01 00:00:00,100,40,10,AUD,0001-01-01 00:00:00,0,0,0,Aus\n"
+        self.closed_row = "1,1,BHP,100,2023-01-01 00:00:00,100,40,10,AUD,2023-02-01 00:00:00,100,42,10,Aus\n"
+        self._write('w', HEADER + self.open_row)
+        self.reader = IncrementalTradeReader(self.filename, StaticPriceProvider({"BHP": 45.0, "AAPL": 160.0}))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _write(self, mode, text):
+        with open(self.filename, mode, newline='') as f:
+            f.write(text)
+
+    def test_appended_rows_are_parsed_on_their_own(self):
+        self.reader.read()
+        self._write('a', "2,1,AAPL,10,2023-01-03 00:00:00,10,150,1,USD,0001-01-01 00:00:00,0,0,0,Apple\n")
+        profit_loss_data = self.reader.read()
+
+        self.assertEqual([trade.Symbol for trade in profit_loss_data.trades], ["BHP", "AAPL"])
+        self.assertEqual([trade.M2MPrice for trade in profit_loss_data.trades], [45.0, 160.0])
+        self.assertEqual((self.reader.full_reloads, self.reader.appends), (1, 1))
+
+    def test_partial_rows_wait_for_the_rest_of_the_line(self):
+        self.reader.read()
+        self._write('a', "2,1,AAPL,10,2023-01-03 00:00:00,10,150")
+        self.assertEqual(len(self.reader.read().trades), 1)
+
+        self._write('a', ",1,USD,0001-01-01 00:00:00,0,0,0,Apple\n")
+        self.assertEqual(len(self.reader.read().trades), 2)
+        self.assertEqual(self.reader.full_reloads, 1)
+
+    def test_last_row_without_a_newline_is_read(self):
+        self._write('a', "2,1,AAPL,10,2023-01-03 00:00:00,10,150,1,USD,0001-01-01 00:00:00,0,0,0,Apple")
+        self.assertEqual([trade.Strategy for trade in self.reader.read().trades], ["Aus", "Apple"])
+
+        # its newline arrives with the next row, and the row is read again rather than added twice.
+        self._write('a', "\n3,1,BHP,5,2023-01-04 00:00:00,5,41,1,AUD,0001-01-01 00:00:00,0,0,0,Aus\n")
+        profit_loss_data = self.reader.read()
+        self.assertEqual([trade.Strategy for trade in profit_loss_data.trades], ["Aus", "Apple", "Aus"])
+        self.assertEqual([trade.M2MPrice for trade in profit_loss_data.trades], [45.0, 160.0, 45.0])
+        self.assertEqual(self.reader.full_reloads, 1)
+
+    def test_rows_are_read_again_after_a_failed_read(self):
+        provider = FailingPriceProvider({"BHP": 45.0, "AAPL": 160.0})
+        reader = IncrementalTradeReader(self.filename, provider)
+        reader.read()
+        self._write('a', "2,1,AAPL,10,2023-01-03 00:00:00,10,150,1,USD,0001-01-01 00:00:00,0,0,0,Apple\n")
+        provider.failing = True
+        self.assertIsNone(reader.read())
+
+        provider.failing = False
+        self.assertEqual([trade.Symbol for trade in reader.read().trades], ["BHP", "AAPL"])
+
+    def test_rewritten_rows_trigger_a_full_reload(self):
+        self.reader.read()
+        self._write('w', HEADER + self.closed_row)
+        profit_loss_data = self.reader.read()
+
+        self.assertEqual(len(profit_loss_data.trades), 1)
+        self.assertTrue(profit_loss_data.trades[0].is_realized())
+        self.assertEqual(self.reader.full_reloads, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
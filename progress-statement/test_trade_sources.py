@@ -0,0 +1,105 @@
+import configparser
+import os
+import tempfile
+import time
+import unittest
+
+from price_extraction import StaticPriceProvider
+from test_trade_extraction import HEADER
+from trade_cache import TradeBookCache
+from trade_extraction import IncrementalTradeLoader
+from trade_sources import TradeSource, TradeSources, parse_executor, sources_from_config
+
+
+class TestSourcesFromConfig(unittest.TestCase):
+
+    def test_input_dir_is_the_only_source_without_a_sources_section(self):
+        config = configparser.ConfigParser()
+        config.read_string("[paths]\ninput_dir=/data/oc\n")
+        self.assertEqual(sources_from_config(config),
+                         [TradeSource("", os.path.abspath("/data/oc/OrderClerkTrades.csv"))])
+
+    def test_each_source_is_tagged_with_its_account(self):
+        config = configparser.ConfigParser()
+        config.read_string("[paths]\ninput_dir=.\n\n[sources]\nlive=/data/live\npaper=/data/paper/Trades.csv\n")
+        self.assertEqual(sources_from_config(config),
+                         [TradeSource("live", os.path.abspath("/data/live/OrderClerkTrades.csv")),
+                          TradeSource("paper", os.path.abspath("/data/paper/Trades.csv"))])
+
+    def test_a_file_listed_twice_is_an_error(self):
+        config = configparser.ConfigParser()
+        config.read_string("[paths]\ninput_dir=.\n\n[sources]\nlive=/data/live\nagain=/data/live\n")
+        with self.assertRaises(ValueError):
+            sources_from_config(config)
+
+
+class TestTradeSources(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.sources = [TradeSource("live", os.path.join(self.tmp_dir.name, 'live.csv')),
+                        TradeSource("paper", os.path.join(self.tmp_dir.name, 'paper.csv'))]
+        self.write(self.sources[0].path,
+                   "1,1,AAPL,100,2023-01-01 00:00:00,100,150,10,USD,2023-01-10 00:00:00,100,155,10,Apple\n")
+        self.write(self.sources[1].path,
+                   "1,1,BHP,100,2023-01-01 00:00:00,100,40,10,AUD,0001-01-01 00:00:00,0,0,0,Aus\n")
+        self.executor = None
+
+    def tearDown(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+        self.tmp_dir.cleanup()
+
+    @staticmethod
+    def write(filename, *rows, mode='w'):
+        with open(filename, mode, newline='') as f:
+            if mode == 'w':
+                f.write(HEADER)
+            f.writelines(rows)
+
+    def trade_sources(self, executor=None):
+        loader = IncrementalTradeLoader(StaticPriceProvider({"BHP": 45.0}),
+                                        {source.path: source.account for source in self.sources}, executor)
+        return TradeSources(TradeBookCache(loader), self.sources)
+
+    def test_files_are_merged_with_their_accounts(self):
+        entry = self.trade_sources().get_entry()
+        trades = entry.profit_loss_data.trades
+        self.assertEqual([(t.Account, t.Symbol, t.M2MPrice) for t in trades],
+                         [("live", "AAPL", 0.0), ("paper", "BHP", 45.0)])
+
+    def test_merged_book_is_kept_until_a_file_changes(self):
+        trade_sources = self.trade_sources()
+        first = trade_sources.get_entry()
+        self.assertIs(trade_sources.get_entry(), first)
+        self.assertIs(trade_sources.peek(), first)
+
+        time.sleep(0.01)
+        self.write(self.sources[1].path,
+                   "2,1,CBA,10,2023-01-02 00:00:00,10,100,1,AUD,2023-01-05 00:00:00,10,101,1,Aus\n", mode='a')
+        second = trade_sources.get_entry()
+        self.assertIsNot(second, first)
+        self.assertNotEqual(second.version, first.version)
+        self.assertEqual(len(second.profit_loss_data.book), 3)
+        # the unchanged account was served from the cache, not read again.
+        self.assertEqual(trade_sources.cache.stats()["misses"], 3)
+
+    def test_unreadable_file_leaves_the_other_accounts(self):
+        os.remove(self.sources[0].path)
+        entry = self.trade_sources().get_entry()
+        self.assertEqual([t.Account for t in entry.profit_loss_data.trades], ["paper"])
+
+    def test_files_are_parsed_in_worker_processes(self):
+        self.executor = parse_executor(self.sources)
+        entry = self.trade_sources(self.executor).get_entry()
+        self.assertEqual([t.Account for t in entry.profit_loss_data.trades], ["live", "paper"])
+
+    def test_single_file_is_served_as_it_is(self):
+        self.assertIsNone(parse_executor(self.sources[:1]))
+        cache = TradeBookCache(IncrementalTradeLoader(StaticPriceProvider({"BHP": 45.0})))
+        trade_sources = TradeSources(cache, self.sources[:1])
+        self.assertIs(trade_sources.get_entry(), cache.peek(self.sources[0].path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import os
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Callable, Dict, Tuple
+
+from data.trade_details import ProfitLossData
+from metrics import metrics
+from single_flight import SingleFlight
+
+
+@dataclass(frozen=True)
+class FileFingerprint:
+    path: str
+    size: int
+    mtime_ns: int
+
+    @staticmethod
+    def of(filename: str) -> 'FileFingerprint':
+        stat = os.stat(filename)
+        return FileFingerprint(os.path.abspath(filename), stat.st_size, stat.st_mtime_ns)
+
+    @property
+    def key(self) -> str:
+        return f"{self.path}|{self.size}|{self.mtime_ns}"
+
+
+@dataclass(frozen=True)
+class MergedFingerprint:
+    """The fingerprints of the files merged into one trade book, see trade_sources.py."""
+    parts: Tuple[FileFingerprint, ...]
+
+    @property
+    def path(self) -> str:
+        return ";".join(part.path for part in self.parts)
+
+    @property
+    def mtime_ns(self) -> int:
+        return max(part.mtime_ns for part in self.parts)
+
+    @property
+    def key(self) -> str:
+        return ";".join(part.key for part in self.parts)
+
+
+@dataclass(frozen=True)
+class CachedTradeBook:
+    fingerprint: FileFingerprint | MergedFingerprint
+    priced_on: date
+    profit_loss_data: ProfitLossData
+
+    @property
+    def version(self) -> str:
+        """Changes whenever the served data could change - a new file, or a new day's prices."""
+        return f"{self.fingerprint.key}|{self.priced_on}"
+
+    @property
+    def last_modified(self) -> datetime:
+        modified = datetime.fromtimestamp(self.fingerprint.mtime_ns / 1e9, timezone.utc)
+        priced = datetime.combine(self.priced_on, datetime.min.time()).astimezone(timezone.utc)
+        return max(modified, priced).replace(microsecond=0)
+
+
+class TradeBookCache:
+    """Process-wide cache of parsed trade files.
+
+    Entries are keyed on the file's path, size and mtime, plus the current date so that
+    open positions are re-priced once the trading day rolls over.  Concurrent misses for the same
+    version of a file share a single load.
+    """
+
+    def __init__(self, loader: Callable[[str], ProfitLossData | None]):
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._entries: Dict[str, CachedTradeBook] = {}
+        self._loads = SingleFlight('coalesced_loads')
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, filename: str) -> ProfitLossData | None:
+        entry = self.get_entry(filename)
+        return entry.profit_loss_data if entry is not None else None
+
+    def get_entry(self, filename: str) -> CachedTradeBook | None:
+        try:
+            fingerprint = FileFingerprint.of(filename)
+        except FileNotFoundError:
+            print(f"Error: The file '{filename}' was not found.")
+            return None
+
+        today = date.today()
+        with self._lock:
+            entry = self._entries.get(fingerprint.path)
+            if entry is not None and entry.fingerprint == fingerprint and entry.priced_on == today:
+                self.hits += 1
+                metrics.increment('trade_cache_hits')
+                return entry
+            self.misses += 1
+        metrics.increment('trade_cache_misses')
+
+        return self._loads.do((fingerprint, today), lambda: self._load(filename, fingerprint, today))
+
+    def _load(self, filename: str, fingerprint: FileFingerprint, today: date) -> CachedTradeBook | None:
+        with metrics.timer('load'):
+            profit_loss_data = self._loader(filename)
+        if profit_loss_data is None:
+            return None
+
+        entry = CachedTradeBook(fingerprint, today, profit_loss_data)
+        with self._lock:
+            self._entries[fingerprint.path] = entry
+        return entry
+
+    def peek(self, filename: str) -> CachedTradeBook | None:
+        """The entry last loaded for the file, without looking at the file itself."""
+        with self._lock:
+            return self._entries.get(os.path.abspath(filename))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries),
+                    "coalesced": self._loads.coalesced}
@@ -1,10 +1,356 @@
-from datetime import datetime
+import csv
+import io
+import os
+import sys
+import threading
+import zlib
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from datetime import date, datetime
+from functools import lru_cache
+from typing import BinaryIO, Dict, Iterable, List, Tuple
 
+import numpy as np
 
-def extract_year(date_str: str) -> int:
-    """Extracts the year from a date string.
+from data.performance_cube import PerformanceCube
+from data.trade_book import TradeBook, TRADE_COLUMNS
+from data.trade_details import ProfitLossData
+from metrics import metrics
+from price_extraction import PriceProvider, get_price_provider, prior_business_day
+
+
+# OrderClerk's DateOut for a position that has not been closed yet.
+OPEN_DATE_OUT = '0001-01-01 00:00:00'
+
+
+@lru_cache(maxsize=65536)
+def parse_orderclerk_date(date_str: str) -> datetime | None:
+    """Parses an OrderClerk timestamp, returning None for the open position sentinel.
+    OrderClerk repeats the same stamps over and over, so each distinct string is only parsed once.
+    """
+    if date_str == OPEN_DATE_OUT:
+        return None
+    return datetime.fromisoformat(date_str)
+
+
+def extract_year(date: datetime | None) -> int:
+    """Extracts the year from a trade date.
     For unrealized trades, uses the current year.
     """
-    if date_str != '0001-01-01 00:00:00':
-        return datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S').year
+    if date is not None:
+        return date.year
     return datetime.now().year
+
+
+def parse_trade_rows(rows: Iterable[Dict[str, str]], account: str = "") -> TradeBook:
+    """Turns OrderClerk CSV rows into a TradeBook, skipping rows without a strategy or with bad numbers."""
+    with metrics.timer('parse'):
+        book, skipped = _parse_trade_rows(rows, account)
+    metrics.increment('rows_parsed', len(book))
+    metrics.increment('rows_skipped', skipped)
+    return book
+
+
+def parse_trade_csv(data: bytes, account: str = "",
+                    fieldnames: List[str] | None = None) -> Tuple[List[str] | None, TradeBook | None, int]:
+    """Parses complete lines of an OrderClerkTrades.csv, returning the header, the trades and the rows skipped.
+
+    The header is read from the data unless the fieldnames are given, and the book is None when there is
+    neither.  This runs in the worker processes of a multi-account setup, so it leaves the metrics to the caller.
+    """
+    reader = csv.DictReader(io.TextIOWrapper(io.BytesIO(data), newline=''), fieldnames=fieldnames)
+    if reader.fieldnames is None:
+        return None, None, 0
+    book, skipped = _parse_trade_rows(reader, account)
+    return list(reader.fieldnames), book, skipped
+
+
+def _parse_trade_rows(rows: Iterable[Dict[str, str]], account: str) -> Tuple[TradeBook, int]:
+    columns = {name: [] for name in TRADE_COLUMNS}
+    skipped = 0
+
+    for row in rows:
+        if None in row.values():
+            # a short row, e.g. the last line of a file that is still being written.
+            print(f"Skipping incomplete row: {row}")
+            skipped += 1
+            continue
+        try:
+            symbol: str = row['Symbol']
+            strategy: str = row['Strategy'].strip()
+            if not strategy:
+                trade_id = row['TradeID']
+                date_in = row['DateIn']
+                print(f"Skipping trade {trade_id} for symbol {symbol} on {date_in} due to missing strategy.")
+                skipped += 1
+                continue
+
+            parsed = {
+                'Side': int(row['Side']),
+                'Symbol': sys.intern(symbol),
+                'Shares': float(row['Shares']),
+                'DateIn': parse_orderclerk_date(row['DateIn']),
+                'QtyIn': float(row['QtyIn']),  # zero if not filled.
+                'PriceIn': float(row['PriceIn']),
+                'FeesIn': float(row['FeesIn']),
+                'Currency': sys.intern(row['Currency']),
+                'DateOut': parse_orderclerk_date(row['DateOut']),
+                'QtyOut': float(row['QtyOut']),  # zero if no exit
+                'PriceOut': float(row['PriceOut']),
+                'FeesOut': float(row['FeesOut']),
+                'M2MPrice': 0.0,
+                'Strategy': sys.intern(strategy),
+                'Account': account,
+            }
+        except ValueError as e:
+            print(f"Error processing row: {row}. Error: {e}")
+            skipped += 1
+            continue
+
+        for name, value in parsed.items():
+            columns[name].append(value)
+
+    return TradeBook.from_columns(columns), skipped
+
+
+def read_trade_csv(filename: str, price_provider: PriceProvider | None = None) -> ProfitLossData | None:
+    """Parses an OrderClerkTrades.csv file, then marks all open positions to market in one batch."""
+    print(f"Reading CSV from: {filename}")
+
+    try:
+        with open(filename, 'r', newline='') as csvfile:
+            reader = csv.DictReader(csvfile)
+            if reader.fieldnames is None:
+                print("CSV file is empty or has no header.")
+                return None
+            book = parse_trade_rows(reader)
+    except FileNotFoundError:
+        print(f"Error: The file '{filename}' was not found.")
+        return None
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+        return None
+
+    book = mark_to_market(book, price_provider or get_price_provider())
+    return ProfitLossData(book=book)
+
+
+@dataclass(frozen=True)
+class ReaderState:
+    """Everything an IncrementalTradeReader knows about the part of its file it has read."""
+    filename: str
+    book: TradeBook
+    fieldnames: List[str]
+    offset: int
+    checksum: int
+    priced_on: date | None
+    size: int
+    mtime_ns: int
+    # rows at the end of the book parsed from past the offset, a last line without its newline.
+    tail_rows: int = 0
+
+
+class IncrementalTradeReader:
+    """Re-reads an OrderClerkTrades.csv by parsing only the rows appended since the previous read.
+
+    OrderClerk mostly appends to the file, but it also rewrites the rows of trades that have just closed.
+    The byte offset and a CRC of everything parsed so far are kept, and when that prefix no longer matches
+    the file on disk the whole file is parsed again.  Only complete lines move the offset on, and only once
+    their rows are in the book.  A line appended without its newline is still being written, so it waits for
+    its newline; a file that ends without one when it is read whole has its last row read too, and read again
+    should the rest of the line arrive.
+
+    The state can be saved and restored (see snapshot.py), so a restarted service carries on from where it
+    was rather than parsing and pricing the whole file again.
+
+    Every trade is tagged with the reader's account.  Given an executor (a process pool when several accounts
+    are read at once), whole-file parses run there, so files of different accounts are parsed in parallel.
+    """
+
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, filename: str, price_provider: PriceProvider | None = None, account: str = "",
+                 executor: Executor | None = None):
+        self.filename = filename
+        self.price_provider = price_provider
+        self.account = account
+        self.executor = executor
+        self._lock = threading.Lock()
+        self._book: TradeBook | None = None
+        self._fieldnames: List[str] | None = None
+        self._offset = 0
+        self._checksum = 0
+        self._tail_rows = 0
+        self._priced_on: date | None = None
+        # size and mtime of the file when it was last read - unchanged, there is nothing to read.
+        self._stat: tuple[int, int] | None = None
+        # rollups restored with the book, valid until any row is read.
+        self._cube: PerformanceCube | None = None
+        self.full_reloads = 0
+        self.appends = 0
+
+    def read(self) -> ProfitLossData | None:
+        with self._lock:
+            try:
+                with open(self.filename, 'rb') as f:
+                    stat = os.fstat(f.fileno())
+                    if self._book is None or self._stat != (stat.st_size, stat.st_mtime_ns):
+                        if self._book is not None and self._prefix_unchanged(f):
+                            self._read_appended(f)
+                        elif not self._read_all(f):
+                            return None
+                        self._stat = (stat.st_size, stat.st_mtime_ns)
+            except FileNotFoundError:
+                print(f"Error: The file '{self.filename}' was not found.")
+                return None
+            except Exception as e:
+                print(f"An unexpected error occurred: {e}")
+                return None
+
+            price_provider = self.price_provider or get_price_provider()
+            if self._priced_on != prior_business_day():
+                # a new trading day, so every open position needs today's close.
+                self._book = mark_to_market(self._book, price_provider)
+                self._priced_on = prior_business_day()
+            data = ProfitLossData(book=self._book)
+            if self._cube is not None:
+                # marking to market does not touch the realized trades the rollups are made of.
+                data.cube = self._cube
+            return data
+
+    def state(self) -> ReaderState | None:
+        with self._lock:
+            if self._book is None or self._stat is None:
+                return None
+            return ReaderState(os.path.abspath(self.filename), self._book, list(self._fieldnames), self._offset,
+                               self._checksum, self._priced_on, *self._stat, self._tail_rows)
+
+    def restore(self, state: ReaderState, cube: PerformanceCube | None = None):
+        """Carries on from a saved state - the next read checks the file against it as if it had read it."""
+        with self._lock:
+            self._book = state.book
+            self._fieldnames = list(state.fieldnames)
+            self._offset = state.offset
+            self._checksum = state.checksum
+            self._tail_rows = state.tail_rows
+            self._priced_on = state.priced_on
+            self._stat = (state.size, state.mtime_ns)
+            self._cube = cube
+
+    def _prefix_unchanged(self, f: BinaryIO) -> bool:
+        if os.fstat(f.fileno()).st_size < self._offset:
+            return False
+        checksum = 0
+        remaining = self._offset
+        while remaining > 0:
+            chunk = f.read(min(self.CHUNK_SIZE, remaining))
+            if not chunk:
+                return False
+            checksum = zlib.crc32(chunk, checksum)
+            remaining -= len(chunk)
+        return checksum == self._checksum
+
+    def _read_all(self, f: BinaryIO) -> bool:
+        print(f"Reading CSV from: {self.filename}")
+        self.full_reloads += 1
+        self._book = None
+        self._cube = None
+        f.seek(0)
+        data = f.read()
+        lines = self._complete_lines(data)
+        fieldnames, book = self._parse(lines, None, self.executor)
+        if book is None:
+            print("CSV file is empty or has no header.")
+            return False
+
+        self._fieldnames = fieldnames
+        tail = self._parse_tail(data[len(lines):])
+        self._book = TradeBook.concat([book, tail])
+        self._offset = len(lines)
+        self._checksum = zlib.crc32(lines)
+        self._tail_rows = len(tail)
+        self._priced_on = None
+        return True
+
+    def _read_appended(self, f: BinaryIO):
+        lines = self._complete_lines(f.read())
+        if not lines:
+            # nothing appended, or a line still being written.
+            return
+
+        self.appends += 1
+        book = self._book
+        if self._tail_rows:
+            # the last line of the file as read before, now complete and among the lines below.
+            book = book.take(np.arange(len(book) - self._tail_rows))
+        # appends are a handful of rows, not worth sending to another process.
+        appended = self._parse(lines, self._fieldnames, None)[1]
+        appended = mark_to_market(appended, self.price_provider or get_price_provider())
+        self._book = TradeBook.concat([book, appended])
+        self._cube = None
+        self._offset += len(lines)
+        self._checksum = zlib.crc32(lines, self._checksum)
+        self._tail_rows = 0
+
+    def _parse_tail(self, data: bytes) -> TradeBook:
+        """The rows of the file's last line when it has no newline - none when there is no such line."""
+        if not data:
+            return TradeBook.from_columns({name: [] for name in TRADE_COLUMNS})
+        return self._parse(data, self._fieldnames, None)[1]
+
+    def _parse(self, data: bytes, fieldnames: List[str] | None,
+               executor: Executor | None) -> Tuple[List[str] | None, TradeBook | None]:
+        with metrics.timer('parse'):
+            if executor is not None:
+                fieldnames, book, skipped = executor.submit(parse_trade_csv, data, self.account, fieldnames).result()
+            else:
+                fieldnames, book, skipped = parse_trade_csv(data, self.account, fieldnames)
+        if book is not None:
+            metrics.increment('rows_parsed', len(book))
+            metrics.increment('rows_skipped', skipped)
+        return fieldnames, book
+
+    @staticmethod
+    def _complete_lines(data: bytes) -> bytes:
+        return data[:data.rfind(b'\n') + 1]
+
+
+class IncrementalTradeLoader:
+    """Hands each trade file to its own IncrementalTradeReader - a drop-in loader for TradeBookCache.
+
+    accounts maps a file's absolute path to the account its trades are tagged with, no account otherwise.
+    """
+
+    def __init__(self, price_provider: PriceProvider | None = None, accounts: Dict[str, str] | None = None,
+                 executor: Executor | None = None):
+        self.price_provider = price_provider
+        self.accounts = accounts or {}
+        self.executor = executor
+        self._lock = threading.Lock()
+        self._readers: Dict[str, IncrementalTradeReader] = {}
+
+    def __call__(self, filename: str) -> ProfitLossData | None:
+        return self.reader(filename).read()
+
+    def reader(self, filename: str) -> IncrementalTradeReader:
+        with self._lock:
+            path = os.path.abspath(filename)
+            reader = self._readers.get(path)
+            if reader is None:
+                reader = IncrementalTradeReader(filename, self.price_provider, self.accounts.get(path, ""),
+                                                self.executor)
+                self._readers[path] = reader
+            return reader
+
+
+def mark_to_market(book: TradeBook, price_provider: PriceProvider) -> TradeBook:
+    """Fills in M2MPrice for every open position in the book, using one batched price lookup."""
+    open_mask = book['IsOpen'] & (book['QtyOut'] == 0)
+    if not open_mask.any():
+        return book
+
+    positions = list(zip(book['Symbol'][open_mask], book['Currency'][open_mask]))
+    closes = price_provider.get_closing_prices(positions)
+    m2m_prices = book['M2MPrice'].copy()
+    m2m_prices[open_mask] = [closes[position] for position in positions]
+    return book.with_column('M2MPrice', m2m_prices)
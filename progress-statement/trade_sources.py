@@ -0,0 +1,109 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from typing import List, Sequence
+
+from data.trade_book import TradeBook
+from data.trade_details import ProfitLossData
+from single_flight import SingleFlight
+from trade_cache import CachedTradeBook, MergedFingerprint, TradeBookCache
+
+# the file OrderClerk exports its trades to, in the directory of each source.
+TRADE_FILE = 'OrderClerkTrades.csv'
+
+
+@dataclass(frozen=True)
+class TradeSource:
+    """One OrderClerk export, and the account its trades are tagged with ("" for none)."""
+    account: str
+    path: str
+
+
+def sources_from_config(config) -> List[TradeSource]:
+    """[sources] account = path, one line per OrderClerk export - a path not ending in .csv is a directory
+    holding an OrderClerkTrades.csv.
+
+    Without the section, the OrderClerkTrades.csv in [paths] input_dir is the only source, without an account.
+    """
+    if not config.has_section('sources') or not config.options('sources'):
+        input_dir = config.get('paths', 'input_dir', fallback='.')
+        return [TradeSource("", os.path.abspath(os.path.join(input_dir, TRADE_FILE)))]
+
+    sources = []
+    for account, path in config.items('sources'):
+        path = os.path.abspath(os.path.expanduser(path))
+        if not path.lower().endswith('.csv'):
+            path = os.path.join(path, TRADE_FILE)
+        if any(source.path == path for source in sources):
+            raise ValueError(f"'{path}' is listed more than once in the 'sources' section of the configuration.")
+        sources.append(TradeSource(account, path))
+    return sources
+
+
+def parse_executor(sources: Sequence[TradeSource]) -> Executor | None:
+    """A process pool to parse the files of several accounts side by side - None for a single file, which is
+    parsed in place.  The workers are spawned rather than forked, as the service is threaded by then."""
+    if len(sources) < 2:
+        return None
+    return ProcessPoolExecutor(max_workers=min(len(sources), os.cpu_count() or 1),
+                               mp_context=multiprocessing.get_context('spawn'))
+
+
+class TradeSources:
+    """The trade book requests are served from - one OrderClerk file, or the files of several accounts merged.
+
+    Every file is loaded and cached on its own by the TradeBookCache, so an account whose file did not change
+    costs nothing, and the files are loaded side by side on threads (their full parses in the loader's process
+    pool), so ingesting them takes about as long as the largest file however many accounts there are.  The
+    merged book, told apart by its Account column, is only built again when one of the files or the pricing
+    date changed.  A file that cannot be read is left out, the other accounts are still served.
+    """
+
+    def __init__(self, cache: TradeBookCache, sources: Sequence[TradeSource]):
+        if not sources:
+            raise ValueError("At least one trade file is needed.")
+        self.cache = cache
+        self.sources = list(sources)
+        self._lock = threading.Lock()
+        self._merged: CachedTradeBook | None = None
+        self._merges = SingleFlight()
+        self._threads = None
+        if len(self.sources) > 1:
+            self._threads = ThreadPoolExecutor(max_workers=len(self.sources), thread_name_prefix="trade-source")
+
+    @property
+    def paths(self) -> List[str]:
+        return [source.path for source in self.sources]
+
+    def get_entry(self) -> CachedTradeBook | None:
+        if self._threads is None:
+            return self.cache.get_entry(self.sources[0].path)
+
+        available = [entry for entry in self._threads.map(self.cache.get_entry, self.paths) if entry is not None]
+        if not available:
+            return None
+        fingerprint = MergedFingerprint(tuple(entry.fingerprint for entry in available))
+        priced_on = min(entry.priced_on for entry in available)
+        with self._lock:
+            merged = self._merged
+        if merged is not None and merged.fingerprint == fingerprint and merged.priced_on == priced_on:
+            return merged
+        return self._merges.do((fingerprint, priced_on), lambda: self._merge(available, fingerprint, priced_on))
+
+    def peek(self) -> CachedTradeBook | None:
+        """The entry last loaded, without looking at the files."""
+        if self._threads is None:
+            return self.cache.peek(self.sources[0].path)
+        with self._lock:
+            return self._merged
+
+    def _merge(self, entries: List[CachedTradeBook], fingerprint: MergedFingerprint,
+               priced_on: date) -> CachedTradeBook:
+        book = TradeBook.concat([entry.profit_loss_data.book for entry in entries])
+        merged = CachedTradeBook(fingerprint, priced_on, ProfitLossData(book=book))
+        with self._lock:
+            self._merged = merged
+        return merged